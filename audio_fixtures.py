@@ -0,0 +1,224 @@
+"""Recorded audio fixtures, and a microphone that replays them.
+
+The listen loop and ``VoiceRecognizer`` used to need a live microphone, so
+nothing in them could be measured twice on the same audio. Captured phrases
+can now be saved as fixtures: a 16 bit PCM WAV file plus a JSON file of the
+same name that holds what the phrase is expected to mean:
+
+    {"transcript": "set a timer for 5 minutes", "intent": "timer",
+     "sample_rate": 16000, "duration_s": 2.1, "recorded": 1791000000.0}
+
+``ReplaySource`` plays fixtures back in the shape of an open
+``speech_recognition.Microphone`` (``stream.read``, ``SAMPLE_RATE``, ...),
+either in real time, faster (``speed``), or as fast as they can be read
+(``speed=0``). ``ReplayService`` puts the same playback behind the
+``capture_service.CaptureService`` interface, so the whole assistant can
+listen to fixtures instead of the microphone (``REPLAY_FIXTURES`` in
+``config.py``).
+
+Record fixtures from the microphone, typing the expected transcript and
+intent after each phrase:
+    python audio_fixtures.py --record 10 [--output benchmarks/data/fixtures]
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+import time
+import wave
+from collections import namedtuple
+
+import numpy as np
+
+from capture_service import AudioRingBuffer, CaptureService
+from wake_word import read_wav
+
+Fixture = namedtuple('Fixture', ['name', 'path', 'samples', 'sample_rate', 'transcript', 'intent'])
+
+
+def _metadata_path(wav_path):
+    return os.path.splitext(wav_path)[0] + '.json'
+
+
+class FixtureRecorder:
+    """Saves captured phrases as numbered WAV fixtures in ``directory``"""
+
+    def __init__(self, directory, prefix='phrase'):
+        self.directory = directory
+        self.prefix = prefix
+        self.saved = 0
+        self._lock = threading.Lock()  # Recognition workers save concurrently
+
+    def _next_path(self):
+        existing = glob.glob(os.path.join(self.directory, f'{self.prefix}_*.wav'))
+        numbers = [int(name) for name in (os.path.basename(path)[len(self.prefix) + 1:-4] for path in existing)
+                   if name.isdigit()]
+        return os.path.join(self.directory, f'{self.prefix}_{max(numbers, default=0) + 1:04d}.wav')
+
+    def save(self, audio, transcript=None, intent=None, name=None):
+        """Write ``speech_recognition.AudioData`` and its expected meaning; returns the WAV path"""
+        os.makedirs(self.directory, exist_ok=True)
+        raw = audio.get_raw_data(convert_width=2)
+        with self._lock:
+            path = os.path.join(self.directory, f'{name}.wav') if name else self._next_path()
+            with wave.open(path, 'wb') as f:
+                f.setnchannels(1)
+                f.setsampwidth(2)
+                f.setframerate(audio.sample_rate)
+                f.writeframes(raw)
+        metadata = {
+            'transcript': transcript,
+            'intent': intent,
+            'sample_rate': audio.sample_rate,
+            'duration_s': round(len(raw) / 2 / audio.sample_rate, 3),
+            'recorded': time.time(),
+        }
+        with open(_metadata_path(path), 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2)
+        self.saved += 1
+        return path
+
+
+def load_fixture(path):
+    """The samples of a WAV fixture and the metadata next to it, if any"""
+    samples, sample_rate = read_wav(path)
+    try:
+        with open(_metadata_path(path), encoding='utf-8') as f:
+            metadata = json.load(f)
+    except FileNotFoundError:
+        metadata = {}
+    name = os.path.splitext(os.path.basename(path))[0]
+    return Fixture(name, path, samples, sample_rate, metadata.get('transcript'), metadata.get('intent'))
+
+
+def load_fixtures(paths):
+    """Fixtures from WAV files and directories of them, in name order"""
+    if isinstance(paths, str):
+        paths = [paths]
+    wav_paths = []
+    for path in paths:
+        wav_paths.extend(sorted(glob.glob(os.path.join(path, '*.wav'))) if os.path.isdir(path) else [path])
+    return [load_fixture(path) for path in wav_paths]
+
+
+def join_fixtures(fixtures, gap_s=1.0):
+    """One stream of all fixtures with ``gap_s`` of silence after each; returns samples and rate"""
+    rates = {fixture.sample_rate for fixture in fixtures}
+    if len(rates) > 1:
+        raise ValueError(f"Fixtures have different sample rates: {sorted(rates)}")
+    sample_rate = rates.pop() if rates else 16000
+    gap = np.zeros(int(gap_s * sample_rate), dtype=np.int16)
+    parts = [part for fixture in fixtures for part in (fixture.samples, gap)]
+    return (np.concatenate(parts) if parts else gap), sample_rate
+
+
+class ReplaySource:
+    """Plays int16 samples back like an open ``speech_recognition.Microphone``
+
+    With ``speed`` 1 a read blocks until the audio it returns would have been
+    spoken, 2 plays twice as fast, and 0 returns every read at once. Reads
+    return ``b""`` once the samples run out.
+    """
+    SAMPLE_WIDTH = 2
+
+    def __init__(self, samples, sample_rate, chunk_size=1024, speed=1.0):
+        self.samples = np.asarray(samples, dtype='<i2')
+        self.SAMPLE_RATE = sample_rate
+        self.CHUNK = chunk_size
+        self.speed = speed
+        self.stream = self
+        self.device_index = None
+        self.audio = None
+        self.position = 0
+        self._started_at = None
+
+    @classmethod
+    def from_fixtures(cls, fixtures, chunk_size=1024, speed=1.0, gap_s=1.0):
+        samples, sample_rate = join_fixtures(fixtures, gap_s)
+        return cls(samples, sample_rate, chunk_size, speed)
+
+    @property
+    def elapsed_s(self):
+        """Seconds of audio read so far"""
+        return self.position / self.SAMPLE_RATE
+
+    def read(self, count):
+        if self._started_at is None:
+            self._started_at = time.perf_counter()
+        chunk = self.samples[self.position:self.position + count]
+        self.position += len(chunk)
+        if self.speed:
+            delay = self._started_at + self.position / self.SAMPLE_RATE / self.speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        return chunk.tobytes()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+class ReplayService(CaptureService):
+    """A ``CaptureService`` fed from fixtures instead of the microphone
+
+    The fixtures are played once, at ``speed`` times real time, into the
+    same ring buffer the microphone would fill. When they run out the buffer
+    is closed, which ends listening like a failed microphone would.
+    """
+
+    def __init__(self, paths, speed=1.0, chunk_size=1024, buffer_s=30.0, gap_s=1.0):
+        super().__init__(chunk_size=chunk_size, buffer_s=buffer_s)
+        self.paths = paths
+        self.speed = speed or 1.0  # Consumers read at the live edge, so it can't be unbounded
+        self.gap_s = gap_s
+
+    def start(self):
+        if self._running:
+            return self
+        fixtures = load_fixtures(self.paths)
+        if not fixtures:
+            raise FileNotFoundError(f"No WAV fixtures in {self.paths}")
+        replay = ReplaySource.from_fixtures(fixtures, self.chunk_size, self.speed, self.gap_s)
+        self.sample_rate = replay.SAMPLE_RATE
+        self.ring = AudioRingBuffer(int(self.buffer_s * self.sample_rate))
+        self._running = True
+        self._thread = threading.Thread(target=self._capture, args=(replay,), daemon=True)
+        self._thread.start()
+        print(f"Replaying {len(fixtures)} fixtures ({len(replay.samples) / replay.SAMPLE_RATE:.0f} s) "
+              f"at {self.speed:g}x")
+        return self
+
+
+def record_fixtures(count, directory):
+    import speech_recognition as sr
+
+    recognizer = sr.Recognizer()
+    recorder = FixtureRecorder(directory)
+    with sr.Microphone() as source:
+        recognizer.adjust_for_ambient_noise(source, duration=1)
+        for i in range(count):
+            input(f"Press Enter, then say a command ({i + 1}/{count})")
+            audio = recognizer.listen(source, timeout=5, phrase_time_limit=10)
+            transcript = input("Expected transcript: ").strip() or None
+            intent = input("Expected intent (blank for none): ").strip() or None
+            print(f"Saved {recorder.save(audio, transcript, intent)}")
+
+
+def main(argv=None):
+    from config import FIXTURES_PATH
+
+    parser = argparse.ArgumentParser(description="Record audio fixtures with their expected transcript and intent")
+    parser.add_argument('--record', type=int, required=True, metavar='N', help="record N phrases from the microphone")
+    parser.add_argument('--output', default=FIXTURES_PATH, help="directory to write the fixtures to")
+    args = parser.parse_args(argv)
+
+    record_fixtures(args.record, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,9 @@ from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
 import math
 from PyQt6.QtCore import QObject, pyqtSignal
 import re
+from speech_queue import PRIORITY_ALARM, PRIORITY_RESPONSE, SpeechQueue
+from config import (TTS_CACHE_ENABLED, TTS_CACHE_PATH, TTS_CACHE_PHRASES, TTS_CACHE_RENDER_AFTER,
+	TTS_CACHE_MAX_FILES, TTS_CACHE_MEMORY_MB)
 
 class AudioManager(QObject):
 	on_start_speaking = pyqtSignal(str)
@@ -14,17 +17,27 @@ class AudioManager(QObject):
 
 	def __init__(self):
 		super().__init__()
-		self.engine = pyttsx3.init()
-		self.setup_voice()
+		self.engine = None  # Created and used only by the speech thread
 		self.volume_interface = self.get_volume_interface()
 		self.current_word = ""
 		self.is_speaking = False
 		
-		# Connect speech engine callbacks
-		self.engine.connect('started-word', self.on_word_start)
-		self.engine.connect('started-utterance', self._on_speaking_started)
-		self.engine.connect('finished-utterance', self._on_speaking_finished)
-		self.engine.connect('finished-utterance', self.on_utterance_finished)
+		# Fixed responses are played from pre-rendered audio (see phrase_cache.py)
+		self.phrase_cache = None
+		if TTS_CACHE_ENABLED:
+			from phrase_cache import PhraseCache
+			phrases = [self.add_speech_markers(phrase) for phrase in TTS_CACHE_PHRASES]
+			self.phrase_cache = PhraseCache(TTS_CACHE_PATH, phrases, TTS_CACHE_RENDER_AFTER, TTS_CACHE_MAX_FILES,
+				TTS_CACHE_MEMORY_MB * 1024 * 1024)
+		
+		# Speech runs on its own thread, so speak() returns at once (see speech_queue.py)
+		self.speech = SpeechQueue(self._create_engine, self._on_speaking_started, self._on_speaking_finished,
+			self.on_word_start, self.phrase_cache).start()
+
+	def _create_engine(self):
+		self.engine = pyttsx3.init()
+		self.setup_voice()
+		return self.engine
 
 	def setup_voice(self):
 		voices = self.engine.getProperty('voices')
@@ -78,37 +91,44 @@ class AudioManager(QObject):
 		
 		return text
 
-	def speak(self, text):
-		"""Speak the given text"""
+	def speak(self, text, priority=PRIORITY_RESPONSE):
+		"""Queue the given text for speaking; returns its Utterance, or None"""
 		if not text:
-			return
+			return None
 			
 		# Clean and format the text
 		formatted_text = self.add_speech_markers(text)
-		self.on_start_speaking.emit(formatted_text)
-		
-		# Split text into words for progressive display
-		words = formatted_text.split()
-		for word in words:
-			self.on_word_spoken.emit(word)
-			
-		self.engine.say(formatted_text)
-		self.engine.runAndWait()
-		self.on_end_speaking.emit()
+		return self.speech.say(formatted_text, priority)
 
-	def on_word_start(self, name, location, length):
-		self.current_word = name
-		self.on_word_spoken.emit(self.current_word)
+	def speak_alarm(self, text):
+		"""Speak ahead of everything else, cutting off a response being spoken"""
+		return self.speak(text, PRIORITY_ALARM)
 
-	def on_utterance_finished(self, name, completed):
-		self.on_end_speaking.emit()
+	def barge_in(self):
+		"""The user started speaking: stop the response and drop the queued ones"""
+		return self.speech.barge_in()
+
+	def cancel_speech(self):
+		"""Drop every response waiting to be spoken"""
+		return self.speech.cancel()
+
+	def on_word_start(self, word):
+		self.current_word = word
+		self.on_word_spoken.emit(self.current_word)
 
-	def _on_speaking_started(self):
+	def _on_speaking_started(self, utterance):
 		self.is_speaking = True
+		self.on_start_speaking.emit(utterance.remaining)
+		
+		# Split text into words for progressive display
+		for word in utterance.remaining.split():
+			self.on_word_spoken.emit(word)
 		self.on_speaking_started.emit()
 		
-	def _on_speaking_finished(self):
-		self.is_speaking = False
+	def _on_speaking_finished(self, utterance):
+		# Stays set while more speech is queued, so the microphone keeps ignoring it
+		self.is_speaking = self.speech.busy
+		self.on_end_speaking.emit()
 		self.on_speaking_finished.emit()
 
 	def get_volume_interface(self):
@@ -0,0 +1,95 @@
+"""Tail latency of hedged recognition against a single backend.
+
+Both backends are fakes with injected latency, so no network or speech
+engine is needed. The primary stands in for an online recognizer: usually
+fast, but with a slow tail (``--tail``) and some failed requests
+(``--failures``). The secondary stands in for a local engine: slower on
+average, but steady. Every phrase is recognized once by the primary alone
+and once through ``HedgedBackend``, and the p50/p95/p99/max latency and the
+number of phrases left without a transcript are reported for both.
+
+Latencies are given at real-time scale and multiplied by ``--scale`` to
+keep the run short.
+
+Run from the repository root:
+    python -m benchmarks.hedging_bench [--phrases 300] [--scale 0.1] [--deadline 5]
+"""
+import argparse
+import random
+import sys
+import time
+
+from recognition_backends import FakeBackend, HedgedBackend
+from telemetry import percentile
+
+
+class FlakyBackend(FakeBackend):
+    """A fake backend whose requests fail at ``failure_rate``"""
+
+    def __init__(self, latency_s, failure_rate=0.0, seed=0):
+        super().__init__(latency_s=latency_s)
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+
+    def _recognize(self, audio):
+        alternatives = super()._recognize(audio)
+        return [] if self.rng.random() < self.failure_rate else alternatives
+
+
+def run(backend, phrases):
+    """Latencies in ms and the number of phrases without a transcript"""
+    latencies, unanswered = [], 0
+    for phrase in phrases:
+        start = time.perf_counter()
+        unanswered += not backend.recognize_result(phrase)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return sorted(latencies), unanswered
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare hedged recognition with a single slow-tailed backend")
+    parser.add_argument('--phrases', type=int, default=300, help="phrases to recognize")
+    parser.add_argument('--scale', type=float, default=0.1, help="multiply every latency by this")
+    parser.add_argument('--tail', type=float, default=0.05, help="share of primary requests that are slow")
+    parser.add_argument('--failures', type=float, default=0.03, help="share of primary requests that fail")
+    parser.add_argument('--deadline', type=float, default=5.0, help="hedged deadline in seconds (real-time scale)")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    scale = args.scale
+
+    def primary_latency():
+        # Mostly 200-500 ms, with a tail of requests that hang for seconds
+        if rng.random() < args.tail:
+            return rng.uniform(2.0, 6.0) * scale
+        return rng.lognormvariate(-1.2, 0.3) * scale
+
+    def secondary_latency():
+        return rng.uniform(0.5, 0.8) * scale
+
+    phrases = [f"command {i}" for i in range(args.phrases)]
+
+    single = FlakyBackend(primary_latency, args.failures, args.seed)
+    results = {'primary only': run(single, phrases)}
+
+    primary = FlakyBackend(primary_latency, args.failures, args.seed)
+    hedged = HedgedBackend(primary, FakeBackend(latency_s=secondary_latency), deadline_s=args.deadline * scale,
+                           initial_delay_s=1.0 * scale, min_delay_s=0.2 * scale)
+    results['hedged'] = run(hedged, phrases)
+
+    print(f"{args.phrases} phrases, {args.tail:.0%} slow and {args.failures:.0%} failed primary requests, "
+          f"latencies x{scale:g}")
+    print(f"{'':<13} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'unanswered':>11}")
+    for name, (latencies, unanswered) in results.items():
+        print(f"{name:<13} {percentile(latencies, 50):>8.1f} {percentile(latencies, 95):>8.1f} "
+              f"{percentile(latencies, 99):>8.1f} {latencies[-1]:>8.1f} {unanswered:>11}")
+    stats = hedged.stats()
+    print(f"Hedged {stats['hedged']} phrases after {stats['hedge_delay_ms']:.0f} ms, secondary won "
+          f"{stats['secondary_wins']}, {stats['cancelled']} requests cancelled, {stats['abandoned']} left running, "
+          f"{stats['deadline_misses']} deadline misses")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""Import-time budget report.
+
+Imports each module in a fresh interpreter with ``-X importtime`` and compares
+the cumulative import time against its budget. ``main`` covers everything that
+has to load before the window can appear; the speech, NLTK and web modules are
+loaded by ``VoiceAssistant.warm_up()`` after it.
+
+Run from the repository root:
+    python -m benchmarks.import_budget [module ...]
+
+Exits with status 1 when a module is over budget.
+"""
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budgets in milliseconds, measured from a cold interpreter
+IMPORT_BUDGETS_MS = {
+    'main': 500,
+    'gui': 250,
+    'audio_manager': 300,
+    'time_manager': 150,
+    'command_patterns': 5,
+    'intent_engine': 40,
+    'lemma_table': 30,
+    'keyword_scanner': 10,
+    'synonym_index': 40,
+    'voice_recognition': 250,
+    'system_controller': 500,
+    'web_search': 500,
+    'nltk': 800,
+}
+
+
+def measure_import(module):
+    """Return the cumulative import time of ``module`` in milliseconds"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()
+        raise ImportError(error[-1] if error else f"Could not import {module}")
+
+    # Lines look like "import time:  self [us] | cumulative | imported package"
+    for line in reversed(result.stderr.splitlines()):
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) == 3 and fields[2].strip() == module:
+            return int(fields[1]) / 1000.0
+    raise ImportError(f"No import timing reported for {module}")
+
+
+def main(modules=None):
+    modules = modules or list(IMPORT_BUDGETS_MS.keys())
+    over_budget = False
+
+    print(f"{'module':<20} {'import ms':>10} {'budget ms':>10}  status")
+    for module in modules:
+        budget = IMPORT_BUDGETS_MS.get(module)
+        try:
+            elapsed = measure_import(module)
+        except ImportError as e:
+            print(f"{module:<20} {'-':>10} {budget or '-':>10}  ERROR ({e})")
+            over_budget = True
+            continue
+
+        status = 'ok'
+        if budget is not None and elapsed > budget:
+            status = 'OVER'
+            over_budget = True
+        print(f"{module:<20} {elapsed:>10.1f} {budget or '-':>10}  {status}")
+
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
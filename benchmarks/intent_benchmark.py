@@ -0,0 +1,175 @@
+"""Intent routing accuracy and latency benchmark.
+
+Routes every utterance of the labeled corpus through ``IntentClassifier.route``,
+the same path ``process_command`` takes, and reports per-intent precision and
+recall together with p50/p95/p99 latency and throughput. Nothing here needs a
+microphone, TTS or network, so engine changes can be compared on the same
+numbers.
+
+Both scoring engines (``keywords`` and ``model``) are run by default and shown
+side by side. If the model was trained with ``--corpus`` on this same corpus
+its numbers are optimistic. With ``--batch`` the corpus is also classified with
+``IntentClassifier.classify_batch`` and checked against the per-utterance path.
+
+Run from the repository root:
+    python -m benchmarks.intent_benchmark [--engine keywords|model|both] [--corpus PATH]
+                                          [--json PATH] [--batch]
+"""
+import argparse
+import json
+import sys
+import time
+
+from benchmarks.intent_corpus import CORPUS_PATH, NO_INTENT, load_corpus
+from command_patterns import COMMAND_PATTERNS
+from config import INTENT_MODEL_PATH, LEMMA_TABLE_PATH, LEMMA_VOCABULARY_PATHS, SYNONYM_INDEX_PATH
+from intent_engine import IntentClassifier
+from telemetry import percentile
+
+
+def run_benchmark(classifier, corpus):
+    """Route every utterance and collect predictions and latencies"""
+    predictions = []
+    latencies_us = []
+    classifier.cache.clear()
+
+    start = time.perf_counter()
+    for _, text in corpus:
+        # Every utterance is judged on its own, without context from the last one
+        classifier.previous_command_type = None
+        call_start = time.perf_counter_ns()
+        route = classifier.route(text)
+        latencies_us.append((time.perf_counter_ns() - call_start) / 1000.0)
+        predictions.append(route.intent or NO_INTENT)
+    elapsed = time.perf_counter() - start
+
+    return predictions, latencies_us, elapsed
+
+
+def summarize(corpus, predictions, latencies_us, elapsed):
+    labels = [intent for intent, _ in corpus]
+    intents = sorted(set(labels) | set(predictions))
+
+    per_intent = {}
+    for intent in intents:
+        tp = sum(1 for label, pred in zip(labels, predictions) if label == intent and pred == intent)
+        fp = sum(1 for label, pred in zip(labels, predictions) if label != intent and pred == intent)
+        fn = sum(1 for label, pred in zip(labels, predictions) if label == intent and pred != intent)
+        per_intent[intent] = {
+            'support': tp + fn,
+            'precision': tp / (tp + fp) if tp + fp else 0.0,
+            'recall': tp / (tp + fn) if tp + fn else 0.0,
+        }
+
+    ordered = sorted(latencies_us)
+    correct = sum(1 for label, pred in zip(labels, predictions) if label == pred)
+    return {
+        'utterances': len(corpus),
+        'accuracy': correct / len(corpus) if corpus else 0.0,
+        'latency_us': {
+            'p50': percentile(ordered, 50),
+            'p95': percentile(ordered, 95),
+            'p99': percentile(ordered, 99),
+            'mean': sum(ordered) / len(ordered) if ordered else 0.0,
+        },
+        'throughput_per_s': len(corpus) / elapsed if elapsed else 0.0,
+        'per_intent': per_intent,
+    }
+
+
+def run_batch_check(classifier, corpus):
+    """Compare classify_batch with identify_command_type and time both"""
+    texts = [text for _, text in corpus]
+    classifier.cache.clear()
+
+    start = time.perf_counter()
+    single = []
+    for text in texts:
+        classifier.previous_command_type = None
+        single.append(classifier.identify_command_type(text))
+    single_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = classifier.classify_batch(texts)
+    batch_elapsed = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(single, batch) if a != b)
+    return {
+        'mismatches': mismatches,
+        'single_per_s': len(texts) / single_elapsed if single_elapsed else 0.0,
+        'batch_per_s': len(texts) / batch_elapsed if batch_elapsed else 0.0,
+    }
+
+
+def print_report(results_by_engine):
+    engines = list(results_by_engine.keys())
+    first = results_by_engine[engines[0]]
+
+    header = f"{'intent':<16} {'support':>8}"
+    for engine in engines:
+        header += f" {engine + ' P':>12} {engine + ' R':>12}"
+    print(header)
+    for intent in first['per_intent']:
+        line = f"{intent:<16} {first['per_intent'][intent]['support']:>8}"
+        for engine in engines:
+            stats = results_by_engine[engine]['per_intent'].get(intent, {'precision': 0.0, 'recall': 0.0})
+            line += f" {stats['precision']:>12.3f} {stats['recall']:>12.3f}"
+        print(line)
+
+    for engine, results in results_by_engine.items():
+        latency = results['latency_us']
+        print()
+        print(f"[{engine}]")
+        print(f"Utterances : {results['utterances']}")
+        print(f"Accuracy   : {results['accuracy']:.3f}")
+        print(f"Latency    : p50 {latency['p50']:.1f} us, p95 {latency['p95']:.1f} us, "
+              f"p99 {latency['p99']:.1f} us, mean {latency['mean']:.1f} us")
+        print(f"Throughput : {results['throughput_per_s']:.0f} utterances/s")
+        print(f"Cache      : {results['cache']['hits']} hits, {results['cache']['misses']} misses")
+        if 'batch' in results:
+            print(f"Batch      : {results['batch']['batch_per_s']:.0f} utterances/s "
+                  f"(single {results['batch']['single_per_s']:.0f}/s), "
+                  f"{results['batch']['mismatches']} mismatches")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark intent routing accuracy and latency")
+    parser.add_argument('--engine', choices=IntentClassifier.ENGINES + ('both',), default='both',
+                        help="scoring engine to benchmark")
+    parser.add_argument('--corpus', default=CORPUS_PATH, help="labeled corpus (intent<TAB>utterance)")
+    parser.add_argument('--json', help="also write the results to this file")
+    parser.add_argument('--batch', action='store_true', help="also check and time classify_batch")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus)
+    engines = IntentClassifier.ENGINES if args.engine == 'both' else (args.engine,)
+
+    results_by_engine = {}
+    for engine in engines:
+        classifier = IntentClassifier(COMMAND_PATTERNS, SYNONYM_INDEX_PATH, engine, INTENT_MODEL_PATH,
+                                      lemma_table_path=LEMMA_TABLE_PATH, vocabulary_paths=LEMMA_VOCABULARY_PATHS)
+
+        # Load the lemma table and scorer up front so the first utterance isn't penalized
+        start = time.perf_counter()
+        classifier.warm_up()
+        print(f"{engine} warm-up: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        predictions, latencies_us, elapsed = run_benchmark(classifier, corpus)
+        results = summarize(corpus, predictions, latencies_us, elapsed)
+        results['cache'] = classifier.cache.stats()
+        if args.batch:
+            results['batch'] = run_batch_check(classifier, corpus)
+        results_by_engine[engine] = results
+
+    print()
+    print_report(results_by_engine)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results_by_engine, f, indent=2)
+    mismatches = sum(results.get('batch', {}).get('mismatches', 0) for results in results_by_engine.values())
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
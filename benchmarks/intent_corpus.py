@@ -0,0 +1,198 @@
+"""Labeled utterance corpus for the intent benchmark.
+
+Utterances are expanded from hand-written templates for every command type in
+``COMMAND_PATTERNS`` plus a ``none`` class for requests the assistant has no
+command for. The expansion is seeded, so regenerating gives the same corpus.
+
+Regenerate the checked-in corpus from the repository root:
+    python -m benchmarks.intent_corpus
+"""
+import itertools
+import os
+import random
+import sys
+
+from intent_engine import NO_INTENT
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'intent_corpus.tsv')
+PER_INTENT = 250
+SEED = 1234
+
+SLOTS = {
+    'app': ['chrome', 'firefox', 'edge', 'brave', 'word', 'excel', 'powerpoint', 'outlook',
+            'notepad', 'calculator', 'paint', 'cmd', 'explorer', 'settings', 'spotify',
+            'discord', 'visual studio code', 'teams', 'zoom', 'steam', 'slack'],
+    'level': ['10', '20', '25', '30', '40', '50', '60', '70', '75', '80', '90', '100'],
+    'duration': ['5 minutes', '30 seconds', '1 hour', '2 hours 15 minutes', '90 seconds',
+                 '10 min', '45 minutes', '3 minutes', '20 seconds', '1 hour 30 minutes'],
+    'clock': ['7:30', '6:45 am', '15:20', '11:00 pm', '8:15 am', '9:00', '5:30 pm', '12:45'],
+    'topic': ['python programming', 'the eiffel tower', 'black holes', 'photosynthesis',
+              'the roman empire', 'machine learning', 'climate change', 'the moon landing',
+              'quantum computing', 'the amazon rainforest'],
+    'person': ['albert einstein', 'the president of france', 'taylor swift', 'elon musk',
+               'marie curie', 'the prime minister of india', 'lionel messi'],
+    'task': ['call mom', 'buy milk', 'take out the trash', 'pay the rent', 'water the plants',
+             'send the report', 'book a dentist appointment', 'pick up the kids'],
+    'when': ['today', 'tomorrow', 'this week', 'tonight', 'this weekend'],
+    'machine': ['computer', 'pc', 'system', 'laptop'],
+    'media': ['movies', 'news', 'games', 'shows', 'music', 'books'],
+    'song': ['some jazz', 'my workout playlist', 'the latest hits', 'bohemian rhapsody'],
+    'contact': ['john', 'sarah', 'my boss', 'the team'],
+}
+
+TEMPLATES = {
+    'volume': [
+        'turn the volume up', 'turn the volume down', 'turn the sound up', 'volume up',
+        'volume down', 'increase the volume', 'decrease the volume', 'raise the volume',
+        'lower the volume', 'make it louder', 'make it quieter', 'louder', 'softer',
+        'mute the volume', 'mute', 'unmute the sound', 'unmute the speaker',
+        'set volume to {level}', 'set the volume to {level} percent', 'volume {level} percent',
+        'change the volume to {level}', 'adjust the sound to {level} percent',
+        'make the volume {level} percent', 'sound up a bit', 'can you make it a little louder',
+    ],
+    'time': [
+        'what time is it', 'what is the time', 'tell me the time', 'give me the time',
+        'what time is it right now', 'current time', 'got the time', 'what does the clock say',
+        'tell me the current time', 'what is the current time', 'what hour is it',
+    ],
+    'greeting': [
+        'hello', 'hi', 'hey', 'hi athena', 'hello there', 'good morning', 'good afternoon',
+        'good evening', 'greetings', 'how are you', 'how are you doing today',
+        'nice to meet you', 'pleased to meet you', 'hey there how are you',
+    ],
+    'open_app': [
+        'open {app}', 'launch {app}', 'start {app}', 'run {app}', 'can you open {app}',
+        'please open {app}', 'open the {app} app', 'launch {app} for me',
+    ],
+    'close_app': [
+        'close {app}', 'quit {app}', 'exit {app}', 'terminate {app}', 'end {app}',
+        'can you close {app}', 'please close {app}', 'close the {app} application',
+    ],
+    'system_control': [
+        'shutdown the {machine}', 'shut down the {machine}', 'turn off the {machine}',
+        'power off the {machine}', 'restart the {machine}', 'reboot the {machine}',
+        'put the {machine} to sleep', 'hibernate the {machine}', 'sleep the {machine}',
+        'can you restart the {machine}', 'please reboot my {machine}',
+        'could you shutdown the {machine}', 'switch off the {machine}',
+    ],
+    'search': [
+        'search for {topic}', 'look up {topic}', 'find information about {topic}',
+        'google {topic}', 'tell me about {topic}', 'what is {topic}', 'who is {person}',
+        'who was {person}', 'how old is {person}', 'latest {media}', 'best {media} of the year',
+        'top {media} right now', 'can you search for {topic}', 'please look up {person}',
+        'explain {topic}', 'how does {topic} work',
+    ],
+    'weather': [
+        "what's the weather like", 'what is the weather {when}', 'how is the weather {when}',
+        'what is the temperature {when}', 'will it rain {when}', 'is it going to snow {when}',
+        'will it be sunny {when}', 'weather forecast for {when}', 'temperature {when}',
+        "what's the forecast for {when}", 'do i need an umbrella {when}',
+    ],
+    'reminder': [
+        'remind me to {task}', 'remind me to {task} {when}', 'set a reminder to {task}',
+        'create a reminder to {task}', "don't let me forget to {task}",
+        'help me remember to {task}', 'remember to {task}', 'please remind me to {task}',
+    ],
+    'date': [
+        "what is today's date", 'what date is it', 'what is the date', 'tell me the date',
+        'what day is it', 'what is the day today', 'what day is today', 'tell me the day',
+        "what's today", 'current date', 'what is the date today', "what's the date",
+    ],
+    'timer': [
+        'set a timer for {duration}', 'start a timer for {duration}', 'create a timer for {duration}',
+        'set timer for {duration}', 'give me a timer for {duration}', 'set me a timer for {duration}',
+        'start timer {duration}', 'please set a timer for {duration}',
+    ],
+    'alarm': [
+        'set an alarm for {clock}', 'create an alarm for {clock}', 'set alarm for {clock}',
+        'wake me up at {clock}', 'wake me at {clock}', 'please set an alarm for {clock}',
+        'can you set an alarm for {clock}',
+    ],
+    'cancel_timer': [
+        'cancel the timer', 'stop the timer', 'remove the timer', 'cancel all timers',
+        'stop all timers', 'remove all timers', 'cancel timer', 'please cancel the timer',
+        'can you stop the timer', 'cancel my timer', 'stop timers',
+    ],
+    'cancel_alarm': [
+        'cancel the alarm', 'stop the alarm', 'remove the alarm', 'cancel all alarms',
+        'stop all alarms', 'remove all alarms', 'cancel alarm', 'please cancel the alarm',
+        'can you stop the alarm', 'cancel my alarm', 'stop alarms',
+    ],
+    'list_timers': [
+        'list timers', 'list the timers', 'show the active timers', 'show timers',
+        'what are the active timers', 'how many timers do i have', 'what timers are running',
+        'list active timers', 'show me my timers', 'which timers are running',
+    ],
+    'list_alarms': [
+        'list alarms', 'list the alarms', 'show the active alarms', 'show alarms',
+        'what are the active alarms', 'how many alarms do i have', 'what alarms are set',
+        'list active alarms', 'show me my alarms', 'which alarms are set',
+    ],
+    NO_INTENT: [
+        'play {song}', 'tell me a joke', 'thank you', 'thanks', 'order a pizza',
+        'call {contact}', 'send a message to {contact}', 'turn on the lights',
+        'take a screenshot', 'sing a song', 'never mind', 'add {task} to my list',
+        'email {contact}', 'play {song} on spotify', 'goodbye athena',
+    ],
+}
+
+PREFIXES = ['', '', '', 'please ', 'hey athena ', 'athena ', 'okay ']
+SUFFIXES = ['', '', '', ' please', ' now', ' for me', ' thanks']
+
+
+def expand_template(template):
+    """Yield every filling of the slots in ``template``"""
+    names = [name for name in SLOTS if '{' + name + '}' in template]
+    for values in itertools.product(*(SLOTS[name] for name in names)):
+        yield template.format(**dict(zip(names, values)))
+
+
+def generate_corpus(per_intent=PER_INTENT, seed=SEED):
+    """Return a list of (intent, utterance) pairs"""
+    rng = random.Random(seed)
+    corpus = []
+    for intent, templates in TEMPLATES.items():
+        base = [text for template in templates for text in expand_template(template)]
+        variants = {text for text in base}
+        # Add polite and wake-word variations until the class is full
+        attempts = 0
+        while len(variants) < per_intent and attempts < per_intent * 20:
+            text = rng.choice(PREFIXES) + rng.choice(base) + rng.choice(SUFFIXES)
+            variants.add(text)
+            attempts += 1
+        utterances = sorted(variants)
+        rng.shuffle(utterances)
+        corpus.extend((intent, text) for text in utterances[:per_intent])
+    return corpus
+
+
+def load_corpus(path=CORPUS_PATH):
+    """Read (intent, utterance) pairs from a tab-separated file"""
+    corpus = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if not line or line.startswith('#'):
+                continue
+            intent, text = line.split('\t', 1)
+            corpus.append((intent, text))
+    return corpus
+
+
+def save_corpus(corpus, path=CORPUS_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('# intent\tutterance\n')
+        for intent, text in corpus:
+            f.write(f'{intent}\t{text}\n')
+
+
+def main():
+    corpus = generate_corpus()
+    save_corpus(corpus)
+    print(f"Wrote {len(corpus)} utterances to {CORPUS_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""Microbenchmark for the precompiled intent matcher.
+
+Compares the old per-pattern ``re.search`` loop with ``IntentEngine.match`` on
+the same utterances and reports the per-utterance latency of each.
+
+Run from the repository root:
+    python -m benchmarks.intent_engine_bench
+"""
+import re
+import sys
+import time
+
+from command_patterns import COMMAND_PATTERNS
+from intent_engine import IntentEngine
+
+UTTERANCES = [
+    "turn the volume up",
+    "set volume to 40 percent",
+    "what time is it",
+    "hello there",
+    "open chrome",
+    "close notepad",
+    "restart the computer",
+    "search for python tutorials",
+    "what is the weather like",
+    "remind me to call mom",
+    "what is today's date",
+    "set a timer for 5 minutes",
+    "set an alarm for 7:30 am",
+    "cancel the timer",
+    "show active alarms",
+    "play some music",
+]
+
+
+def legacy_match(text):
+    """The pattern stage as it was done before the engine existed"""
+    for cmd_type, cmd_info in COMMAND_PATTERNS.items():
+        for pattern in cmd_info.get('patterns', []):
+            m = re.search(pattern, text, re.IGNORECASE)
+            if m:
+                return cmd_type, m.groups()
+    return None
+
+
+def time_per_utterance(func, utterances, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in utterances:
+            func(text)
+    elapsed = time.perf_counter() - start
+    return elapsed / (rounds * len(utterances)) * 1e6
+
+
+def main(rounds=2000):
+    engine = IntentEngine(COMMAND_PATTERNS)
+
+    for text in UTTERANCES:
+        match = engine.match(text)
+        expected = legacy_match(text)
+        actual = (match.intent, match.args) if match else None
+        if actual != expected:
+            print(f"Mismatch for '{text}': engine={actual} legacy={expected}")
+            return 1
+
+    legacy_us = time_per_utterance(legacy_match, UTTERANCES, rounds)
+    engine_us = time_per_utterance(engine.match, UTTERANCES, rounds)
+
+    print(f"{engine.pattern_count} patterns, {len(UTTERANCES)} utterances, {rounds} rounds")
+    print(f"re.search loop : {legacy_us:8.2f} us/utterance")
+    print(f"IntentEngine   : {engine_us:8.2f} us/utterance")
+    print(f"Speedup        : {legacy_us / engine_us:8.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""Microbenchmark for tokenizing and lemmatizing utterances.
+
+Times ``IntentClassifier.lemmatize_text`` (regex tokenizer and precomputed
+lemma table) on the normalized corpus utterances and reports p50/p95 latency
+against the 50 us target. When NLTK and its data are installed, the old
+``word_tokenize`` plus ``WordNetLemmatizer`` path is timed as well and every
+utterance is checked to give the same text.
+
+Run from the repository root:
+    python -m benchmarks.lemma_bench
+"""
+import sys
+import time
+
+from benchmarks.intent_corpus import load_corpus
+from command_patterns import COMMAND_PATTERNS
+from config import LEMMA_TABLE_PATH, LEMMA_VOCABULARY_PATHS, SYNONYM_INDEX_PATH
+from intent_engine import IntentClassifier, normalize_utterance
+from telemetry import percentile
+
+TARGET_US = 50.0
+
+
+def time_each(func, texts):
+    """Per-call latencies in microseconds, sorted"""
+    latencies = []
+    for text in texts:
+        start = time.perf_counter_ns()
+        func(text)
+        latencies.append((time.perf_counter_ns() - start) / 1000.0)
+    return sorted(latencies)
+
+
+def nltk_lemmatize_text():
+    """The tokenize+lemmatize path used before the lemma table, or None without NLTK data"""
+    try:
+        from nltk.stem import WordNetLemmatizer
+        from nltk.tokenize import word_tokenize
+        lemmatizer = WordNetLemmatizer()
+        word_tokenize('warm up')
+        lemmatizer.lemmatize('warm')
+    except (ImportError, LookupError) as e:
+        print(f"NLTK comparison skipped: {e}")
+        return None
+    return lambda text: ' '.join(lemmatizer.lemmatize(token) for token in word_tokenize(text))
+
+
+def main():
+    texts = [normalize_utterance(text) for _, text in load_corpus()]
+    classifier = IntentClassifier(COMMAND_PATTERNS, SYNONYM_INDEX_PATH, lemma_table_path=LEMMA_TABLE_PATH,
+                                  vocabulary_paths=LEMMA_VOCABULARY_PATHS)
+    classifier.warm_up()
+    print(f"Lemma table: {len(classifier.lemmatizer)} words, {len(texts)} utterances")
+
+    table_us = time_each(classifier.lemmatize_text, texts)
+    print(f"lemma table : p50 {percentile(table_us, 50):7.2f} us, p95 {percentile(table_us, 95):7.2f} us")
+    print(f"WordNet fallbacks: {classifier.lemmatizer.fallback_words}")
+
+    status = 0
+    old_path = nltk_lemmatize_text()
+    if old_path:
+        nltk_us = time_each(old_path, texts)
+        print(f"nltk        : p50 {percentile(nltk_us, 50):7.2f} us, p95 {percentile(nltk_us, 95):7.2f} us")
+        mismatches = [text for text in texts if classifier.lemmatize_text(text) != old_path(text)]
+        print(f"Mismatches  : {len(mismatches)}")
+        for text in mismatches[:10]:
+            print(f"  '{text}': table='{classifier.lemmatize_text(text)}' nltk='{old_path(text)}'")
+        status = 1 if mismatches else 0
+
+    if percentile(table_us, 50) > TARGET_US:
+        print(f"Over the {TARGET_US:.0f} us target")
+        status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
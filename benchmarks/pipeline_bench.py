@@ -0,0 +1,148 @@
+"""Per-stage latency of the voice command pipeline on recorded fixtures.
+
+Replays every audio fixture (see ``audio_fixtures.py``) through the stages
+the listen loop runs, and reports p50/p95/max latency per stage:
+
+- capture: ``listen_phrase`` on a ``ReplaySource``, from the end of the
+  fixture's audio until the phrase is returned. At ``--speed 1`` this
+  includes waiting for the pause that ends a phrase; at ``--speed 0`` the
+  audio arrives at once and only processing time is left
+- wake word: the local detector over the fixture, when templates exist
+- vad: scoring the captured phrase
+- backend: recognizing the captured phrase
+- intent: ``IntentClassifier.route`` on the transcript
+
+Fixtures with an expected transcript or intent are also checked against it.
+The ``fake`` backend (default) answers with the expected transcripts, so
+the pipeline can be measured without a network or speech engine.
+
+Run from the repository root:
+    python -m benchmarks.pipeline_bench [FIXTURE_DIR_OR_WAV ...] [--speed 0]
+        [--backend fake|google|sphinx|vosk] [--engine keywords|model] [--templates FILE]
+"""
+import argparse
+import os
+import sys
+import time
+
+from audio_fixtures import ReplaySource, join_fixtures, load_fixtures
+from command_patterns import COMMAND_PATTERNS
+from config import (FIXTURES_PATH, INTENT_ENGINE, INTENT_MODEL_PATH, LEMMA_TABLE_PATH, LEMMA_VOCABULARY_PATHS,
+                    RECOGNITION_LANGUAGE, SYNONYM_INDEX_PATH, VOSK_MODEL_PATH, WAKE_WORD_SENSITIVITY,
+                    WAKE_WORD_TEMPLATES_PATH)
+from intent_engine import IntentClassifier
+from phrase_capture import listen_phrase
+from recognition_backends import FakeBackend, create_backend
+from telemetry import percentile
+from vad import VoiceActivityDetector
+
+STAGES = ('capture', 'wake_word', 'vad', 'backend', 'intent')
+
+
+def normalize(text):
+    return ' '.join((text or '').lower().split())
+
+
+def run_fixture(fixture, stages, recognizer, backend, classifier, vad, detector, speed):
+    """Run one fixture through every stage; returns the transcript and intent"""
+    # Trailing silence lets the phrase end the way it would after speaking
+    samples, rate = join_fixtures([fixture], gap_s=recognizer.pause_threshold + 0.5)
+    source = ReplaySource(samples, rate, speed=speed)
+    start = time.perf_counter()
+    audio = listen_phrase(recognizer, source, phrase_time_limit=10)
+    # Waiting for the fixture itself to be spoken is not latency
+    audio_end = start + len(fixture.samples) / rate / speed if speed else start
+    stages['capture'].append((time.perf_counter() - audio_end) * 1000)
+
+    if detector:
+        detector.reset()
+        start = time.perf_counter()
+        for offset in range(0, len(fixture.samples), source.CHUNK):
+            detector.process(fixture.samples[offset:offset + source.CHUNK])
+        stages['wake_word'].append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    vad.accept(audio)
+    stages['vad'].append((time.perf_counter() - start) * 1000)
+
+    if isinstance(backend, FakeBackend):
+        backend.transcripts[audio.get_raw_data()] = fixture.transcript
+    start = time.perf_counter()
+    result = backend.recognize_result(audio)
+    stages['backend'].append((time.perf_counter() - start) * 1000)
+    text = classifier.best_transcript(result.transcripts) if result else None
+    if not text:
+        return None, None
+
+    classifier.previous_command_type = None  # Fixtures are independent commands
+    start = time.perf_counter()
+    route = classifier.route(text)
+    stages['intent'].append((time.perf_counter() - start) * 1000)
+    return text, route.intent
+
+
+def main(argv=None):
+    import speech_recognition as sr
+
+    parser = argparse.ArgumentParser(description="Measure per-stage pipeline latency on recorded fixtures")
+    parser.add_argument('fixtures', nargs='*', default=[FIXTURES_PATH], help="WAV fixtures or directories of them")
+    parser.add_argument('--speed', type=float, default=0.0, help="replay speed, 1 for real time, 0 for unpaced")
+    parser.add_argument('--backend', default='fake', help="speech recognition backend")
+    parser.add_argument('--engine', default=INTENT_ENGINE, help="intent scoring engine")
+    parser.add_argument('--templates', default=WAKE_WORD_TEMPLATES_PATH, help="wake word templates")
+    args = parser.parse_args(argv)
+
+    fixtures = load_fixtures([path for path in args.fixtures if os.path.exists(path)])
+    if not fixtures:
+        print("No fixtures: record some with 'python audio_fixtures.py --record 10' or pass WAV files")
+        return 1
+
+    recognizer = sr.Recognizer()
+    recognizer.dynamic_energy_threshold = False  # Every fixture starts from the same threshold
+    if args.backend == 'fake':
+        backend = FakeBackend()
+    else:
+        backend = create_backend(args.backend, recognizer, RECOGNITION_LANGUAGE, VOSK_MODEL_PATH)
+    classifier = IntentClassifier(COMMAND_PATTERNS, SYNONYM_INDEX_PATH, args.engine, INTENT_MODEL_PATH,
+                                  cache_size=0, lemma_table_path=LEMMA_TABLE_PATH,
+                                  vocabulary_paths=LEMMA_VOCABULARY_PATHS)
+    classifier.warm_up()
+    vad = VoiceActivityDetector(audit_rate=0)
+    detector = None
+    if os.path.exists(args.templates):
+        from wake_word import WakeWordDetector, load_templates
+        detector = WakeWordDetector(load_templates(args.templates), fixtures[0].sample_rate, WAKE_WORD_SENSITIVITY)
+
+    stages = {stage: [] for stage in STAGES}
+    transcripts_correct = intents_correct = transcripts_expected = intents_expected = 0
+    for fixture in fixtures:
+        text, intent = run_fixture(fixture, stages, recognizer, backend, classifier, vad, detector, args.speed)
+        if fixture.transcript:
+            transcripts_expected += 1
+            transcripts_correct += normalize(text) == normalize(fixture.transcript)
+        if fixture.intent:
+            intents_expected += 1
+            intents_correct += intent == fixture.intent
+
+    audio_s = sum(len(fixture.samples) / fixture.sample_rate for fixture in fixtures)
+    print(f"{len(fixtures)} fixtures ({audio_s:.1f} s), backend {backend.name}, engine {args.engine}, "
+          f"speed {args.speed:g}")
+    print(f"{'stage':<10} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for stage in STAGES:
+        ordered = sorted(stages[stage])
+        if not ordered:
+            print(f"{stage:<10} {'skipped':>6}")
+            continue
+        print(f"{stage:<10} {len(ordered):>6} {percentile(ordered, 50):>9.2f} {percentile(ordered, 95):>9.2f} "
+              f"{ordered[-1]:>9.2f}")
+    vad_stats = vad.stats()
+    print(f"VAD        : {vad_stats['speech']}/{vad_stats['segments']} phrases passed as speech")
+    if transcripts_expected:
+        print(f"Transcripts: {transcripts_correct}/{transcripts_expected} correct")
+    if intents_expected:
+        print(f"Intents    : {intents_correct}/{intents_expected} correct")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Per-call latency of the speech recognition backends.
+
+Recognizes the same WAV clips with each backend and reports p50/p95/max
+latency per call. When a transcript file is given, it also reports how many
+clips each backend got exactly right. Backends whose engine isn't installed
+(or has no model) are skipped, so the fastest usable backend on this machine
+can be picked from the numbers.
+
+The transcript file has one ``clip.wav<TAB>expected text`` line per clip. The
+``fake`` backend answers with these transcripts and measures only the
+overhead of the backend interface.
+
+Run from the repository root:
+    python -m benchmarks.recognizer_bench clip.wav [clip.wav ...]
+        [--backends google,sphinx,vosk,fake] [--transcripts FILE] [--rounds N]
+"""
+import argparse
+import os
+import sys
+
+from config import RECOGNITION_LANGUAGE, VOSK_MODEL_PATH
+from recognition_backends import BACKENDS, FakeBackend, create_backend
+
+
+def load_transcripts(path):
+    transcripts = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip() and not line.startswith('#'):
+                name, text = line.rstrip('\n').split('\t', 1)
+                transcripts[os.path.basename(name)] = text
+    return transcripts
+
+
+def load_clips(paths):
+    import speech_recognition as sr
+
+    recognizer = sr.Recognizer()
+    clips = []
+    for path in paths:
+        with sr.AudioFile(path) as source:
+            clips.append((os.path.basename(path), recognizer.record(source)))
+    return clips
+
+
+def normalize(text):
+    return ' '.join((text or '').lower().split())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare speech recognition backends on WAV clips")
+    parser.add_argument('clips', nargs='+', help="WAV files to recognize")
+    parser.add_argument('--backends', default=','.join(BACKENDS), help="comma-separated backends to try")
+    parser.add_argument('--transcripts', help="expected text per clip (clip.wav<TAB>text)")
+    parser.add_argument('--rounds', type=int, default=1, help="recognize every clip this many times")
+    args = parser.parse_args(argv)
+
+    transcripts = load_transcripts(args.transcripts) if args.transcripts else {}
+    clips = load_clips(args.clips)
+
+    print(f"{'backend':<8} {'calls':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'correct':>9}")
+    for name in args.backends.split(','):
+        try:
+            if name == 'fake':
+                backend = FakeBackend({audio.get_raw_data(): transcripts.get(clip) for clip, audio in clips})
+            else:
+                backend = create_backend(name, language=RECOGNITION_LANGUAGE, vosk_model_path=VOSK_MODEL_PATH)
+        except Exception as e:
+            print(f"{name:<8} skipped: {e}")
+            continue
+
+        correct = 0
+        for _ in range(args.rounds):
+            for clip, audio in clips:
+                text = backend.recognize(audio)
+                correct += clip in transcripts and normalize(text) == normalize(transcripts[clip])
+
+        stats = backend.stats()
+        score = f"{correct}/{stats['calls']}" if transcripts else '-'
+        print(f"{name:<8} {stats['calls']:>6} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} "
+              f"{stats['max_ms']:>9.1f} {score:>9}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
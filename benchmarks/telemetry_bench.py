@@ -0,0 +1,100 @@
+"""Overhead of the latency spans in ``telemetry.py``.
+
+Measures the cost of one span with the tracer enabled and disabled, then
+runs the corpus utterances through the headless command path (routing and
+the handler, both timed with spans) with tracing off and on. This is the
+cheapest path a command can take, with no audio, network or speech output,
+so it is where spans cost the most relative to the work they time. A voice
+command records about ``VOICE_COMMAND_SPANS`` spans (capture, VAD,
+recognition, execution, routing, the handler and speech output) around
+stages that take hundreds of milliseconds, and the report shows the command
+length above which those spans stay under 1%. The export of everything
+recorded is timed too.
+
+Run from the repository root:
+    python -m benchmarks.telemetry_bench [--rounds N] [--spans N]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.intent_corpus import CORPUS_PATH, load_corpus
+from headless import HeadlessAssistant, TextCommandDriver
+from telemetry import tracer
+
+VOICE_COMMAND_SPANS = 7
+
+
+def span_cost_ns(count):
+    start = time.perf_counter_ns()
+    for _ in range(count):
+        with tracer.span('bench'):
+            pass
+    return (time.perf_counter_ns() - start) / count
+
+
+def command_time_us(driver, commands, rounds):
+    """Mean wall time per command over the best of ``rounds`` runs"""
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for command in commands:
+            driver.run_command(command)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(commands) * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the overhead of latency spans")
+    parser.add_argument('--rounds', type=int, default=5, help="runs over the corpus per setting")
+    parser.add_argument('--spans', type=int, default=200000, help="spans for the per-span cost")
+    parser.add_argument('--corpus', default=CORPUS_PATH, help="labeled utterance corpus")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        spans_path = os.path.join(directory, 'spans.jsonl')
+        metrics_path = os.path.join(directory, 'metrics.prom')
+
+        tracer.enabled = False
+        disabled_ns = span_cost_ns(args.spans)
+        tracer.enabled, tracer.spans_path, tracer.metrics_path = True, spans_path, metrics_path
+        enabled_ns = span_cost_ns(args.spans)
+        tracer.export()
+        tracer.stages.clear()
+        print(f"Span cost  : {enabled_ns:.0f} ns enabled, {disabled_ns:.0f} ns disabled")
+
+        commands = [utterance for _, utterance in load_corpus(args.corpus)]
+        driver = TextCommandDriver(HeadlessAssistant())
+        tracer.enabled = False
+        for command in commands:
+            driver.run_command(command)  # Fill the intent cache so both settings see the same work
+
+        tracer.enabled = False
+        off_us = command_time_us(driver, commands, args.rounds)
+        tracer.enabled = True
+        on_us = command_time_us(driver, commands, args.rounds)
+        spans = sum(stats['count'] for stats in tracer.stats().values())
+
+        start = time.perf_counter()
+        tracer.export()
+        export_ms = (time.perf_counter() - start) * 1000
+        size_kb = os.path.getsize(spans_path) / 1024
+
+    overhead = (on_us - off_us) / off_us if off_us else 0.0
+    print(f"Command    : {off_us:.1f} us without spans, {on_us:.1f} us with spans "
+          f"({overhead:+.1%}, {spans / (args.rounds * len(commands)):.1f} spans per command)")
+    voice_us = VOICE_COMMAND_SPANS * enabled_ns / 1000
+    print(f"Voice      : {VOICE_COMMAND_SPANS} spans cost {voice_us:.0f} us, under 1% of any command "
+          f"taking more than {voice_us * 100 / 1000:.1f} ms")
+    print(f"Export     : {spans} spans in {export_ms:.1f} ms ({size_kb:.0f} KB of JSONL)")
+    for stage, stats in sorted(tracer.stats().items()):
+        print(f"{stage:<10} : p50 {stats['p50_ms'] * 1000:.1f} us, p95 {stats['p95_ms'] * 1000:.1f} us, "
+              f"p99 {stats['p99_ms'] * 1000:.1f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Time to first audio of cached and live speech.
+
+Speaks the ``TTS_CACHE_PHRASES`` from ``config.py`` through ``SpeechQueue``
+twice: synthesized live by pyttsx3, then played from a ``PhraseCache`` that
+rendered them beforehand. For every utterance it measures the time from
+``say`` until audio starts, the first word reported by the engine when live
+and the first chunk written to the output stream when cached, and reports
+p50/p95/max for both. Both runs start with one utterance that is not
+counted, which loads the voice and opens the output stream.
+
+The phrases are spoken out loud. The cache is rendered into a temporary
+directory, so ``cache/tts`` is left alone.
+
+Run from the repository root:
+    python -m benchmarks.tts_cache_bench [--rounds 3]
+"""
+import argparse
+import sys
+import tempfile
+import time
+
+from config import TTS_CACHE_PHRASES
+from phrase_cache import PhraseCache
+from speech_queue import SpeechQueue
+from telemetry import percentile
+
+
+def time_to_first_audio(speech, phrases, rounds):
+    """Milliseconds from ``say`` to the first audio of each utterance"""
+    speech.say(phrases[0]).wait()
+    latencies = []
+    for _ in range(rounds):
+        for text in phrases:
+            utterance = speech.say(text)
+            utterance.wait()
+            if utterance.first_audio_at is not None:
+                latencies.append((utterance.first_audio_at - utterance.queued_at) * 1000)
+    return sorted(latencies)
+
+
+def main(argv=None):
+    import pyttsx3
+
+    parser = argparse.ArgumentParser(description="Compare time to first audio of cached and live speech")
+    parser.add_argument('--rounds', type=int, default=3, help="times every phrase is spoken per setting")
+    args = parser.parse_args(argv)
+    phrases = list(TTS_CACHE_PHRASES)
+
+    live = SpeechQueue(pyttsx3.init).start()
+    results = {'live': time_to_first_audio(live, phrases, args.rounds)}
+    live.close()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = PhraseCache(directory, phrases, render_after=0)
+        cached = SpeechQueue(pyttsx3.init, cache=cache).start()
+        start = time.perf_counter()
+        while cache.settings is None and cached.cache and cached._thread.is_alive():
+            time.sleep(0.01)  # The worker creates the engine and the output stream first
+        if not cached.cache or not cached._thread.is_alive():
+            print("Cached speech is unavailable on this machine")
+            return 1
+        while cache.pending():
+            time.sleep(0.01)
+        render_s = time.perf_counter() - start
+        results['cached'] = time_to_first_audio(cached, phrases, args.rounds)
+        stats = cache.stats()
+        cached.close()
+        if cached._player:
+            cached._player.close()
+
+    print(f"{len(phrases)} phrases x {args.rounds} rounds; {stats['rendered']} rendered in {render_s:.1f} s, "
+          f"{stats['hits']} cache hits, {stats['misses']} misses")
+    print(f"{'':<7} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for name, latencies in results.items():
+        if not latencies:
+            print(f"{name:<7} {'no audio reported':>24}")
+            continue
+        print(f"{name:<7} {len(latencies):>6} {percentile(latencies, 50):>8.1f} {percentile(latencies, 95):>8.1f} "
+              f"{latencies[-1]:>8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
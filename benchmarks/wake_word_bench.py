@@ -0,0 +1,106 @@
+"""False accepts, false rejects and CPU cost of the wake word detector.
+
+Streams recorded WAV fixtures through ``WakeWordDetector`` in microphone-sized
+chunks:
+
+- positive clips each contain the wake word once; a clip without a detection
+  is a false reject
+- negative clips (speech without the wake word, TV, typing, silence) should
+  never trigger; every detection is a false accept, reported per hour of audio
+
+CPU time is measured with ``time.process_time`` and reported per hour of
+audio, so the numbers can be compared with keeping a network recognizer busy.
+Each sensitivity in ``--sensitivity`` is tried in turn.
+
+Fixtures default to ``benchmarks/data/wake_word/{enroll,positive,negative}/*.wav``
+(16 bit PCM). Templates come from ``--templates`` or the ``enroll`` clips.
+Without any recordings, or with ``--synthetic``, the seeded clips of
+``wake_word_fixtures.py`` are used, so the numbers can be reproduced anywhere.
+
+Run from the repository root:
+    python -m benchmarks.wake_word_bench [--sensitivity 0.3,0.5,0.7] [--synthetic]
+        [--templates FILE | --enroll WAV ...] [--positive WAV ...] [--negative WAV ...]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+from benchmarks.wake_word_fixtures import synthetic_fixtures
+from wake_word import WakeWordDetector, enroll, load_templates, read_wav
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'wake_word')
+CHUNK = 1024  # speech_recognition.Microphone's default chunk size
+
+
+def fixtures(name):
+    return sorted(glob.glob(os.path.join(FIXTURES, name, '*.wav')))
+
+
+def run_clip(detector, samples):
+    """Stream one clip through the detector; returns the number of detections"""
+    detector.reset()
+    detections = 0
+    for start in range(0, len(samples), CHUNK):
+        detections += detector.process(samples[start:start + CHUNK])
+    return detections
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure wake word false accepts, false rejects and CPU time")
+    parser.add_argument('--sensitivity', default='0.3,0.4,0.5,0.6,0.7', help="comma-separated sensitivities")
+    parser.add_argument('--templates', help="saved templates (wake_word.py --output)")
+    parser.add_argument('--enroll', nargs='*', default=fixtures('enroll'), help="wake word recordings to enroll")
+    parser.add_argument('--positive', nargs='*', default=fixtures('positive'), help="clips containing the wake word")
+    parser.add_argument('--negative', nargs='*', default=fixtures('negative'), help="clips without the wake word")
+    parser.add_argument('--synthetic', action='store_true', help="use the generated clips of wake_word_fixtures.py")
+    args = parser.parse_args(argv)
+
+    if args.synthetic or not (args.templates or args.enroll or args.positive or args.negative):
+        print("Using synthetic fixtures (see benchmarks/wake_word_fixtures.py)")
+        clips = synthetic_fixtures()
+        templates = enroll(clips['enroll'])
+        positives, negatives = clips['positive'], clips['negative']
+    else:
+        if args.templates:
+            templates = load_templates(args.templates)
+        elif args.enroll:
+            templates = enroll([read_wav(path) for path in args.enroll])
+        else:
+            print(f"No templates: pass --templates or --enroll, or add clips to {os.path.join(FIXTURES, 'enroll')}")
+            return 1
+        if not args.positive and not args.negative:
+            print(f"No fixtures: pass --positive/--negative or add clips to {FIXTURES}")
+            return 1
+        positives = [read_wav(path) for path in args.positive]
+        negatives = [read_wav(path) for path in args.negative]
+    positive_s = sum(len(samples) / rate for samples, rate in positives)
+    negative_s = sum(len(samples) / rate for samples, rate in negatives)
+    print(f"{len(templates)} templates, {len(positives)} positive clips ({positive_s:.0f} s), "
+          f"{len(negatives)} negative clips ({negative_s:.0f} s)")
+
+    print(f"{'sensitivity':>11} {'FRR':>7} {'FA':>5} {'FA/hour':>9} {'CPU s/hour':>11} {'CPU %':>7}")
+    for sensitivity in [float(value) for value in args.sensitivity.split(',')]:
+        detectors = {}
+
+        def detector_for(rate):
+            if rate not in detectors:
+                detectors[rate] = WakeWordDetector(templates, rate, sensitivity)
+            return detectors[rate]
+
+        cpu_start = time.process_time()
+        rejects = sum(not run_clip(detector_for(rate), samples) for samples, rate in positives)
+        accepts = sum(run_clip(detector_for(rate), samples) for samples, rate in negatives)
+        cpu_s = time.process_time() - cpu_start
+
+        cpu_per_hour = cpu_s / (positive_s + negative_s) * 3600 if positive_s + negative_s else 0.0
+        frr = rejects / len(positives) if positives else 0.0
+        fa_per_hour = accepts / negative_s * 3600 if negative_s else 0.0
+        print(f"{sensitivity:>11.2f} {frr:>7.1%} {accepts:>5} {fa_per_hour:>9.2f} "
+              f"{cpu_per_hour:>11.1f} {cpu_per_hour / 36:>6.2f}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""Synthetic fixtures for the wake word benchmark.
+
+Recordings of a real wake word depend on the speaker and the microphone, so
+the benchmark's defaults are generated instead. A "word" is a sequence of
+voiced syllables: harmonics of a pitch, shaped by two formants per syllable
+the way vowels are. The wake word is one fixed syllable sequence, and it is
+said slower, faster and at other pitches than the enrolled examples:
+
+- enroll: the wake word three times at slightly different speeds, almost
+  without noise
+- positive: the wake word at 0.8x to 1.2x speed and other pitches, in noise
+- negative: two other words with their own formants in noise, ten seconds
+  of loud noise and ten seconds of silence
+
+Generation is seeded, so every run gets the same clips and the accept and
+reject numbers are reproducible. Real recordings in
+``benchmarks/data/wake_word`` take precedence in the benchmark.
+
+Write the clips as WAV files, e.g. to listen to them, from the repository root:
+    python -m benchmarks.wake_word_fixtures [--output DIR]
+"""
+import argparse
+import os
+import sys
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+# (formant frequencies in Hz, duration in seconds) of each syllable
+WAKE_WORD = [((700, 1200), 0.12), ((300, 2300), 0.15), ((600, 1000), 0.10), ((500, 1500), 0.20),
+             ((750, 1100), 0.15)]
+OTHER_WORDS = [
+    [((400, 800), 0.15), ((350, 2000), 0.10), ((700, 1100), 0.20), ((300, 900), 0.15)],
+    [((600, 1800), 0.20), ((450, 2500), 0.15), ((300, 1000), 0.20)],
+]
+
+
+def syllable(formants, seconds, pitch, rng):
+    """A voiced syllable: harmonics of ``pitch`` weighted by their distance to the formants"""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    sound = np.zeros_like(t)
+    for harmonic in range(1, 30):
+        frequency = pitch * harmonic
+        if frequency > 7000:
+            break
+        amplitude = sum(np.exp(-((frequency - formant) / 120) ** 2) for formant in formants) + 0.02
+        sound += amplitude * np.sin(2 * np.pi * frequency * t + rng.uniform(0, 2 * np.pi))
+    # 20 ms fade in and out, so syllables join without clicks
+    return sound * np.minimum(1, np.minimum(t, t[::-1]) / 0.02)
+
+
+def word(syllables, speed=1.0, pitch=140, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.concatenate([syllable(formants, seconds / speed, pitch * rng.uniform(0.95, 1.05), rng)
+                           for formants, seconds in syllables])
+
+
+def clip(sound, seed, noise=0.02, pad_s=0.5):
+    """16 bit samples of ``sound`` at half of full scale between ``pad_s`` of noise"""
+    rng = np.random.default_rng(seed)
+    padding = np.zeros(int(pad_s * SAMPLE_RATE))
+    sound = np.concatenate([padding, sound / np.abs(sound).max() * 0.5, padding])
+    return (np.clip(sound + rng.normal(0, noise, len(sound)), -1, 1) * 32767).astype(np.int16)
+
+
+def synthetic_fixtures():
+    """``{'enroll': [...], 'positive': [...], 'negative': [...]}`` lists of (samples, sample_rate)"""
+    enroll = [clip(word(WAKE_WORD, speed, seed=i), i, noise=0.005) for i, speed in enumerate([0.9, 1.0, 1.1])]
+    positive = [clip(word(WAKE_WORD, 0.8 + 0.04 * i, pitch=120 + 8 * i, seed=20 + i), 20 + i, noise=0.03)
+                for i in range(11)]
+    negative = [clip(np.concatenate([word(OTHER_WORDS[0], seed=40 + i), word(OTHER_WORDS[1], seed=60 + i)]),
+                     40 + i, noise=0.03, pad_s=5) for i in range(10)]
+    rng = np.random.default_rng(80)
+    negative.append(clip(rng.normal(0, 1, SAMPLE_RATE * 10), 81, noise=0.03))
+    negative.append(np.zeros(SAMPLE_RATE * 10, dtype=np.int16))
+    return {name: [(samples, SAMPLE_RATE) for samples in clips]
+            for name, clips in [('enroll', enroll), ('positive', positive), ('negative', negative)]}
+
+
+def write_wav(path, samples, sample_rate=SAMPLE_RATE):
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(samples.astype('<i2').tobytes())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write the synthetic wake word fixtures as WAV files")
+    parser.add_argument('--output', default='wake_word_fixtures', help="directory to write the clips to")
+    args = parser.parse_args(argv)
+
+    for name, clips in synthetic_fixtures().items():
+        os.makedirs(os.path.join(args.output, name), exist_ok=True)
+        for i, (samples, sample_rate) in enumerate(clips):
+            write_wav(os.path.join(args.output, name, f'{i:02d}.wav'), samples, sample_rate)
+        print(f"Wrote {len(clips)} {name} clips to {os.path.join(args.output, name)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,223 @@
+"""Handlers for the built-in command types.
+
+Patterns, keywords and synonyms for these commands live in
+``command_patterns.py``; this module registers what to do with them. Each
+handler receives the assistant, the raw command and the arguments captured by
+the matching pattern (after the command's argument extractor, if any).
+"""
+import random
+import re
+import time
+from datetime import datetime
+
+from command_registry import register_command, register_fallback
+
+_APP_FILLER = re.compile(r'(?:please|for me|the app|application)\s*')
+# "7:30", "7:30pm" or "7 a.m."; normalized commands spell "a.m." as "a m"
+_CLOCK_TIME = re.compile(r'\b(\d{1,2})(?:\s*:\s*(\d{2}))?(?:\s*([ap])\.?\s*m\b\.?)?', re.IGNORECASE)
+
+
+def app_name_arg(command, args):
+    """Application name from the captured text, without filler words"""
+    return (_APP_FILLER.sub('', args[0].strip().lower()).strip(),) if args else ()
+
+
+def duration_arg(command, args):
+    return (args[0].strip(),) if args else ()
+
+
+def clock_time_arg(command, args):
+    """Clock time from the captured text, dropping trailing words like "please" """
+    if not args:
+        return ()
+    for match in _CLOCK_TIME.finditer(args[0]):
+        hours, minutes, period = match.groups()
+        if minutes or period:
+            return (f"{hours}:{minutes or '00'}{' ' + period.upper() + 'M' if period else ''}",)
+    return (args[0].strip(),)
+
+
+def current_date_text():
+    """Get current date in a natural format"""
+    today = datetime.now()
+    # Get day with proper ordinal suffix (1st, 2nd, 3rd, 4th, etc.)
+    day = today.day
+    if 10 <= day % 100 <= 20:
+        suffix = 'th'
+    else:
+        suffix = {1: 'st', 2: 'nd', 3: 'rd'}.get(day % 10, 'th')
+
+    return today.strftime(f"%A, %B {day}{suffix}, %Y")
+
+
+def current_day_name():
+    """Get current day name"""
+    return datetime.now().strftime("%A")
+
+
+@register_command('volume')
+def handle_volume(assistant, command, args):
+    # Check for numeric volume setting
+    volume_match = re.search(r'(\d+)(?:\s*percent)?', command)
+    if volume_match:
+        volume_level = int(volume_match.group(1))
+        # Ensure volume is between 0 and 100
+        volume_level = max(0, min(100, volume_level))
+        assistant.audio_manager.set_volume(volume_level / 100.0)
+        assistant.respond(f"Setting volume to {volume_level} percent")
+    else:
+        # Handle relative volume changes
+        if any(word in command.lower() for word in ['up', 'higher', 'increase', 'louder', 'raise']):
+            assistant.audio_manager.volume_up()
+            assistant.respond("Increasing volume")
+        elif any(word in command.lower() for word in ['down', 'lower', 'decrease', 'quieter', 'softer']):
+            assistant.audio_manager.volume_down()
+            assistant.respond("Decreasing volume")
+        elif any(word in command.lower() for word in ['mute', 'silence']):
+            assistant.audio_manager.mute()
+            assistant.respond("Muting volume")
+        elif any(word in command.lower() for word in ['unmute', 'restore']):
+            assistant.audio_manager.unmute()
+            assistant.respond("Unmuting volume")
+
+
+@register_command('time')
+def handle_time(assistant, command, args):
+    current_time = time.strftime("%I:%M %p")
+    assistant.respond(f"The current time is {current_time}")
+
+
+@register_command('greeting')
+def handle_greeting(assistant, command, args):
+    responses = [
+        "Hello! How can I help you today?",
+        "Hi there! What can I do for you?",
+        "Hey! I'm here to help!",
+        "Greetings! How may I assist you?",
+        "Good to see you! What's on your mind?"
+    ]
+    assistant.respond(random.choice(responses))
+
+
+@register_command('search')
+def handle_search(assistant, command, args):
+    search_query = re.sub(r'(?:search|look up|find|google|for|please|could you|can you|what is|who is|tell me about)\\s+', '', command).strip()
+
+    # For definition questions, don't announce the search
+    if any(phrase in command.lower() for phrase in ['what is', 'what are', 'define', 'tell me about']):
+        result = assistant.web_search.get_information(command)
+        assistant.respond(result)
+    else:
+        # For general searches, keep the announcement
+        assistant.respond(f"Searching for information about {search_query}")
+        result = assistant.web_search.get_information(command)
+        assistant.respond(result)
+
+
+@register_command('weather')
+def handle_weather(assistant, command, args):
+    assistant.respond("Let me check the current weather")
+    result = assistant.web_search.get_information(f"current weather forecast {time.strftime('%Y-%m-%d')}")
+    assistant.respond(result)
+
+
+@register_command('reminder')
+def handle_reminder(assistant, command, args):
+    reminder_text = re.sub(r'(?:remind|remember|notification|me|to|set|create|reminder|alarm|for|don\'t let me forget|help me remember)\\s+', '', command).strip()
+    assistant.respond(f"I'll remind you to {reminder_text}")
+    # TODO: Implement reminder functionality
+
+
+@register_command('date')
+def handle_date(assistant, command, args):
+    if any(phrase in command.lower() for phrase in [
+        'what is today\'s date', 'what date is it',
+        'what is the date', 'tell me the date'
+    ]):
+        assistant.respond(f"Today is {current_date_text()}")
+    elif any(phrase in command.lower() for phrase in [
+        'what day is it', 'what is the day',
+        'what day is today', 'what is the day today',
+        'tell me the day', 'what\'s today'
+    ]):
+        assistant.respond(f"Today is {current_day_name()}")
+    else:
+        assistant.respond(f"The current date is {current_date_text()}")
+
+
+@register_command('open_app', extract_args=app_name_arg)
+def handle_open_app(assistant, command, args):
+    """Handle requests to open applications"""
+    response = assistant.system_controller.open_application(args[0])
+    assistant.audio_manager.speak(response)
+    return True
+
+
+@register_command('close_app', extract_args=app_name_arg)
+def handle_close_app(assistant, command, args):
+    """Handle requests to close applications"""
+    response = assistant.system_controller.close_application(args[0])
+    assistant.audio_manager.speak(response)
+    return True
+
+
+@register_command('timer', extract_args=duration_arg)
+def handle_timer(assistant, command, args):
+    """Set a timer for the captured duration, e.g. "2 hours 15 minutes" """
+    response = assistant.time_manager.set_timer(args[0] if args else command)
+    assistant.audio_manager.speak(response)
+    return True
+
+
+@register_command('alarm', extract_args=clock_time_arg)
+def handle_alarm(assistant, command, args):
+    """Set an alarm for the captured clock time"""
+    response = assistant.time_manager.set_alarm(args[0] if args else command)
+    assistant.audio_manager.speak(response)
+    return True
+
+
+@register_command('cancel_timer')
+def handle_cancel_timer(assistant, command, args):
+    response = assistant.time_manager.list_timers()
+    if response == "No active timers":
+        assistant.audio_manager.speak(response)
+    else:
+        # Cancel all timers for now - could be made more specific later
+        for timer_name in list(assistant.time_manager.timers.keys()):
+            assistant.time_manager.cancel_timer(timer_name)
+        assistant.audio_manager.speak("All timers cancelled")
+    return True
+
+
+@register_command('cancel_alarm')
+def handle_cancel_alarm(assistant, command, args):
+    response = assistant.time_manager.list_alarms()
+    if response == "No active alarms":
+        assistant.audio_manager.speak(response)
+    else:
+        # Cancel all alarms for now - could be made more specific later
+        for alarm_name in list(assistant.time_manager.alarms.keys()):
+            assistant.time_manager.cancel_alarm(alarm_name)
+        assistant.audio_manager.speak("All alarms cancelled")
+    return True
+
+
+@register_command('list_timers')
+def handle_list_timers(assistant, command, args):
+    assistant.audio_manager.speak(assistant.time_manager.list_timers())
+    return True
+
+
+@register_command('list_alarms')
+def handle_list_alarms(assistant, command, args):
+    assistant.audio_manager.speak(assistant.time_manager.list_alarms())
+    return True
+
+
+@register_fallback
+def handle_unknown(assistant, command, args):
+    # For any unrecognized command, try to find relevant information
+    assistant.respond("Let me search for that information")
+    result = assistant.web_search.get_information(command)
+    assistant.respond(result)
@@ -0,0 +1,207 @@
+"""One microphone, read once, shared by every consumer.
+
+``CaptureService`` owns the PyAudio stream. A background thread reads it and
+writes the samples into a preallocated NumPy ring buffer. Every consumer
+(wake word detection, phrase capture and recognition, recording) reads from
+that buffer through its own ``Cursor``, so the microphone is opened once and
+each consumer goes at its own pace.
+
+The ring is mirrored: it is allocated twice as long and every sample is
+written to both halves, so any window of up to ``capacity`` samples is one
+contiguous slice. Reads return views into the buffer without copying. A view
+stays valid until the writer comes round again, ``buffer_s`` seconds later.
+A consumer that falls that far behind skips ahead to the oldest audio still
+held and counts an overrun.
+
+``CaptureSource`` wraps a cursor in the interface of an open
+``speech_recognition.Microphone`` (``stream.read``, ``SAMPLE_RATE``, ...), so
+``phrase_capture.listen_phrase`` and the wake word detector use it as is. It
+can also look back at audio from before the cursor, which gives phrases their
+pre-roll.
+"""
+import threading
+
+import numpy as np
+
+
+class AudioRingBuffer:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._buffer = np.zeros(2 * capacity, dtype=np.int16)
+        self.head = 0  # Samples written so far; positions are absolute sample counts
+        self.closed = False
+        self._cond = threading.Condition()
+
+    def write(self, samples):
+        samples = np.asarray(samples, dtype=np.int16)
+        with self._cond:
+            if len(samples) > self.capacity:
+                self.head += len(samples) - self.capacity
+                samples = samples[-self.capacity:]
+            start = self.head % self.capacity
+            first = min(len(samples), self.capacity - start)
+            rest = len(samples) - first
+            for offset in (0, self.capacity):
+                self._buffer[offset + start:offset + start + first] = samples[:first]
+                self._buffer[offset:offset + rest] = samples[first:]
+            self.head += len(samples)
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def oldest(self):
+        """Position of the oldest sample still held"""
+        return max(0, self.head - self.capacity)
+
+    def view(self, start, end):
+        """Samples ``start`` to ``end`` as a view; they must still be held"""
+        if start < self.oldest() or end > self.head or end - start > self.capacity:
+            raise IndexError(f"Samples {start}-{end} are not in the buffer ({self.oldest()}-{self.head})")
+        offset = start % self.capacity
+        return self._buffer[offset:offset + end - start]
+
+    def wait_for(self, position, timeout=None):
+        """Block until ``position`` was written; False on timeout or when closed before it"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.head >= position or self.closed, timeout) \
+                and self.head >= position
+
+
+class Cursor:
+    def __init__(self, ring, name, position=None):
+        self.ring = ring
+        self.name = name
+        self.position = ring.head if position is None else position
+        self.overruns = 0
+        self.skipped = 0  # Samples lost to overruns
+
+    def available(self):
+        return self.ring.head - self.position
+
+    def read(self, count, timeout=None):
+        """The next ``count`` samples as a view; fewer only once the service stopped"""
+        if not self.ring.wait_for(self.position + count, timeout) and not self.ring.closed:
+            raise TimeoutError()
+        with self.ring._cond:
+            oldest = self.ring.oldest()
+            if self.position < oldest:
+                self.overruns += 1
+                self.skipped += oldest - self.position
+                self.position = oldest
+            end = min(self.position + count, self.ring.head)
+            samples = self.ring.view(self.position, end)
+        self.position = end
+        return samples
+
+    def stats(self):
+        return {'position': self.position, 'lag': self.available(), 'overruns': self.overruns,
+                'skipped_samples': self.skipped}
+
+
+class CaptureSource:
+    """A cursor that looks like an open ``speech_recognition.Microphone``"""
+    SAMPLE_WIDTH = 2
+
+    def __init__(self, service, cursor):
+        self.service = service
+        self.cursor = cursor
+        self.stream = self
+        self.SAMPLE_RATE = service.sample_rate
+        self.CHUNK = service.chunk_size
+        self.device_index = service.device_index
+        self.audio = service.audio
+
+    def read(self, count):
+        return self.cursor.read(count)
+
+    def preceding(self, chunks, skip=0):
+        """Up to ``chunks`` chunks of audio before the last ``skip`` chunks read, as views"""
+        ring = self.service.ring
+        end = self.cursor.position - skip * self.CHUNK
+        start = max(ring.oldest(), end - chunks * self.CHUNK)
+        # Aligned to the end, so only the first chunk can be short
+        first = start + (end - start) % self.CHUNK
+        bounds = [start] + list(range(first, end + 1, self.CHUNK))
+        return [ring.view(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+    def __enter__(self):
+        # Reading starts at the live edge, like opening a microphone would
+        self.cursor.position = self.service.ring.head
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+class CaptureService:
+    def __init__(self, device_index=None, sample_rate=None, chunk_size=1024, buffer_s=30.0):
+        self.device_index = device_index
+        self.requested_sample_rate = sample_rate
+        self.chunk_size = chunk_size
+        self.buffer_s = buffer_s
+        self.sample_rate = None
+        self.audio = None
+        self.ring = None
+        self.cursors = {}
+        self._microphone = None
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        """Open the microphone and start filling the ring buffer"""
+        if self._running:
+            return self
+        import speech_recognition as sr
+
+        self._microphone = sr.Microphone(self.device_index, self.requested_sample_rate, self.chunk_size)
+        source = self._microphone.__enter__()
+        if source.SAMPLE_WIDTH != 2:
+            self._microphone.__exit__(None, None, None)
+            raise ValueError(f"Expected 16 bit microphone samples, got {8 * source.SAMPLE_WIDTH} bit")
+        self.sample_rate = source.SAMPLE_RATE
+        self.audio = source.audio
+        self.ring = AudioRingBuffer(int(self.buffer_s * self.sample_rate))
+        self._running = True
+        self._thread = threading.Thread(target=self._capture, args=(source.stream,), daemon=True)
+        self._thread.start()
+        return self
+
+    def _capture(self, stream):
+        try:
+            while self._running:
+                data = stream.read(self.chunk_size)
+                if len(data) == 0:
+                    break  # Only a replayed stream runs out
+                self.ring.write(np.frombuffer(data, dtype='<i2'))
+        except Exception as e:
+            print(f"Microphone capture stopped: {e}")
+        finally:
+            self.ring.close()
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+        if self._microphone:
+            self._microphone.__exit__(None, None, None)
+            self._microphone = None
+
+    def cursor(self, name):
+        """A new reader starting at the live edge; one per consumer"""
+        cursor = Cursor(self.ring, name)
+        self.cursors[name] = cursor
+        return cursor
+
+    def source(self, name):
+        """A microphone-like source reading through its own cursor"""
+        return CaptureSource(self, self.cursor(name))
+
+    def stats(self):
+        return {
+            'captured_s': self.ring.head / self.sample_rate if self.ring else 0.0,
+            'buffer_s': self.buffer_s,
+            'consumers': {name: cursor.stats() for name, cursor in self.cursors.items()},
+        }
@@ -0,0 +1,167 @@
+"""Command pattern table shared by the intent matcher and the assistant.
+
+Each command type lists the regex patterns that route an utterance directly,
+plus the keywords and synonyms used for fuzzy scoring when no pattern matches.
+Command types marked ``prefilter`` are matched on the raw command before any
+other processing. Handlers are registered in ``builtin_commands.py``.
+"""
+
+COMMAND_PATTERNS = {
+    'volume': {
+        'patterns': [
+            r'(?:turn|set|make|adjust|change).*(?:volume|sound).*(?:up|down|to|higher|lower)',
+            r'(?:increase|decrease|raise|lower).*(?:volume|sound)',
+            r'(?:louder|softer|quieter)',
+            r'(?:volume|sound).*(?:up|down|higher|lower)',
+            r'(?:mute|unmute).*(?:volume|sound|speaker)?',
+            r'set.*(?:volume|sound).*to.*(\d+)(?:\s*percent)?',
+            r'(?:volume|sound).*(\d+)(?:\s*percent)?',
+            r'(?:make|adjust).*(?:volume|sound).*(\d+)(?:\s*percent)?'
+        ],
+        'keywords': ['volume', 'sound', 'loud', 'quiet', 'increase', 'decrease', 'mute', 'unmute', 'percent'],
+        'synonyms': {
+            'up': ['increase', 'raise', 'higher', 'louder', 'boost', 'amplify'],
+            'down': ['decrease', 'lower', 'quieter', 'softer', 'reduce', 'diminish'],
+            'mute': ['silence', 'quiet', 'disable sound'],
+            'unmute': ['enable sound', 'restore sound']
+        }
+    },
+    'time': {
+        'patterns': [
+            r'^(?:what|tell|give).*(?:time|clock)(?:\s+is\s+it)?$',
+            r'^(?:current|present).*time$',
+            r'^(?:what time is it|got the time)$',
+        ],
+        'keywords': ['time', 'clock', 'hour', 'minute'],
+        'synonyms': {
+            'time': ['clock', 'hour', 'moment', 'current time'],
+        }
+    },
+    'greeting': {
+        'patterns': [
+            r'(?:hello|hi|hey|greetings|good).*(?:morning|afternoon|evening)?',
+            r'(?:how are|how\'re) you',
+            r'(?:nice to meet you|pleased to meet you)',
+        ],
+        'keywords': ['hello', 'hi', 'hey', 'greetings', 'morning', 'afternoon', 'evening'],
+        'synonyms': {
+            'hello': ['hi', 'hey', 'greetings', 'good morning', 'good afternoon', 'good evening'],
+            'how are you': ['how you doing', 'how\'s it going', 'what\'s up']
+        }
+    },
+    'open_app': {
+        'prefilter': True,
+        'patterns': [
+            r'(?:open|launch|start|run)\s+(.+)',
+            r'(?:can you )?(?:open|launch|start|run)\s+(.+)',
+        ]
+    },
+    'close_app': {
+        'prefilter': True,
+        'patterns': [
+            r'(?:close|quit|exit|terminate|end)\s+(.+)',
+            r'(?:can you )?(?:close|quit|exit|terminate|end)\s+(.+)',
+        ]
+    },
+    'system_control': {
+        'patterns': [
+            r'(?:shutdown|turn off|power off).*(?:computer|system|pc)',
+            r'(?:restart|reboot).*(?:computer|system|pc)',
+            r'(?:sleep|hibernate).*(?:computer|system|pc)',
+            r'(?:can you|could you|please).*(?:shutdown|restart|reboot).*(?:computer|system|pc)',
+        ],
+        'keywords': ['shutdown', 'restart', 'reboot', 'power', 'sleep', 'hibernate'],
+        'synonyms': {
+            'shutdown': ['turn off', 'power off', 'shut down', 'switch off'],
+            'restart': ['reboot', 'reset', 'reload', 'relaunch'],
+            'sleep': ['hibernate', 'suspend', 'standby']
+        }
+    },
+    'search': {
+        'patterns': [
+            r'(?:search|look up|find|google|tell me about).*',
+            r'(?:what|who|which|when|where|why|how).*(?:is|are|was|were|will|do|does|did).*',
+            r'(?:latest|best|top|newest|recent).*(?:movies|news|games|shows|music|books).*',
+            r'(?:can you|could you|please).*(?:search|look up|find|tell).*',
+        ],
+        'keywords': ['search', 'look up', 'find', 'what is', 'who is', 'tell me', 'best', 'latest'],
+        'synonyms': {
+            'search': ['look up', 'find', 'google', 'research', 'investigate'],
+            'what is': ['tell me about', 'explain', 'describe']
+        }
+    },
+    'weather': {
+        'patterns': [
+            r'(?:what\'s|what is|how\'s).*(?:weather|temperature|forecast)',
+            r'(?:will it|is it going to).*(?:rain|snow|be sunny)',
+            r'(?:temperature|weather).*(?:today|tomorrow|this week)',
+        ],
+        'keywords': ['weather', 'temperature', 'forecast', 'rain', 'snow', 'sunny'],
+        'synonyms': {
+            'weather': ['temperature', 'climate', 'conditions'],
+            'forecast': ['prediction', 'outlook', 'weather report']
+        }
+    },
+    'reminder': {
+        'patterns': [
+            r'(?:remind|remember|notification).*(?:me|to)\\s+([\\w\\s]+)',
+            r'(?:set|create).*(?:reminder|alarm).*(?:for|to)\\s+([\\w\\s]+)',
+            r'(?:don\'t let me forget|help me remember)\\s+([\\w\\s]+)',
+        ],
+        'keywords': ['remind', 'reminder', 'alarm', 'notification', 'remember'],
+        'synonyms': {
+            'remind': ['remember', 'notify', 'alert'],
+            'reminder': ['notification', 'alert', 'alarm']
+        }
+    },
+    'date': {
+        'patterns': [
+            r'what (?:is|\'s) (?:today\'s )?(?:date|day)',
+            r'what (?:date|day) is (?:it|today)',
+            r'tell me (?:the )?(?:date|day)',
+            r'what (?:is|\'s) the (?:date|day)(?: today)?',
+            r'current (?:date|day)'
+        ],
+        'keywords': ['date', 'day', 'today', 'current'],
+        'synonyms': {
+            'date': ['day', 'today'],
+            'tell': ['show', 'give', 'what is']
+        }
+    },
+    'timer': {
+        'patterns': [
+            r'(?:set|start|create)\s+(?:a\s+)?timer\s+(?:for\s+)?(.+)',
+            r'(?:give|set)\s+me\s+(?:a\s+)?timer\s+(?:for\s+)?(.+)',
+        ]
+    },
+    'alarm': {
+        'patterns': [
+            r'(?:set|create)\s+(?:an\s+)?alarm\s+(?:for\s+)?(.+)',
+            r'wake\s+me\s+(?:up\s+)?(?:at\s+)?(.+)',
+        ]
+    },
+    'cancel_timer': {
+        'patterns': [
+            r'(?:cancel|stop|remove)\s+(?:the\s+)?timer',
+            r'(?:cancel|stop|remove)\s+(?:all\s+)?timers',
+        ]
+    },
+    'cancel_alarm': {
+        'patterns': [
+            r'(?:cancel|stop|remove)\s+(?:the\s+)?alarm',
+            r'(?:cancel|stop|remove)\s+(?:all\s+)?alarms',
+        ]
+    },
+    'list_timers': {
+        'patterns': [
+            r'(?:list|show|what are)\s+(?:the\s+)?(?:active\s+)?timers',
+            r'(?:how many|what)\s+timers\s+(?:do I have|are running)',
+        ]
+    },
+    'list_alarms': {
+        'patterns': [
+            r'(?:list|show|what are)\s+(?:the\s+)?(?:active\s+)?alarms',
+            r'(?:how many|what)\s+alarms\s+(?:do I have|are set)',
+        ]
+    },
+}
@@ -0,0 +1,164 @@
+"""Table-driven command dispatch.
+
+Every command type is declared once in a ``CommandRegistry``: its regex
+patterns, the keywords and synonyms used for fuzzy scoring, an optional
+argument extractor and the handler that carries it out. The registry builds
+the pattern table that ``IntentClassifier`` compiles, and dispatching a routed
+command is one dictionary lookup that hands the captured pattern groups to
+the handler.
+
+Modules listed in ``config.COMMAND_MODULES`` register their handlers when
+imported, so adding a command does not need any change to ``main.py``:
+
+    from command_registry import register_command
+
+    @register_command('joke', patterns=[r'tell me a joke'], keywords=['joke'])
+    def tell_joke(assistant, command, args):
+        assistant.respond("I would tell you a UDP joke, but you might not get it")
+
+Handlers are called as ``handler(assistant, command, args)``, and
+``registry.process(assistant, command)`` routes and runs a command; it is the
+command path of both ``VoiceAssistant`` and the headless driver.
+"""
+import importlib
+import threading
+from collections import namedtuple
+
+from command_patterns import COMMAND_PATTERNS
+from telemetry import tracer
+
+Command = namedtuple('Command', ['name', 'patterns', 'keywords', 'synonyms', 'prefilter',
+                                 'extract_args', 'handler'])
+
+_TABLE_KEYS = ('patterns', 'keywords', 'synonyms')
+
+
+class CommandRegistry:
+    def __init__(self, command_patterns=None):
+        """Start from the declarations in ``command_patterns``, without handlers"""
+        self._commands = {}
+        self._fallback = None
+        self._listeners = []
+        self._lock = threading.RLock()
+        for name, cmd_info in (command_patterns or {}).items():
+            self.register(name, **{key: value for key, value in cmd_info.items() if key in Command._fields})
+
+    def register(self, name, patterns=None, keywords=None, synonyms=None, prefilter=None,
+                 extract_args=None, handler=None, before=None):
+        """Declare a command type or update the given fields of an existing one
+
+        New command types are appended, so the built-in patterns keep matching
+        first; pass ``before`` to give a new command priority over another.
+        """
+        with self._lock:
+            existing = self._commands.get(name)
+            if existing is None:
+                existing = Command(name, [], [], {}, False, None, None)
+            updates = {
+                'patterns': patterns, 'keywords': keywords, 'synonyms': synonyms,
+                'prefilter': prefilter, 'extract_args': extract_args, 'handler': handler,
+            }
+            command = existing._replace(**{key: value for key, value in updates.items() if value is not None})
+
+            if name in self._commands or before is None:
+                self._commands[name] = command
+            else:
+                if before not in self._commands:
+                    raise KeyError(f"Cannot register '{name}' before unknown command '{before}'")
+                commands = {}
+                for other_name, other in self._commands.items():
+                    if other_name == before:
+                        commands[name] = command
+                    commands[other_name] = other
+                self._commands = commands
+
+        if patterns is not None or keywords is not None or synonyms is not None or prefilter is not None:
+            self._notify()
+        return command
+
+    def unregister(self, name):
+        with self._lock:
+            self._commands.pop(name, None)
+        self._notify()
+
+    def command(self, name, **spec):
+        """Decorator registering the function as the handler of ``name``"""
+        def decorator(handler):
+            self.register(name, handler=handler, **spec)
+            return handler
+        return decorator
+
+    def fallback(self, handler):
+        """Decorator registering the handler for commands no handler claims"""
+        self._fallback = handler
+        return handler
+
+    def get(self, name):
+        return self._commands.get(name)
+
+    def __contains__(self, name):
+        return name in self._commands
+
+    def __len__(self):
+        return len(self._commands)
+
+    def subscribe(self, callback):
+        """Call ``callback()`` whenever the pattern table changes"""
+        self._listeners.append(callback)
+
+    def _notify(self):
+        for callback in list(self._listeners):
+            callback()
+
+    def command_patterns(self):
+        """Pattern table for ``IntentClassifier``, in registration order"""
+        with self._lock:
+            table = {}
+            for name, command in self._commands.items():
+                cmd_info = {key: getattr(command, key) for key in _TABLE_KEYS if getattr(command, key)}
+                if command.prefilter:
+                    cmd_info['prefilter'] = True
+                table[name] = cmd_info
+            return table
+
+    def process(self, assistant, command):
+        """Route a command with the assistant's classifier and run its handler; returns the route
+
+        Prefilter commands are checked first as they're most direct, then the
+        classifier picks the command type; the handler gets the arguments
+        captured by the matching pattern.
+        """
+        with tracer.span('route') as span:
+            route = assistant.intent_classifier.route(command)
+            span.set(intent=route.intent, source=route.source)
+        self.dispatch(assistant, route, command)
+        return route
+
+    def dispatch(self, assistant, route, command):
+        """Run the handler for a routed command with its extracted arguments"""
+        entry = self._commands.get(route.intent)
+        if entry is None or entry.handler is None:
+            if self._fallback is None:
+                print(f"No handler for command type '{route.intent}'")
+                return None
+            with tracer.span('handler', intent='fallback'):
+                return self._fallback(assistant, command, route.args)
+
+        args = entry.extract_args(command, route.args) if entry.extract_args else route.args
+        with tracer.span('handler', intent=route.intent):
+            return entry.handler(assistant, command, args)
+
+
+def load_command_modules(module_names):
+    """Import command modules so their handlers register themselves"""
+    for module_name in module_names:
+        try:
+            importlib.import_module(module_name)
+        except Exception as e:
+            print(f"Error loading command module '{module_name}': {e}")
+
+
+# Shared registry used by the assistant and by command modules
+registry = CommandRegistry(COMMAND_PATTERNS)
+register_command = registry.command
+register_fallback = registry.fallback
@@ -5,7 +5,106 @@ load_dotenv()
 
 # Configuration settings
 WAKE_WORD = "hey athena"
+# Local wake word detection (see wake_word.py): recorded examples of the wake word,
+# how readily it is accepted (0-1, higher also means more false alarms), and
+# whether the listen loop waits for it before every command
+WAKE_WORD_TEMPLATES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "wake_word.npz")
+WAKE_WORD_SENSITIVITY = 0.5
+WAKE_WORD_REQUIRED = False
 NEWS_API_KEY = os.getenv("NEWS_API_KEY")
 VOICE_RATE = 150
 VOICE_VOLUME = 1.0
-FEMALE_VOICE_ID = 1  # Usually 1 is female voice in Windows
\ No newline at end of file
+FEMALE_VOICE_ID = 1  # Usually 1 is female voice in Windows
+
+# Cache directory for generated intent data
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+SYNONYM_INDEX_PATH = os.path.join(CACHE_DIR, "synonym_index.pkl")
+INTENT_MODEL_PATH = os.path.join(CACHE_DIR, "intent_model.npz")
+# Energy threshold per input device, restored instead of calibrating at every start
+NOISE_CALIBRATION_PATH = os.path.join(CACHE_DIR, "noise_calibration.json")
+LEMMA_TABLE_PATH = os.path.join(CACHE_DIR, "lemma_table.tsv")
+# Utterance files whose words are added to the lemma table when it is built
+LEMMA_VOCABULARY_PATHS = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "data", "intent_corpus.tsv"),
+]
+
+# Fallback scoring when no command pattern matches: "keywords" or "model"
+INTENT_ENGINE = "keywords"
+# Recent utterance -> intent decisions kept in memory (0 disables the cache)
+INTENT_CACHE_SIZE = 256
+
+# Show the GUI before importing speech, NLTK and web subsystems
+LAZY_STARTUP = True
+
+# Modules that register command handlers on import (see command_registry.py)
+COMMAND_MODULES = ["builtin_commands"]
+
+# Seconds of microphone audio kept in the shared capture buffer (see capture_service.py)
+CAPTURE_BUFFER_S = 30
+# Audio fixtures (see audio_fixtures.py): where they are kept, whether captured phrases are
+# saved there with their recognized transcript and intent, and a fixture directory to listen
+# to instead of the microphone (None for the microphone), played at REPLAY_SPEED times real time
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "data", "fixtures")
+RECORD_FIXTURES = False
+REPLAY_FIXTURES = None
+REPLAY_SPEED = 1.0
+# Audio from before the start of each phrase that is kept, so onsets aren't clipped (0.3-0.5 s)
+PRE_ROLL_S = 0.4
+
+# Listen pipeline: capture -> audio queue -> recognition workers -> command queue -> executor
+RECOGNITION_WORKERS = 2
+AUDIO_QUEUE_SIZE = 4
+COMMAND_QUEUE_SIZE = 8
+# What a full queue does: "block" the producer, "drop_oldest" or "drop_newest"
+AUDIO_QUEUE_POLICY = "drop_oldest"
+COMMAND_QUEUE_POLICY = "block"
+
+# Voice activity detection (see vad.py): segments with less speech than this are not
+# recognized, except for a sample of them that checks how often speech is rejected
+VAD_ENABLED = True
+VAD_MIN_SPEECH_S = 0.15
+VAD_AUDIT_RATE = 0.05
+# Talking over the assistant interrupts it (barge-in). The microphone hears the assistant too,
+# so while it speaks a phrase only counts as the user when the VAD finds speech louder than
+# BARGE_IN_MIN_DBFS; quieter phrases are its echo and are dropped
+BARGE_IN_ENABLED = True
+BARGE_IN_MIN_DBFS = -30.0
+
+# Per-stage latency spans (see telemetry.py), exported every TELEMETRY_EXPORT_INTERVAL_S
+# seconds: one JSONL line per span, and p50/p95/p99 per stage in Prometheus text format
+TELEMETRY_ENABLED = True
+TELEMETRY_SPANS_PATH = os.path.join(CACHE_DIR, "spans.jsonl")
+TELEMETRY_METRICS_PATH = os.path.join(CACHE_DIR, "metrics.prom")
+TELEMETRY_EXPORT_INTERVAL_S = 10
+
+# Pre-rendered speech (see phrase_cache.py): these responses are rendered to audio files while
+# the assistant is idle, and so is any other response once it was spoken TTS_CACHE_RENDER_AFTER
+# times (0 for only these). Rendered responses are played instead of synthesized; at most
+# TTS_CACHE_MAX_FILES are kept on disk and TTS_CACHE_MEMORY_MB in memory
+TTS_CACHE_ENABLED = True
+TTS_CACHE_PATH = os.path.join(CACHE_DIR, "tts")
+TTS_CACHE_PHRASES = [
+    "Increasing volume", "Decreasing volume", "Muting volume", "Unmuting volume",
+    "Hello! How can I help you today?", "Hi there! What can I do for you?", "Hey! I'm here to help!",
+    "Greetings! How may I assist you?", "Good to see you! What's on your mind?",
+    "All timers cancelled", "All alarms cancelled", "No active timers", "No active alarms",
+]
+TTS_CACHE_RENDER_AFTER = 3
+TTS_CACHE_MAX_FILES = 200
+TTS_CACHE_MEMORY_MB = 16
+
+# Speech recognition engine: "google" (online), "sphinx" or "vosk" (offline), or "fake" (tests)
+RECOGNITION_BACKEND = "google"
+RECOGNITION_LANGUAGE = "en-US"
+# A second engine (e.g. "vosk" or "sphinx") that is asked too when RECOGNITION_BACKEND hasn't
+# answered within its p95 latency (RECOGNITION_HEDGE_PERCENTILE), fails, or is less confident
+# than RECOGNITION_MIN_CONFIDENCE; the first confident answer wins. None uses one engine.
+# No phrase waits longer than RECOGNITION_DEADLINE_S for its transcript
+RECOGNITION_SECONDARY_BACKEND = None
+RECOGNITION_DEADLINE_S = 5.0
+RECOGNITION_MIN_CONFIDENCE = 0.5
+RECOGNITION_HEDGE_PERCENTILE = 95
+# Feed audio to the recognizer while a phrase is spoken and show partial transcripts
+# (only backends that decode incrementally, like vosk, give partials)
+STREAMING_RECOGNITION = True
+VOSK_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "vosk")
@@ -0,0 +1,316 @@
+"""Headless text-command driver.
+
+Runs typed commands through the same path as ``VoiceAssistant.process_command``
+(``CommandRegistry.process``: ``IntentClassifier.route``, then the handler) without
+a microphone, GUI, TTS engine or network. Speech, volume, system, web and
+timer actions go to recording fakes, so each command's effects can be checked
+and the command path can be load-tested and profiled on machines without
+audio hardware.
+
+Run from the repository root, with one command per line (blank lines and
+lines starting with # are skipped):
+    python headless.py commands.txt [--repeat N] [--engine keywords|model]
+                                    [--json PATH] [--verbose]
+    echo "what time is it" | python headless.py
+
+Or from Python:
+    driver = TextCommandDriver()
+    results, elapsed = driver.run(["set a timer for 5 minutes", "list timers"])
+    print(summarize(results, elapsed))
+"""
+import argparse
+import json
+import sys
+import time
+from collections import namedtuple
+
+from command_registry import registry, load_command_modules
+from config import (SYNONYM_INDEX_PATH, INTENT_ENGINE, INTENT_MODEL_PATH, INTENT_CACHE_SIZE,
+                    COMMAND_MODULES, LEMMA_TABLE_PATH, LEMMA_VOCABULARY_PATHS)
+from intent_engine import IntentClassifier
+from telemetry import percentile
+
+Action = namedtuple('Action', ['target', 'name', 'args'])
+CommandResult = namedtuple('CommandResult', ['command', 'intent', 'args', 'latency_us', 'actions', 'error'])
+
+
+class _Recorder:
+    target = None
+
+    def __init__(self, log):
+        self.log = log
+
+    def _record(self, name, *args):
+        self.log.append(Action(self.target, name, args))
+
+
+class RecordingAudioManager(_Recorder):
+    """Stands in for AudioManager: records speech and volume changes"""
+    target = 'audio'
+
+    def __init__(self, log):
+        super().__init__(log)
+        self.volume = 1.0
+        self.muted = False
+
+    def speak(self, text):
+        if text:
+            self._record('speak', text)
+
+    def set_volume(self, volume_level):
+        self.volume = max(0.0, min(1.0, volume_level))
+        self._record('set_volume', self.volume)
+        return True
+
+    def volume_up(self, step=0.1):
+        return self.set_volume(self.volume + step)
+
+    def volume_down(self, step=0.1):
+        return self.set_volume(self.volume - step)
+
+    def mute(self):
+        self.muted = True
+        self._record('mute')
+        return True
+
+    def unmute(self):
+        self.muted = False
+        self._record('unmute')
+        return True
+
+    def change_volume(self, change):
+        return self.set_volume(self.volume + change)
+
+
+class RecordingSystemController(_Recorder):
+    """Stands in for SystemController: nothing is launched, closed or shut down"""
+    target = 'system'
+
+    def open_application(self, app_name):
+        self._record('open_application', app_name)
+        return f"Opening {app_name}"
+
+    def close_application(self, app_name):
+        self._record('close_application', app_name)
+        return f"Closing {app_name}"
+
+    def shutdown_pc(self):
+        self._record('shutdown_pc')
+
+    def restart_pc(self):
+        self._record('restart_pc')
+
+    def sleep_pc(self):
+        self._record('sleep_pc')
+        return True
+
+    def get_screen_context(self):
+        self._record('get_screen_context')
+        return "Nothing on screen"
+
+    def get_latest_news(self, category='general'):
+        self._record('get_latest_news', category)
+        return f"No {category} news in headless mode"
+
+
+class RecordingWebSearch(_Recorder):
+    """Stands in for WebSearch: queries are recorded instead of sent"""
+    target = 'web'
+
+    def get_information(self, query):
+        self._record('get_information', query)
+        return f"Here is what I found about {query}"
+
+
+class RecordingTimeManager(_Recorder):
+    """Stands in for TimeManager without Qt timers; nothing ever fires"""
+    target = 'time'
+
+    def __init__(self, log):
+        super().__init__(log)
+        self.timers = {}
+        self.alarms = {}
+
+    def set_timer(self, duration_str):
+        self._record('set_timer', duration_str)
+        timer_name = f"Timer_{len(self.timers) + 1}"
+        self.timers[timer_name] = duration_str
+        return f"Timer set for {duration_str}"
+
+    def set_alarm(self, time_str):
+        self._record('set_alarm', time_str)
+        alarm_name = f"Alarm_{len(self.alarms) + 1}"
+        self.alarms[alarm_name] = time_str
+        return f"Alarm set for {time_str}"
+
+    def cancel_timer(self, timer_name):
+        self._record('cancel_timer', timer_name)
+        if self.timers.pop(timer_name, None) is None:
+            return "Timer not found"
+        return f"Cancelled {timer_name}"
+
+    def cancel_alarm(self, alarm_name):
+        self._record('cancel_alarm', alarm_name)
+        if self.alarms.pop(alarm_name, None) is None:
+            return "Alarm not found"
+        return f"Cancelled {alarm_name}"
+
+    def list_timers(self):
+        if not self.timers:
+            return "No active timers"
+        return "Active timers: " + ", ".join(self.timers.keys())
+
+    def list_alarms(self):
+        if not self.alarms:
+            return "No active alarms"
+        return "Active alarms: " + ", ".join(f"{name} ({time_str})" for name, time_str in self.alarms.items())
+
+
+class HeadlessAssistant:
+    """The parts of VoiceAssistant that command handlers use, backed by recording fakes"""
+
+    def __init__(self, engine=INTENT_ENGINE, cache_size=INTENT_CACHE_SIZE, command_modules=COMMAND_MODULES):
+        self.actions = []
+        self.audio_manager = RecordingAudioManager(self.actions)
+        self.system_controller = RecordingSystemController(self.actions)
+        self.web_search = RecordingWebSearch(self.actions)
+        self.time_manager = RecordingTimeManager(self.actions)
+
+        load_command_modules(command_modules)
+        self.command_registry = registry
+        self.command_patterns = registry.command_patterns()
+        self.intent_classifier = IntentClassifier(self.command_patterns, SYNONYM_INDEX_PATH,
+                                                  engine, INTENT_MODEL_PATH, cache_size,
+                                                  LEMMA_TABLE_PATH, LEMMA_VOCABULARY_PATHS)
+
+    def respond(self, message):
+        self.audio_manager.speak(message)
+
+    def process_command(self, command):
+        """Route and run a command the way VoiceAssistant.process_command does"""
+        return self.command_registry.process(self, command)
+
+
+class TextCommandDriver:
+    def __init__(self, assistant=None, warm_up=True):
+        self.assistant = assistant or HeadlessAssistant()
+        if warm_up:
+            # Keep lemma table and index loading out of the first command's latency
+            self.assistant.intent_classifier.warm_up()
+
+    def run_command(self, command):
+        """Run one command and return what it did and how long it took"""
+        actions = self.assistant.actions
+        first_action = len(actions)
+        intent, args, error = None, (), None
+
+        start = time.perf_counter_ns()
+        try:
+            route = self.assistant.process_command(command)
+            intent, args = route.intent, route.args
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        latency_us = (time.perf_counter_ns() - start) / 1000.0
+
+        return CommandResult(command, intent, args, latency_us, actions[first_action:], error)
+
+    def run(self, commands, repeat=1):
+        """Run every command ``repeat`` times; returns (results, elapsed seconds)"""
+        results = []
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for command in commands:
+                results.append(self.run_command(command))
+        return results, time.perf_counter() - start
+
+
+def latency_stats(latencies_us):
+    ordered = sorted(latencies_us)
+    return {
+        'p50': percentile(ordered, 50),
+        'p95': percentile(ordered, 95),
+        'p99': percentile(ordered, 99),
+        'mean': sum(ordered) / len(ordered) if ordered else 0.0,
+        'max': ordered[-1] if ordered else 0.0,
+    }
+
+
+def summarize(results, elapsed):
+    """Throughput and latency overall and per intent"""
+    by_intent = {}
+    for result in results:
+        by_intent.setdefault(str(result.intent), []).append(result.latency_us)
+
+    return {
+        'commands': len(results),
+        'errors': sum(1 for result in results if result.error),
+        'throughput_per_s': len(results) / elapsed if elapsed else 0.0,
+        'latency_us': latency_stats([result.latency_us for result in results]),
+        'per_intent': {
+            intent: dict(count=len(latencies), **latency_stats(latencies))
+            for intent, latencies in sorted(by_intent.items())
+        },
+    }
+
+
+def read_commands(stream):
+    return [line.strip() for line in stream if line.strip() and not line.lstrip().startswith('#')]
+
+
+def print_report(summary, cache_stats):
+    latency = summary['latency_us']
+    print(f"Commands   : {summary['commands']} ({summary['errors']} errors)")
+    print(f"Throughput : {summary['throughput_per_s']:.0f} commands/s")
+    print(f"Latency    : p50 {latency['p50']:.1f} us, p95 {latency['p95']:.1f} us, "
+          f"p99 {latency['p99']:.1f} us, max {latency['max']:.1f} us")
+    print(f"Cache      : {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+    print()
+    print(f"{'intent':<16} {'count':>7} {'p50 us':>10} {'p95 us':>10} {'max us':>10}")
+    for intent, stats in summary['per_intent'].items():
+        print(f"{intent:<16} {stats['count']:>7} {stats['p50']:>10.1f} {stats['p95']:>10.1f} {stats['max']:>10.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run text commands through the assistant without audio")
+    parser.add_argument('file', nargs='?', default='-', help="file with one command per line (default: stdin)")
+    parser.add_argument('--repeat', type=int, default=1, help="run the command list this many times")
+    parser.add_argument('--engine', choices=IntentClassifier.ENGINES, default=INTENT_ENGINE,
+                        help="intent scoring engine")
+    parser.add_argument('--json', help="also write the summary and per-command results to this file")
+    parser.add_argument('--verbose', action='store_true', help="print the intent and actions of every command")
+    args = parser.parse_args(argv)
+
+    if args.file == '-':
+        commands = read_commands(sys.stdin)
+    else:
+        with open(args.file, encoding='utf-8') as f:
+            commands = read_commands(f)
+
+    driver = TextCommandDriver(HeadlessAssistant(engine=args.engine))
+    results, elapsed = driver.run(commands, args.repeat)
+
+    if args.verbose:
+        for result in results:
+            print(f"{result.command!r} -> {result.intent} {list(result.args)} ({result.latency_us:.1f} us)")
+            for action in result.actions:
+                print(f"    {action.target}.{action.name}{action.args}")
+            if result.error:
+                print(f"    error: {result.error}")
+        print()
+
+    summary = summarize(results, elapsed)
+    print_report(summary, driver.assistant.intent_classifier.cache.stats())
+
+    if args.json:
+        summary['results'] = [
+            {'command': r.command, 'intent': r.intent, 'args': list(r.args), 'latency_us': r.latency_us,
+             'actions': [list(a) for a in r.actions], 'error': r.error}
+            for r in results
+        ]
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+    return 1 if summary['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
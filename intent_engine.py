@@ -0,0 +1,476 @@
+"""Precompiled intent matching for the voice assistant.
+
+All regex patterns from the command pattern table are compiled once into a
+single alternation. Matching an utterance is then one regex call that returns
+the intent and its captured arguments, instead of a Python loop of
+``re.search`` calls that leans on the ``re`` module cache. Utterances are
+tokenized and lemmatized with the precomputed table in ``lemma_table``, so
+NLTK is only imported for words outside it.
+
+Utterances that match no pattern fall back to a scoring engine. The default
+keyword engine counts keywords, WordNet synonyms and command synonyms for
+every command type with a single Aho-Corasick scan; the ``model`` engine uses
+the hashed n-gram classifier in ``intent_model``.
+
+``IntentClassifier`` ties these together and needs no microphone, TTS or
+network, so it can be driven directly by benchmarks and tools. Repeated
+utterances are answered from a bounded LRU cache of context-free decisions;
+the previous-command context bonus is applied after the lookup.
+"""
+import re
+import threading
+from collections import OrderedDict, namedtuple
+
+from keyword_scanner import KeywordScanner
+from lemma_table import load_lemma_table, read_vocabulary_texts, tokenize
+from synonym_index import ensure_wordnet, load_synonym_index
+
+IntentMatch = namedtuple('IntentMatch', ['intent', 'args', 'pattern'])
+NO_INTENT = 'none'  # Label for utterances that are not a command
+CommandRoute = namedtuple('CommandRoute', ['intent', 'confidence', 'args', 'source'])
+# Context-free decision for an utterance; scores is None for pattern matches
+IntentDecision = namedtuple('IntentDecision', ['intent', 'confidence', 'args', 'scores'])
+
+# Apostrophes and the colon of clock times ("7:30") carry meaning for the patterns
+_PUNCTUATION = re.compile(r"[^\w\s':]|(?<!\d):|:(?!\d)")
+
+
+def normalize_utterance(text):
+    """Lowercase, strip punctuation except apostrophes and clock colons, collapse whitespace"""
+    return ' '.join(_PUNCTUATION.sub(' ', text.lower()).split())
+
+
+class IntentEngine:
+    def __init__(self, command_patterns, intents=None, flags=re.IGNORECASE):
+        """Compile the patterns of ``intents`` (all command types by default)"""
+        if intents is None:
+            intents = list(command_patterns.keys())
+
+        self.intents = list(intents)
+        self._branches = {}  # outer group index -> (intent, pattern, first arg group, arg count)
+        branches = []
+        group_index = 1
+
+        for intent in self.intents:
+            for pattern in command_patterns[intent].get('patterns', []):
+                arg_count = re.compile(pattern, flags).groups
+                self._branches[group_index] = (intent, pattern, group_index + 1, arg_count)
+                # The lazy prefix lets every branch start anywhere in the text, so
+                # trying the branches in order at position 0 gives the same result
+                # as calling re.search on each pattern in turn.
+                branches.append(f'(?P<_p{len(branches)}>[\\s\\S]*?(?:{pattern}))')
+                group_index += 1 + arg_count
+
+        self.pattern_count = len(branches)
+        self._matcher = re.compile(r'\A(?:' + '|'.join(branches) + ')', flags) if branches else None
+
+    def match(self, text):
+        """Return the first matching intent in table order, or None"""
+        if self._matcher is None:
+            return None
+
+        m = self._matcher.match(text)
+        if not m:
+            return None
+
+        # The outer branch group always closes last
+        intent, pattern, first_arg, arg_count = self._branches[m.lastindex]
+        args = m.group(*range(first_arg, first_arg + arg_count)) if arg_count else ()
+        if arg_count == 1:
+            args = (args,)
+        return IntentMatch(intent, args, pattern)
+
+
+class KeywordScorer:
+    KEYWORD_WEIGHT = 0.4
+    SYNONYM_WEIGHT = 0.3
+
+    def __init__(self, command_patterns, synonym_index):
+        """Compile all keywords and synonyms of the table into one scanner"""
+        self.scanner = KeywordScanner()
+        self.command_types = list(command_patterns.keys())
+        self._groups = {}  # cmd_type -> [(tag, weight, phrase count)] in scoring order
+        self._batch_tables = None
+
+        for cmd_type, cmd_info in command_patterns.items():
+            phrase_groups = []
+            keywords = cmd_info.get('keywords', [])
+            phrase_groups.append((self.KEYWORD_WEIGHT, keywords))
+            for keyword in keywords:
+                phrase_groups.append((self.SYNONYM_WEIGHT, synonym_index[keyword]))
+            for syn_values in cmd_info.get('synonyms', {}).values():
+                phrase_groups.append((self.SYNONYM_WEIGHT, syn_values))
+
+            groups = []
+            for group_index, (weight, phrases) in enumerate(phrase_groups):
+                tag = (cmd_type, group_index)
+                for phrase in phrases:
+                    self.scanner.add(phrase, tag)
+                groups.append((tag, weight, len(phrases)))
+            self._groups[cmd_type] = groups
+
+        self.scanner.build()
+
+    def score(self, text):
+        """Score every command type against ``text``, in table order"""
+        counts = self.scanner.scan(text)
+        scores = {}
+        for cmd_type, groups in self._groups.items():
+            score = 0
+            for tag, weight, size in groups:
+                matches = counts[tag]
+                if matches > 0:
+                    score += weight * (matches / size)
+            scores[cmd_type] = score
+        return scores
+
+    def _build_batch_tables(self):
+        import numpy as np
+
+        # Number the scoring groups in table order, then map each phrase to its groups
+        group_ids = {}
+        group_cmd = []
+        weights = []
+        sizes = []
+        for cmd_index, cmd_type in enumerate(self.command_types):
+            for tag, weight, size in self._groups[cmd_type]:
+                group_ids[tag] = len(group_cmd)
+                group_cmd.append(cmd_index)
+                weights.append(weight)
+                sizes.append(size or 1)  # Empty groups never match
+
+        indptr = [0]
+        phrase_groups = []
+        for phrase_id in range(len(self.scanner)):
+            phrase_groups.extend(group_ids[tag] for tag in self.scanner.phrase_tags(phrase_id))
+            indptr.append(len(phrase_groups))
+
+        self._batch_tables = (
+            np.asarray(indptr, dtype=np.intp),
+            np.asarray(phrase_groups, dtype=np.intp),
+            group_cmd,
+            np.asarray(weights, dtype=np.float64),
+            np.asarray(sizes, dtype=np.float64),
+        )
+        return self._batch_tables
+
+    def score_batch(self, texts):
+        """Score every command type for every text as an array in command_types order
+
+        The utterance x phrase matches form a sparse matrix that is multiplied
+        with the phrase x group table in one step. Group terms are added in the
+        same order as score(), so the results are bit-for-bit identical.
+        """
+        import numpy as np
+
+        indptr, phrase_groups, group_cmd, weights, sizes = self._batch_tables or self._build_batch_tables()
+        n_texts = len(texts)
+        n_groups = len(group_cmd)
+
+        # Sparse utterance x phrase matrix in coordinate form
+        rows = []
+        phrase_ids = []
+        for row, text in enumerate(texts):
+            matched = self.scanner.matched_phrases(text)
+            rows.extend([row] * len(matched))
+            phrase_ids.extend(matched)
+        rows = np.asarray(rows, dtype=np.intp)
+        phrase_ids = np.asarray(phrase_ids, dtype=np.intp)
+
+        # Expand every matched phrase into the groups it counts towards
+        starts = indptr[phrase_ids]
+        lengths = indptr[phrase_ids + 1] - starts
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        cells = np.repeat(rows, lengths) * n_groups + phrase_groups[np.repeat(starts, lengths) + offsets]
+        counts = np.bincount(cells, minlength=n_texts * n_groups).reshape(n_texts, n_groups)
+
+        terms = weights * (counts / sizes)
+        scores = np.zeros((n_texts, len(self.command_types)))
+        for group_id, cmd_index in enumerate(group_cmd):
+            scores[:, cmd_index] += terms[:, group_id]
+        return scores
+
+
+class IntentCache:
+    def __init__(self, max_size=256):
+        """LRU cache of normalized utterance -> IntentDecision; 0 disables it"""
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            decision = self._entries.get(key)
+            if decision is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return decision
+
+    def put(self, key, decision):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = decision
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': len(self._entries),
+            'max_size': self.max_size,
+        }
+
+
+class IntentClassifier:
+    CONTEXT_BONUS = 0.1  # Bonus score for commands related to previous context
+    THRESHOLD = 0.3
+
+    ENGINES = ('keywords', 'model')
+
+    def __init__(self, command_patterns, synonym_index_path, engine='keywords', model_path=None,
+                 cache_size=256, lemma_table_path=None, vocabulary_paths=()):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown intent engine '{engine}', expected one of {self.ENGINES}")
+        self.command_patterns = command_patterns
+        self.synonym_index_path = synonym_index_path
+        self.engine = engine
+        self.model_path = model_path
+        self.lemma_table_path = lemma_table_path
+        self.vocabulary_paths = list(vocabulary_paths)
+        self.cache = IntentCache(cache_size)
+
+        # Compile every pattern once, keeping the table's first-match order
+        self._compile_patterns()
+
+        # Initialize previous command type for context
+        self.previous_command_type = None
+
+        # The lemma table and scoring engine are loaded on first use or by warm_up()
+        self._nlp_lock = threading.RLock()
+        self._nlp_ready = False
+        self.word_tokenize = tokenize
+        self.lemmatizer = None
+        self.synonym_index = None
+        self.scorer = None
+
+    def warm_up(self):
+        """Load the synonym index, lemma table and scoring engine"""
+        if self._nlp_ready:
+            return
+        with self._nlp_lock:
+            if self._nlp_ready:
+                return
+
+            self._load_scorer()
+            self._nlp_ready = True
+
+    def _compile_patterns(self):
+        self.intent_engine = IntentEngine(self.command_patterns)
+        prefilter = [cmd_type for cmd_type, cmd_info in self.command_patterns.items() if cmd_info.get('prefilter')]
+        self.prefilter_engine = IntentEngine(self.command_patterns, prefilter)
+
+    def _load_scorer(self):
+        # Load WordNet synonyms for every keyword, rebuilt when the table changes
+        self.synonym_index = load_synonym_index(self.command_patterns, self.synonym_index_path)
+        # Lemmas of the table vocabulary; the vocabulary files are only read on a rebuild
+        texts = (normalize_utterance(text) for text in read_vocabulary_texts(self.vocabulary_paths))
+        self.lemmatizer = load_lemma_table(self.command_patterns, self.lemma_table_path,
+                                           self.synonym_index, texts)
+        if self.engine == 'model':
+            from intent_model import load_intent_model
+            # Trained on the text it will score; the lemma table is loaded by now
+            self.scorer = load_intent_model(self.command_patterns, self.synonym_index, self.model_path,
+                                            self._scoring_text)
+        else:
+            self.scorer = KeywordScorer(self.command_patterns, self.synonym_index)
+
+    def set_command_patterns(self, command_patterns):
+        """Switch to a new pattern table, recompiling it and dropping cached decisions"""
+        with self._nlp_lock:
+            self.command_patterns = command_patterns
+            self._compile_patterns()
+            if self._nlp_ready:
+                self._load_scorer()
+            self.cache.clear()
+
+    def get_word_synonyms(self, word):
+        self.warm_up()
+        if word in self.synonym_index:
+            return self.synonym_index[word]
+
+        ensure_wordnet()
+        from nltk.corpus import wordnet
+        synonyms = set()
+        for syn in wordnet.synsets(word):
+            for lemma in syn.lemmas():
+                synonyms.add(lemma.name().lower())
+        return synonyms
+
+    def lemmatize_text(self, text):
+        """Tokenize and lemmatize input text"""
+        self.warm_up()
+        return self._lemmatize_text(text)
+
+    def _lemmatize_text(self, text):
+        lemmatize = self.lemmatizer.lemmatize
+        return ' '.join([lemmatize(token) for token in self.word_tokenize(text)])
+
+    def scoring_text(self, text):
+        """The text the scorers see for an utterance: normalized, then lemmatized"""
+        self.warm_up()
+        return self._scoring_text(text)
+
+    def _scoring_text(self, text):
+        return self._lemmatize_text(normalize_utterance(text))
+
+    def _select_command(self, scores, previous_command_type=None):
+        """Pick the highest scoring command type, first in table order on ties"""
+        best_match = None
+        highest_score = 0
+
+        for cmd_type, score in scores.items():
+            # Apply context bonus if the command is related to previous ones
+            if previous_command_type == cmd_type:
+                score += self.CONTEXT_BONUS
+
+            # Update best match if this score is higher
+            if score > highest_score:
+                highest_score = score
+                best_match = cmd_type
+
+        return best_match, highest_score
+
+    def _decide(self, normalized_text):
+        """Classify a normalized utterance without any command context"""
+        lemmatized_text = self.lemmatize_text(normalized_text)
+
+        # Check patterns with regex in a single pass over the compiled table
+        match = self.intent_engine.match(lemmatized_text)
+        if match:
+            return IntentDecision(match.intent, 1.0, match.args, None)
+
+        # Score every command type with the selected engine
+        scores = self.scorer.score(lemmatized_text)
+        best_match, highest_score = self._select_command(scores)
+        return IntentDecision(best_match, highest_score, (), scores)
+
+    def _cached_decision(self, text):
+        normalized_text = normalize_utterance(text)
+        decision = self.cache.get(normalized_text)
+        if decision is None:
+            decision = self._decide(normalized_text)
+            self.cache.put(normalized_text, decision)
+        return decision
+
+    def _identify(self, text):
+        decision = self._cached_decision(text)
+
+        if decision.scores is None:
+            return decision.intent, decision.confidence, decision.args
+
+        # The context bonus depends on the previous command, so it is applied after the cache
+        best_match, highest_score = self._select_command(decision.scores, self.previous_command_type)
+
+        if highest_score <= self.THRESHOLD:
+            return None, 0, decision.args
+
+        # Store this command type for future context
+        self.previous_command_type = best_match
+        return best_match, highest_score, decision.args
+
+    def identify_command_type(self, text):
+        cmd_type, confidence, _ = self._identify(text)
+        return cmd_type, confidence
+
+    def classify_batch(self, texts):
+        """Classify many utterances at once
+
+        Unlike identify_command_type() this neither reads nor updates the
+        previous command context, and gives the same result as calling it
+        for each text with no previous command.
+        """
+        lemmatized = [self.scoring_text(text) for text in texts]
+        results = [None] * len(texts)
+
+        pending = []
+        for i, lemmatized_text in enumerate(lemmatized):
+            match = self.intent_engine.match(lemmatized_text)
+            if match:
+                results[i] = (match.intent, 1.0)
+            else:
+                pending.append(i)
+
+        if pending:
+            scores = self.scorer.score_batch([lemmatized[i] for i in pending])
+            command_types = self.scorer.command_types
+            for i, row in zip(pending, scores.tolist()):
+                best_match, highest_score = self._select_command(dict(zip(command_types, row)))
+                results[i] = (best_match, highest_score) if highest_score > self.THRESHOLD else (None, 0)
+
+        return results
+
+    def prefetch(self, text):
+        """Classify ``text`` ahead of time, so a later route() of it is a cache hit
+
+        Does nothing until warm_up() has finished, so the caller never waits
+        for the scoring data to load.
+        """
+        if self._nlp_ready:
+            self._cached_decision(text)
+
+    def best_transcript(self, transcripts):
+        """Pick the recognition alternative that maps to the most confident intent
+
+        Alternatives are tried in the recognizer's order and a later one only
+        wins with a strictly higher intent confidence, so the recognizer's
+        first choice is kept unless another one is clearly a better command.
+        Like classify_batch() this ignores the previous command context, and
+        the decisions land in the cache that route() reads next.
+        """
+        best, best_confidence = None, -1.0
+        for text in transcripts:
+            if self.prefilter_engine.match(text.lower()):
+                confidence = 1.0
+            else:
+                decision = self._cached_decision(text)
+                confidence = decision.confidence
+            if confidence > best_confidence:
+                best, best_confidence = text, confidence
+                if confidence >= 1.0:
+                    break  # Nothing scores higher than a pattern match
+        return best
+
+    def route(self, command):
+        """Route a raw command the way process_command does"""
+        # Prefilter commands (opening and closing apps) are checked first on
+        # the raw text as they're most direct
+        match = self.prefilter_engine.match(command.lower())
+        if match:
+            return CommandRoute(match.intent, 1.0, match.args, 'prefilter')
+
+        cmd_type, confidence, args = self._identify(command)
+        return CommandRoute(cmd_type, confidence, args, 'classifier')
+
+    def route_without_context(self, command):
+        """Route a raw command like route(), without reading or updating the previous command"""
+        match = self.prefilter_engine.match(command.lower())
+        if match:
+            return CommandRoute(match.intent, 1.0, match.args, 'prefilter')
+
+        decision = self._cached_decision(command)
+        if decision.confidence <= self.THRESHOLD:
+            return CommandRoute(None, 0, decision.args, 'classifier')
+        return CommandRoute(decision.intent, decision.confidence, decision.args, 'classifier')
@@ -0,0 +1,376 @@
+"""Hashed n-gram linear intent model.
+
+An alternative to the hand-weighted keyword scoring in ``KeywordScorer``. Word
+unigrams, word bigrams and character trigrams are hashed into a fixed number
+of features, and a softmax linear classifier over those features is trained
+from the command pattern table (sampled pattern strings, keywords and
+synonyms) plus an optional labeled corpus. The weights are stored as a small
+NumPy ``.npz`` file, and scoring an utterance is one sparse dot product.
+
+Train with an additional labeled corpus from the repository root:
+    python intent_model.py --corpus benchmarks/data/intent_corpus.tsv
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import zlib
+
+import numpy as np
+
+from intent_engine import NO_INTENT, normalize_utterance
+from synonym_index import pattern_table_version
+
+MODEL_FORMAT = 2  # 2: trained on the text the classifier scores
+N_FEATURES = 2 ** 14
+SAMPLES_PER_PATTERN = 30
+_FIRST_ROW = np.zeros(1, dtype=np.intp)
+FILLER_WORDS = ['the', 'my', 'a', 'it', 'please', 'now', 'this', 'some', 'me', 'up']
+
+
+def hashed_features(text, n_features=N_FEATURES):
+    """Return (indices, values) of the L2-normalized hashed n-grams of ``text``"""
+    words = re.findall(r"[a-z0-9']+", text.lower())
+    grams = [f'w:{word}' for word in words]
+    grams += [f'b:{a} {b}' for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f'#{word}#'
+        grams += [f'c:{padded[i:i + 3]}' for i in range(len(padded) - 2)]
+
+    if not grams:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.float32)
+
+    indices, counts = np.unique(
+        np.fromiter((zlib.crc32(gram.encode('utf-8')) % n_features for gram in grams),
+                    dtype=np.intp, count=len(grams)),
+        return_counts=True
+    )
+    values = counts.astype(np.float32)
+    return indices, values / np.linalg.norm(values)
+
+
+# Characters an escape such as \d stands for when sampling; the negated ones (\D) sample a space
+_ESCAPE_CHARS = {'d': '0123456789', 's': ' ', 'w': 'abcdefghijklmnopqrstuvwxyz'}
+_ZERO_WIDTH_ESCAPES = 'bBAZ'
+
+
+def _parse_alternatives(pattern, pos):
+    """Parse up to the closing parenthesis; returns (list of item lists, position)"""
+    alternatives = [[]]
+    while pos < len(pattern) and pattern[pos] != ')':
+        if pattern[pos] == '|':
+            alternatives.append([])
+            pos += 1
+            continue
+        item, pos = _parse_atom(pattern, pos)
+        item, pos = _parse_repeat(pattern, pos, item)
+        if item is not None:
+            alternatives[-1].append(item)
+    return alternatives, pos
+
+
+def _parse_atom(pattern, pos):
+    """Parse one literal, class, group or escape; zero-width ones parse to None"""
+    char = pattern[pos]
+    if char == '(':
+        pos += 1
+        zero_width = False
+        if pattern.startswith('?', pos):
+            if pattern.startswith('?P<', pos):
+                pos = pattern.index('>', pos) + 1
+            elif pattern.startswith('?:', pos):
+                pos += 2
+            elif pattern[pos + 1:pos + 2] in ('=', '!') or pattern[pos + 1:pos + 3] in ('<=', '<!'):
+                zero_width = True  # A lookaround matches no text
+                pos += 2 if pattern[pos + 1] != '<' else 3
+            else:
+                return None, pattern.index(')', pos) + 1  # Inline flags
+        alternatives, pos = _parse_alternatives(pattern, pos)
+        return (None if zero_width else ('group', alternatives)), pos + 1
+    if char == '[':
+        return _parse_class(pattern, pos + 1)
+    if char == '\\':
+        escaped = pattern[pos + 1]
+        if escaped in _ZERO_WIDTH_ESCAPES:
+            return None, pos + 2
+        if escaped.lower() in _ESCAPE_CHARS:
+            return ('class', (_ESCAPE_CHARS[escaped] if escaped.islower() else ' ',)), pos + 2
+        return ('text', escaped), pos + 2
+    if char in '^$':
+        return None, pos + 1
+    if char == '.':
+        return ('any',), pos + 1
+    return ('text', char), pos + 1
+
+
+def _parse_class(pattern, pos):
+    """Parse a character class after its '['; each member is a string of the characters it allows"""
+    negated = pattern.startswith('^', pos)
+    if negated:
+        pos += 1
+    members = []
+    first = True
+    while first or pattern[pos] != ']':
+        first = False
+        if pattern[pos] == '\\':
+            escaped = pattern[pos + 1]
+            if escaped.lower() in _ESCAPE_CHARS:
+                members.append(_ESCAPE_CHARS[escaped] if escaped.islower() else ' ')
+            else:
+                members.append(escaped)
+            pos += 2
+        elif pattern[pos + 1:pos + 2] == '-' and pattern[pos + 2:pos + 3] not in ('', ']'):
+            members.append(''.join(chr(code) for code in range(ord(pattern[pos]), ord(pattern[pos + 2]) + 1)))
+            pos += 3
+        else:
+            members.append(pattern[pos])
+            pos += 1
+    return ('class', (' ',) if negated else tuple(members)), pos + 1
+
+
+def _parse_repeat(pattern, pos, item):
+    """Wrap ``item`` in the quantifier at ``pos``, if there is one"""
+    if pos >= len(pattern) or pattern[pos] not in '*+?{':
+        return item, pos
+    quantifier = pattern[pos]
+    if quantifier == '{':
+        end = pattern.index('}', pos)
+        low, comma, high = pattern[pos + 1:end].partition(',')
+        low = int(low or 0)
+        if not comma:
+            high = low
+        else:
+            high = int(high) if high else None
+        pos = end + 1
+    else:
+        low, high = {'*': (0, None), '+': (1, None), '?': (0, 1)}[quantifier]
+        pos += 1
+    if pos < len(pattern) and pattern[pos] in '?+':
+        pos += 1  # Lazy and possessive repeats sample the same way
+    return (None if item is None else ('repeat', low, high, item)), pos
+
+
+def _sample_items(items, rng):
+    """Generate one string matching parsed regex items, filling wildcards with words"""
+    out = []
+    for item in items:
+        kind = item[0]
+        if kind == 'text':
+            out.append(item[1])
+        elif kind == 'any':
+            out.append(' ')
+        elif kind == 'class':
+            out.append(rng.choice(rng.choice(item[1])))
+        elif kind == 'group':
+            out.append(_sample_items(rng.choice(item[1]), rng))
+        else:
+            _, low, high, repeated = item
+            if repeated[0] == 'any':
+                # ".*" between keywords becomes zero to two filler words
+                count = rng.randint(0, 2)
+                out.append(' ' + ' '.join(rng.choice(FILLER_WORDS) for _ in range(count)) + ' ')
+                continue
+            count = low if low > 0 else rng.randint(0, 1)
+            if high is not None:
+                count = min(count, high)
+            out.append(''.join(_sample_items([repeated], rng) for _ in range(count)))
+    return ''.join(out)
+
+
+def sample_pattern(pattern, rng):
+    """Return a plausible utterance matching ``pattern``"""
+    alternatives, _ = _parse_alternatives(pattern, 0)
+    text = _sample_items(rng.choice(alternatives), rng)
+    return re.sub(r'\s+', ' ', text).strip().lower()
+
+
+def table_training_data(command_patterns, synonym_index, rng):
+    """Build (intent, text) examples from the patterns, keywords and synonyms"""
+    examples = []
+    for cmd_type, cmd_info in command_patterns.items():
+        for pattern in cmd_info.get('patterns', []):
+            for _ in range(SAMPLES_PER_PATTERN):
+                text = sample_pattern(pattern, rng)
+                if text:
+                    examples.append((cmd_type, text))
+        for keyword in cmd_info.get('keywords', []):
+            examples.append((cmd_type, keyword))
+            examples.extend((cmd_type, syn.replace('_', ' ')) for syn in synonym_index.get(keyword, ()))
+        for syn_values in cmd_info.get('synonyms', {}).values():
+            examples.extend((cmd_type, syn) for syn in syn_values)
+    return examples
+
+
+class IntentModel:
+    def __init__(self, weights, bias, classes, version=None):
+        self.weights = weights  # (n_features, n_classes) float32
+        self.bias = bias
+        self.classes = list(classes)
+        self.version = version
+        self.command_types = [c for c in self.classes if c != NO_INTENT]
+        self._command_columns = [self.classes.index(c) for c in self.command_types]
+        self._none_column = self.classes.index(NO_INTENT) if NO_INTENT in self.classes else None
+
+    @classmethod
+    def train(cls, examples, classes, epochs=150, learning_rate=2.0, l2=1e-4, version=None):
+        """Fit a softmax classifier on (intent, text) examples with class-balanced weights"""
+        class_index = {c: i for i, c in enumerate(classes)}
+        features, labels = [], []
+        for intent, text in examples:
+            indices, values = hashed_features(text)
+            if len(indices):
+                features.append((indices, values))
+                labels.append(class_index[intent])
+
+        starts, indices, values = _stack_features(features)
+        rows = np.repeat(np.arange(len(features)), np.diff(np.append(starts, len(indices))))
+        labels = np.asarray(labels)
+        n_samples, n_classes = len(labels), len(classes)
+
+        sample_weight = 1.0 / np.bincount(labels, minlength=n_classes)[labels]
+        sample_weight /= sample_weight.sum()
+        targets = np.zeros((n_samples, n_classes), dtype=np.float32)
+        targets[np.arange(n_samples), labels] = 1.0
+
+        weights = np.zeros((N_FEATURES, n_classes), dtype=np.float32)
+        bias = np.zeros(n_classes, dtype=np.float32)
+        for _ in range(epochs):
+            logits = np.add.reduceat(weights[indices] * values[:, None], starts, axis=0)
+            grad = (_softmax(logits + bias) - targets) * sample_weight[:, None]
+            # Sparse transpose product: gradient of every hashed feature per class
+            grad_weights = np.stack([
+                np.bincount(indices, weights=grad[rows, k] * values, minlength=N_FEATURES)
+                for k in range(n_classes)
+            ], axis=1)
+            weights -= learning_rate * (grad_weights.astype(np.float32) + l2 * weights)
+            bias -= learning_rate * grad.sum(axis=0).astype(np.float32)
+
+        return cls(weights, bias, classes, version)
+
+    def probabilities(self, texts):
+        """Class probabilities for every text, one sparse dot product per text"""
+        features = [hashed_features(text) for text in texts]
+        logits = np.zeros((len(texts), len(self.classes)), dtype=np.float32)
+        non_empty = [i for i, (indices, _) in enumerate(features) if len(indices)]
+        if len(non_empty) == 1:
+            indices, values = features[non_empty[0]]
+            logits[non_empty] = np.add.reduceat(self.weights[indices] * values[:, None], _FIRST_ROW, axis=0)
+        elif non_empty:
+            starts, indices, values = _stack_features([features[i] for i in non_empty])
+            logits[non_empty] = np.add.reduceat(self.weights[indices] * values[:, None], starts, axis=0)
+        return _softmax(logits + self.bias)
+
+    def _to_scores(self, probs):
+        # Text that looks most like "no command" scores zero for every command
+        if self._none_column is not None and probs.argmax() == self._none_column:
+            return [0.0] * len(self.command_types)
+        return probs[self._command_columns].tolist()
+
+    def score(self, text):
+        """Probability of every command type, in table order"""
+        return dict(zip(self.command_types, self._to_scores(self.probabilities([text])[0])))
+
+    def score_batch(self, texts):
+        """Scores for many texts as an array in command_types order"""
+        probs = self.probabilities(texts)
+        return np.array([self._to_scores(row) for row in probs]).reshape(len(texts), len(self.command_types))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp.npz'
+        np.savez_compressed(tmp_path, format=MODEL_FORMAT, weights=self.weights, bias=self.bias,
+                            classes=np.array(self.classes), version=np.array(self.version or ''))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            if int(data['format']) != MODEL_FORMAT:
+                raise ValueError(f"Unsupported intent model format {int(data['format'])}")
+            return cls(data['weights'], data['bias'], data['classes'].tolist(), str(data['version']))
+
+
+def _stack_features(features):
+    """Concatenate non-empty (indices, values) pairs; returns row starts, indices, values"""
+    lengths = [len(indices) for indices, _ in features]
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.intp)
+    indices = np.concatenate([indices for indices, _ in features])
+    values = np.concatenate([values for _, values in features])
+    return starts, indices, values
+
+
+def _softmax(logits):
+    shifted = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return shifted / shifted.sum(axis=-1, keepdims=True)
+
+
+def training_examples(command_patterns, synonym_index, corpus=None, preprocess=None, seed=0):
+    """Table and ``corpus`` examples as the model will see them, usually ``IntentClassifier.scoring_text``"""
+    preprocess = preprocess or normalize_utterance
+    examples = table_training_data(command_patterns, synonym_index, random.Random(seed)) + list(corpus or [])
+    examples = [(intent, preprocess(text)) for intent, text in examples]
+    return [(intent, text) for intent, text in examples if text]
+
+
+def train_intent_model(command_patterns, synonym_index, corpus=None, preprocess=None, seed=0):
+    """Train from the pattern table, plus (intent, utterance) pairs from ``corpus``"""
+    examples = training_examples(command_patterns, synonym_index, corpus, preprocess, seed)
+
+    classes = list(command_patterns.keys())
+    if any(intent == NO_INTENT for intent, _ in examples):
+        classes.append(NO_INTENT)
+    return IntentModel.train(examples, classes, version=pattern_table_version(command_patterns))
+
+
+def load_intent_model(command_patterns, synonym_index, path, preprocess=None):
+    """Load the model from ``path``, retraining from the table if missing or stale"""
+    version = pattern_table_version(command_patterns)
+
+    try:
+        model = IntentModel.load(path)
+        if model.version == version:
+            return model
+        print("Command patterns changed, retraining intent model from the pattern table...")
+    except FileNotFoundError:
+        print("Training intent model from the pattern table...")
+    except Exception as e:
+        print(f"Intent model unreadable, retraining: {e}")
+
+    model = train_intent_model(command_patterns, synonym_index, preprocess=preprocess)
+    try:
+        model.save(path)
+    except OSError as e:
+        print(f"Could not save intent model: {e}")
+    return model
+
+
+def main(argv=None):
+    from command_patterns import COMMAND_PATTERNS
+    from config import INTENT_MODEL_PATH, LEMMA_TABLE_PATH, LEMMA_VOCABULARY_PATHS, SYNONYM_INDEX_PATH
+    from intent_engine import IntentClassifier
+
+    parser = argparse.ArgumentParser(description="Train the hashed n-gram intent model")
+    parser.add_argument('--corpus', help="labeled corpus (intent<TAB>utterance) to train on as well")
+    parser.add_argument('--output', default=INTENT_MODEL_PATH, help="where to write the model")
+    args = parser.parse_args(argv)
+
+    corpus = None
+    if args.corpus:
+        with open(args.corpus, encoding='utf-8') as f:
+            corpus = [tuple(line.rstrip('\n').split('\t', 1)) for line in f
+                      if line.strip() and not line.startswith('#')]
+
+    # The keyword classifier provides the lemma table and synonym index
+    classifier = IntentClassifier(COMMAND_PATTERNS, SYNONYM_INDEX_PATH, lemma_table_path=LEMMA_TABLE_PATH,
+                                  vocabulary_paths=LEMMA_VOCABULARY_PATHS)
+    classifier.warm_up()
+    model = train_intent_model(COMMAND_PATTERNS, classifier.synonym_index, corpus,
+                               preprocess=classifier.scoring_text)
+    model.save(args.output)
+    print(f"Saved intent model ({len(model.classes)} classes) to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
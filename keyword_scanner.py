@@ -0,0 +1,94 @@
+"""Aho-Corasick multi-phrase scanner.
+
+Every phrase is compiled into one automaton together with the tags it belongs
+to. A single pass over the text reports which phrases occur anywhere in it as
+a substring, the same test as ``phrase in text``, and counts them per tag.
+"""
+from collections import Counter, deque
+
+
+class KeywordScanner:
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._terminal = [[]]
+        self._output = [[]]
+        self._phrase_ids = {}
+        self._phrase_tags = []
+        self._built = False
+
+    def add(self, phrase, tag):
+        """Add ``phrase`` under ``tag``; adding it twice counts it twice"""
+        phrase_id = self._phrase_ids.get(phrase)
+        if phrase_id is None:
+            phrase_id = len(self._phrase_tags)
+            self._phrase_ids[phrase] = phrase_id
+            self._phrase_tags.append([])
+
+            node = 0
+            for ch in phrase:
+                next_node = self._goto[node].get(ch)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._terminal.append([])
+                    self._output.append([])
+                    self._goto[node][ch] = next_node
+                node = next_node
+            self._terminal[node].append(phrase_id)
+            self._built = False
+
+        self._phrase_tags[phrase_id].append(tag)
+
+    def __len__(self):
+        return len(self._phrase_tags)
+
+    def phrase_tags(self, phrase_id):
+        """Return the tags of a phrase, once for every time it was added"""
+        return self._phrase_tags[phrase_id]
+
+    def build(self):
+        """Compute failure links breadth-first and merge outputs along them"""
+        self._output[0] = list(self._terminal[0])
+        queue = deque(self._goto[0].values())
+        for node in queue:
+            self._fail[node] = 0
+            self._output[node] = self._terminal[node] + self._output[0]
+
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._output[child] = self._terminal[child] + self._output[self._fail[child]]
+                queue.append(child)
+
+        self._built = True
+
+    def matched_phrases(self, text):
+        """Return the ids of all phrases that occur in ``text``"""
+        if not self._built:
+            self.build()
+
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        matched = set(output[0])  # Empty phrases match every text
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if output[node]:
+                matched.update(output[node])
+        return matched
+
+    def scan(self, text):
+        """Count, per tag, the added phrases that occur in ``text``"""
+        counts = Counter()
+        for phrase_id in self.matched_phrases(text):
+            counts.update(self._phrase_tags[phrase_id])
+        return counts
@@ -0,0 +1,216 @@
+"""Precomputed lemma table and regex tokenizer for intent matching.
+
+Intent matching used to run NLTK's ``word_tokenize`` and ``WordNetLemmatizer``
+on every token of every utterance. Instead, the lemma of every word that the
+command table, its synonyms and the labeled corpus use is computed once with
+WordNet. The results are written to a sorted, tab-separated file next to a
+version hash of the pattern table.
+
+At runtime, tokenizing is a handful of regex substitutions that split
+normalized text exactly like ``word_tokenize``, and lemmatizing is a dict
+lookup. NLTK is only imported for words outside the table, and their lemmas
+are remembered after the first lookup.
+
+Rebuild the table with extra vocabulary (for example transcripts, one
+utterance per line) from the repository root:
+    python lemma_table.py [--vocab FILE ...]
+"""
+import argparse
+import os
+import re
+import sys
+import threading
+
+from synonym_index import ensure_wordnet, pattern_table_version
+
+TABLE_FORMAT = 1
+
+# The rules of NLTK's NLTKWordTokenizer that can apply to normalized text, where
+# apostrophes and clock colons are the only punctuation left, in its order
+_TOKEN_RULES = [
+    (re.compile(r"([ \(\[{<])(\"|\'{2})"), r"\1 `` "),
+    (re.compile(r"(?i)(\')(?!re|ve|ll|m|t|s|d|n)(\w)\b"), r"\1 \2"),
+    (re.compile(r"([:,])([^\d])"), r" \1 \2"),
+    (re.compile(r"([:,])$"), r" \1 "),
+    (re.compile(r"([^'])' "), r"\1 ' "),
+]
+_CLITIC_RULES = [
+    (re.compile(r"''"), " '' "),
+    (re.compile(r"([^' ])('[sS]|'[mM]|'[dD]|') "), r"\1 \2 "),
+    (re.compile(r"([^' ])('ll|'LL|'re|'RE|'ve|'VE|n't|N'T) "), r"\1 \2 "),
+]
+_CONTRACTION_RULES = [
+    re.compile(r"(?i)\b(can)(not)\b"),
+    re.compile(r"(?i)\b(d)('ye)\b"),
+    re.compile(r"(?i)\b(gim)(me)\b"),
+    re.compile(r"(?i)\b(gon)(na)\b"),
+    re.compile(r"(?i)\b(got)(ta)\b"),
+    re.compile(r"(?i)\b(lem)(me)\b"),
+    re.compile(r"(?i)\b(more)('n)\b"),
+    re.compile(r"(?i)\b(wan)(na)(?=\s)"),
+    re.compile(r"(?i) ('t)(is)\b"),
+    re.compile(r"(?i) ('t)(was)\b"),
+]
+_CONTRACTION_WORDS = re.compile(r"(?i)cannot|d'ye|gimme|gonna|gotta|lemme|more'n|wanna|'t(?:is|was)")
+_REGEX_SYNTAX = re.compile(r"\\[a-zA-Z]|[^\w\s']")
+
+
+def tokenize(text):
+    """Split normalized text into the tokens ``nltk.word_tokenize`` gives"""
+    if "'" in text or ':' in text or ',' in text:
+        for regexp, substitution in _TOKEN_RULES:
+            text = regexp.sub(substitution, text)
+        text = f' {text} '
+        for regexp, substitution in _CLITIC_RULES:
+            text = regexp.sub(substitution, text)
+    if _CONTRACTION_WORDS.search(text):
+        text = f' {text} '
+        for regexp in _CONTRACTION_RULES:
+            text = regexp.sub(r' \1 \2 ', text)
+    return text.split()
+
+
+def table_vocabulary(command_patterns, synonym_index=None, texts=()):
+    """Every token of the patterns, keywords, synonyms and ``texts``"""
+    phrases = []
+    for cmd_info in command_patterns.values():
+        phrases += [_REGEX_SYNTAX.sub(' ', pattern.lower()) for pattern in cmd_info.get('patterns', [])]
+        phrases += cmd_info.get('keywords', [])
+        for word, syn_values in cmd_info.get('synonyms', {}).items():
+            phrases.append(word)
+            phrases += syn_values
+    for synonyms in (synonym_index or {}).values():
+        phrases += [syn.replace('_', ' ') for syn in synonyms]
+
+    vocabulary = set()
+    for phrase in phrases:
+        vocabulary.update(tokenize(phrase))
+    for text in texts:
+        vocabulary.update(tokenize(text))
+    return vocabulary
+
+
+def read_vocabulary_texts(paths):
+    """Yield the utterances of each file: the last tab-separated field of every line"""
+    for path in paths:
+        try:
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip() and not line.startswith('#'):
+                        yield line.rstrip('\n').rsplit('\t', 1)[-1]
+        except OSError as e:
+            print(f"Skipping lemma vocabulary file {path}: {e}")
+
+
+def _wordnet_lemmatizer():
+    ensure_wordnet()
+    from nltk.stem import WordNetLemmatizer
+    return WordNetLemmatizer()
+
+
+class LemmaTable:
+    def __init__(self, lemmas, version=None):
+        self.lemmas = lemmas  # word -> noun lemma, as WordNetLemmatizer.lemmatize gives
+        self.version = version
+        self.fallback_words = 0
+        self._lemmatizer = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.lemmas)
+
+    def lemmatize(self, word):
+        lemma = self.lemmas.get(word)
+        if lemma is None:
+            lemma = self._fallback(word)
+        return lemma
+
+    def _fallback(self, word):
+        # Words outside the table are looked up in WordNet once
+        with self._lock:
+            if self._lemmatizer is None:
+                self._lemmatizer = _wordnet_lemmatizer()
+            lemma = self._lemmatizer.lemmatize(word)
+            self.lemmas[word] = lemma
+            self.fallback_words += 1
+        return lemma
+
+    @classmethod
+    def build(cls, vocabulary, version=None):
+        lemmatizer = _wordnet_lemmatizer()
+        return cls({word: lemmatizer.lemmatize(word) for word in vocabulary}, version)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(f'# lemma table {TABLE_FORMAT} {self.version or ""}\n')
+            for word in sorted(self.lemmas):
+                lemma = self.lemmas[word]
+                # Most words are their own lemma; only the others need a second column
+                f.write(f'{word}\n' if lemma == word else f'{word}\t{lemma}\n')
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            header = f.readline().split()
+            if header[:3] != ['#', 'lemma', 'table'] or header[3:4] != [str(TABLE_FORMAT)]:
+                raise ValueError(f"Unsupported lemma table header {' '.join(header)!r}")
+            lemmas = {}
+            for line in f:
+                word, _, lemma = line.rstrip('\n').partition('\t')
+                lemmas[word] = lemma or word
+        return cls(lemmas, header[4] if len(header) > 4 else None)
+
+
+def load_lemma_table(command_patterns, path, synonym_index=None, texts=()):
+    """Load the table from ``path``, rebuilding it if it is missing or stale
+
+    ``texts`` are only read when the table has to be rebuilt.
+    """
+    version = pattern_table_version(command_patterns)
+
+    if path:
+        try:
+            table = LemmaTable.load(path)
+            if table.version == version:
+                return table
+            print("Command patterns changed, rebuilding lemma table...")
+        except FileNotFoundError:
+            print("Building lemma table...")
+        except Exception as e:
+            print(f"Lemma table unreadable, rebuilding: {e}")
+
+    table = LemmaTable.build(table_vocabulary(command_patterns, synonym_index, texts), version)
+    if path:
+        try:
+            table.save(path)
+        except OSError as e:
+            print(f"Could not save lemma table: {e}")
+    return table
+
+
+def main(argv=None):
+    from command_patterns import COMMAND_PATTERNS
+    from config import LEMMA_TABLE_PATH, LEMMA_VOCABULARY_PATHS, SYNONYM_INDEX_PATH
+    from intent_engine import normalize_utterance
+    from synonym_index import load_synonym_index
+
+    parser = argparse.ArgumentParser(description="Rebuild the precomputed lemma table")
+    parser.add_argument('--vocab', nargs='*', default=[],
+                        help="extra text files (one utterance per line) whose words to include")
+    parser.add_argument('--output', default=LEMMA_TABLE_PATH, help="where to write the table")
+    args = parser.parse_args(argv)
+
+    synonym_index = load_synonym_index(COMMAND_PATTERNS, SYNONYM_INDEX_PATH)
+    texts = (normalize_utterance(text) for text in read_vocabulary_texts(LEMMA_VOCABULARY_PATHS + args.vocab))
+    vocabulary = table_vocabulary(COMMAND_PATTERNS, synonym_index, texts)
+    table = LemmaTable.build(vocabulary, pattern_table_version(COMMAND_PATTERNS))
+    table.save(args.output)
+    print(f"Saved lemma table ({len(table)} words) to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+"""Producer/consumer pipeline between audio capture and command execution.
+
+    capture thread -> audio queue -> recognition workers -> command queue -> executor
+
+Capture keeps listening while earlier segments are being recognized and
+their commands run, so speech during that time is no longer lost. Both queues
+are bounded. When one is full, its policy decides what happens: ``block``
+makes the producer wait (backpressure), ``drop_oldest`` discards the oldest
+waiting item and ``drop_newest`` discards the new one. Every segment carries
+a sequence number, and the executor runs commands in the order they were
+spoken even when recognition finishes out of order. Segments also carry the
+correlation ID of their command (see ``telemetry.py``), which is made
+current on each thread that handles them, and recognition and execution are
+timed as spans.
+
+The stages are plain callables, so the pipeline needs no microphone or
+network of its own:
+
+    pipeline = ListenPipeline(capture, recognize, execute, workers=2)
+    pipeline.run(lambda: listening)   # captures on the calling thread
+"""
+import threading
+import time
+from collections import Counter, deque
+
+from telemetry import tracer as default_tracer
+
+
+class QueueClosed(Exception):
+    pass
+
+
+class BoundedQueue:
+    POLICIES = ('block', 'drop_oldest', 'drop_newest')
+
+    def __init__(self, maxsize, policy='block', block_timeout=None):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown queue policy '{policy}', expected one of {self.POLICIES}")
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.block_timeout = block_timeout  # 'block' drops the new item after waiting this long
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.blocked_s = 0.0
+        self._depth_total = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, item, force=False):
+        """Add ``item``; returns the item dropped to make room, or None
+
+        ``force`` ignores the size limit, for small control items that must
+        not be lost.
+        """
+        with self._cond:
+            if self._closed:
+                return item
+
+            dropped = None
+            if not force and len(self._items) >= self.maxsize:
+                if self.policy == 'drop_newest':
+                    self.dropped += 1
+                    return item
+                if self.policy == 'drop_oldest':
+                    dropped = self._items.popleft()
+                    self.dropped += 1
+                else:
+                    start = time.perf_counter()
+                    deadline = None if self.block_timeout is None else start + self.block_timeout
+                    while len(self._items) >= self.maxsize and not self._closed:
+                        remaining = None if deadline is None else deadline - time.perf_counter()
+                        if remaining is not None and remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    self.blocked_s += time.perf_counter() - start
+                    if self._closed or len(self._items) >= self.maxsize:
+                        self.dropped += 1
+                        return item
+
+            self._items.append(item)
+            self.enqueued += 1
+            self._depth_total += len(self._items)
+            self.max_depth = max(self.max_depth, len(self._items))
+            self._cond.notify_all()
+            return dropped
+
+    def get(self, timeout=None):
+        """Remove and return the oldest item; raises QueueClosed once closed and empty"""
+        with self._cond:
+            while not self._items:
+                if self._closed:
+                    raise QueueClosed()
+                if not self._cond.wait(timeout):
+                    raise TimeoutError()
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def close(self, discard=False):
+        """Stop accepting items; with ``discard`` also return and drop the waiting ones"""
+        with self._cond:
+            self._closed = True
+            discarded = []
+            if discard:
+                discarded = list(self._items)
+                self._items.clear()
+            self._cond.notify_all()
+            return discarded
+
+    def stats(self):
+        return {
+            'depth': len(self._items),
+            'max_depth': self.max_depth,
+            'mean_depth': self._depth_total / self.enqueued if self.enqueued else 0.0,
+            'maxsize': self.maxsize,
+            'policy': self.policy,
+            'enqueued': self.enqueued,
+            'dropped': self.dropped,
+            'blocked_s': self.blocked_s,
+        }
+
+
+class ListenPipeline:
+    def __init__(self, capture, recognize, execute, workers=2, audio_queue_size=4,
+                 audio_policy='drop_oldest', command_queue_size=8, command_policy='block', tracer=None):
+        """``capture()`` returns an audio segment or None, ``recognize(audio)``
+        returns text or None, and ``execute(text)`` runs the command"""
+        self.tracer = tracer or default_tracer
+        self.capture = capture
+        self.recognize = recognize
+        self.execute = execute
+        self.worker_count = max(1, workers)
+        self.audio_queue = BoundedQueue(audio_queue_size, audio_policy)
+        self.command_queue = BoundedQueue(command_queue_size, command_policy)
+
+        self._lock = threading.Lock()
+        self._next_seq = 0
+        self.counts = Counter()
+        self.drops = Counter()  # Segments dropped, by reason
+        self.recognition_s = 0.0
+        self.max_recognition_s = 0.0
+        self._threads = []
+
+    def drop(self, reason):
+        """Count a segment the capture stage chose not to queue"""
+        with self._lock:
+            self.drops[reason] += 1
+
+    def run(self, is_running, drain_timeout=None):
+        """Capture on the calling thread until ``is_running()`` is false, then let queued commands finish"""
+        self._start_consumers()
+        try:
+            while is_running():
+                # Spans of the capture stage already belong to the command
+                trace_id = self.tracer.new_trace()
+                with self.tracer.activate(trace_id):
+                    audio = self.capture()
+                if audio is None:
+                    continue
+                with self._lock:
+                    seq = self._next_seq
+                    self._next_seq += 1
+                    self.counts['captured'] += 1
+                dropped = self.audio_queue.put((seq, trace_id, audio))
+                if dropped is not None:
+                    self._skip(dropped[0], 'audio_queue_full')
+        finally:
+            self.stop(drain_timeout)
+
+    def stop(self, timeout=None):
+        """Wait up to ``timeout`` (None: until done) for the workers and executor; returns whether they finished
+
+        Audio that hasn't reached a worker yet is discarded; segments being
+        recognized and commands already recognized still run, so a pipeline
+        started afterwards never executes commands alongside this one.
+        """
+        for seq, _, _ in self.audio_queue.close(discard=True):
+            self._skip(seq, 'stopped')
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0.0, deadline - time.perf_counter()))
+        return not self.running
+
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def _start_consumers(self):
+        self._threads = [threading.Thread(target=self._recognition_worker, daemon=True)
+                         for _ in range(self.worker_count)]
+        self._workers_left = self.worker_count
+        self._threads.append(threading.Thread(target=self._executor, daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def _skip(self, seq, reason):
+        # The executor still needs the sequence number to keep commands in order
+        with self._lock:
+            self.drops[reason] += 1
+        self.command_queue.put((seq, None, None), force=True)
+
+    def _recognition_worker(self):
+        while True:
+            try:
+                seq, trace_id, audio = self.audio_queue.get()
+            except QueueClosed:
+                break
+
+            start = time.perf_counter()
+            try:
+                with self.tracer.activate(trace_id), self.tracer.span('recognize') as span:
+                    text = self.recognize(audio)
+                    span.set(recognized=bool(text))
+            except Exception as e:
+                print(f"Error in recognition worker: {e}")
+                text = None
+            elapsed = time.perf_counter() - start
+
+            with self._lock:
+                self.counts['recognized' if text else 'unrecognized'] += 1
+                self.recognition_s += elapsed
+                self.max_recognition_s = max(self.max_recognition_s, elapsed)
+
+            dropped = self.command_queue.put((seq, trace_id, text))
+            if dropped is not None:
+                self._skip(dropped[0], 'command_queue_full')
+
+        with self._lock:
+            self._workers_left -= 1
+            last_worker = self._workers_left == 0
+        if last_worker:
+            self.command_queue.close()
+
+    def _executor(self):
+        pending = {}
+        next_seq = 0
+        while True:
+            try:
+                seq, trace_id, text = self.command_queue.get()
+            except QueueClosed:
+                break
+            pending[seq] = trace_id, text
+
+            # Run everything that is now in order; dropped segments arrive as None
+            while next_seq in pending:
+                trace_id, text = pending.pop(next_seq)
+                next_seq += 1
+                if not text:
+                    continue
+                try:
+                    with self.tracer.activate(trace_id), self.tracer.span('execute'):
+                        self.execute(text)
+                    outcome = 'executed'
+                except Exception as e:
+                    outcome = 'errors'
+                    print(f"Error executing command: {e}")
+                with self._lock:
+                    self.counts[outcome] += 1
+
+    def stats(self):
+        with self._lock:
+            finished = self.counts['recognized'] + self.counts['unrecognized']
+            return {
+                'captured': self.counts['captured'],
+                'recognized': self.counts['recognized'],
+                'unrecognized': self.counts['unrecognized'],
+                'executed': self.counts['executed'],
+                'errors': self.counts['errors'],
+                'dropped': dict(self.drops),
+                'recognition_ms': {
+                    'mean': self.recognition_s / finished * 1000 if finished else 0.0,
+                    'max': self.max_recognition_s * 1000,
+                },
+                'audio_queue': self.audio_queue.stats(),
+                'command_queue': self.command_queue.stats(),
+            }
@@ -3,23 +3,30 @@ from PyQt6.QtWidgets import QApplication
 from PyQt6.QtGui import QGuiApplication
 from PyQt6.QtCore import Qt
 from audio_manager import AudioManager
-from system_controller import SystemController
-from web_search import WebSearch
 from time_manager import TimeManager
 from gui import VoiceAssistantGUI
 import time
 import random
 import sys
 import threading
-import nltk
-from nltk.stem import WordNetLemmatizer
 import re
 from difflib import SequenceMatcher
-from datetime import datetime
-from nltk.tokenize import word_tokenize
-from nltk.corpus import wordnet
-from voice_recognition import VoiceRecognizer
-import speech_recognition as sr
+from command_registry import registry, load_command_modules
+from builtin_commands import current_date_text, current_day_name
+from intent_engine import IntentClassifier
+from listen_pipeline import ListenPipeline
+from telemetry import tracer
+from config import (SYNONYM_INDEX_PATH, INTENT_ENGINE, INTENT_MODEL_PATH, INTENT_CACHE_SIZE, LAZY_STARTUP,
+                    COMMAND_MODULES, LEMMA_TABLE_PATH, LEMMA_VOCABULARY_PATHS, RECOGNITION_WORKERS,
+                    AUDIO_QUEUE_SIZE, AUDIO_QUEUE_POLICY, COMMAND_QUEUE_SIZE, COMMAND_QUEUE_POLICY,
+                    RECOGNITION_BACKEND, RECOGNITION_LANGUAGE, VOSK_MODEL_PATH, WAKE_WORD_REQUIRED,
+                    WAKE_WORD_TEMPLATES_PATH, WAKE_WORD_SENSITIVITY, VAD_ENABLED, VAD_MIN_SPEECH_S,
+                    VAD_AUDIT_RATE, BARGE_IN_ENABLED, BARGE_IN_MIN_DBFS, STREAMING_RECOGNITION,
+                    NOISE_CALIBRATION_PATH, CAPTURE_BUFFER_S, PRE_ROLL_S, FIXTURES_PATH, RECORD_FIXTURES,
+                    REPLAY_FIXTURES, REPLAY_SPEED,
+                    TELEMETRY_ENABLED, TELEMETRY_SPANS_PATH, TELEMETRY_METRICS_PATH,
+                    TELEMETRY_EXPORT_INTERVAL_S, RECOGNITION_SECONDARY_BACKEND, RECOGNITION_DEADLINE_S,
+                    RECOGNITION_MIN_CONFIDENCE, RECOGNITION_HEDGE_PERCENTILE)
 
 # Attempt to handle DPI awareness
 try:
@@ -36,212 +43,149 @@ class VoiceAssistant(QObject):
     on_assistant_speaking = pyqtSignal(str)
     on_assistant_word = pyqtSignal(str)
 
+    # Subsystems created in the background after the window is shown
+    WARM_UP_ORDER = ('recognizer', 'recognition_backend', 'capture_service', 'voice_recognizer',
+                     'system_controller', 'web_search')
+
     def __init__(self):
         super().__init__()
-        self.voice_recognizer = VoiceRecognizer()
         self.audio_manager = AudioManager()
-        self.system_controller = SystemController()
-        self.web_search = WebSearch()
         self.is_running = False
         self.listen_thread = None
-        self.lemmatizer = WordNetLemmatizer()
         self.time_manager = None  # Will be set by GUI
         self.gui = None  # Will be set by set_gui method
-        self.recognizer = sr.Recognizer()
         self.listening = False
+        self.listen_pipeline = None
+        self.vad = None
+        self.fixture_recorder = None
+        self._listen_requested_at = 0.0
+        
+        # Every stage of a command is timed and exported (see telemetry.py)
+        tracer.configure(TELEMETRY_ENABLED, TELEMETRY_SPANS_PATH, TELEMETRY_METRICS_PATH,
+                         TELEMETRY_EXPORT_INTERVAL_S)
+
+        # Heavy subsystems are imported and created on first use or by warm_up()
+        self._subsystems = {}
+        self._subsystem_lock = threading.RLock()
+        self.warm_up_thread = None
         
         # Connect signals
         self.audio_manager.on_word_spoken.connect(self.on_word_spoken)
         self.audio_manager.on_speaking_started.connect(self.on_speaking_started)
         self.audio_manager.on_speaking_finished.connect(self.on_speaking_finished)
-        
-        # Download required NLTK data
+
+        # Load command modules; each registers its handlers with the registry
+        load_command_modules(COMMAND_MODULES)
+        self.command_registry = registry
+        self.command_patterns = registry.command_patterns()
+
+        # Patterns are compiled now; the lemma table and scoring data load during warm-up
+        self.intent_classifier = IntentClassifier(self.command_patterns, SYNONYM_INDEX_PATH,
+                                                  INTENT_ENGINE, INTENT_MODEL_PATH, INTENT_CACHE_SIZE,
+                                                  LEMMA_TABLE_PATH, LEMMA_VOCABULARY_PATHS)
+        registry.subscribe(self._on_commands_changed)
+
+    def _subsystem(self, name):
+        """Create a subsystem on first use, shared by the warm-up and listen threads"""
+        subsystem = self._subsystems.get(name)
+        if subsystem is None:
+            with self._subsystem_lock:
+                subsystem = self._subsystems.get(name)
+                if subsystem is None:
+                    start = time.perf_counter()
+                    subsystem = getattr(self, f'_create_{name}')()
+                    self._subsystems[name] = subsystem
+                    print(f"Initialized {name} in {(time.perf_counter() - start) * 1000:.0f} ms")
+        return subsystem
+
+    def _create_recognizer(self):
+        import speech_recognition as sr
+        return sr.Recognizer()
+
+    def _create_recognition_backend(self):
+        from recognition_backends import HedgedBackend, create_backend
+        backend = create_backend(RECOGNITION_BACKEND, self.recognizer, RECOGNITION_LANGUAGE, VOSK_MODEL_PATH)
+        if RECOGNITION_SECONDARY_BACKEND:
+            # A slow or failed request no longer stalls or drops the command
+            secondary = create_backend(RECOGNITION_SECONDARY_BACKEND, self.recognizer, RECOGNITION_LANGUAGE,
+                                       VOSK_MODEL_PATH)
+            backend = HedgedBackend(backend, secondary, RECOGNITION_DEADLINE_S, RECOGNITION_MIN_CONFIDENCE,
+                                    RECOGNITION_HEDGE_PERCENTILE)
+        return backend
+
+    def _create_capture_service(self):
+        if REPLAY_FIXTURES:
+            # Listen to recorded fixtures instead of the microphone
+            from audio_fixtures import ReplayService
+            return ReplayService(REPLAY_FIXTURES, REPLAY_SPEED, buffer_s=CAPTURE_BUFFER_S).start()
+        from capture_service import CaptureService
+        return CaptureService(buffer_s=CAPTURE_BUFFER_S).start()
+
+    def _create_voice_recognizer(self):
+        from voice_recognition import VoiceRecognizer
+        return VoiceRecognizer(self.recognition_backend, self.intent_classifier.best_transcript,
+                               self.capture_service)
+
+    def _create_system_controller(self):
+        from system_controller import SystemController
+        return SystemController()
+
+    def _create_web_search(self):
+        from web_search import WebSearch
+        return WebSearch()
+
+    @property
+    def recognizer(self):
+        return self._subsystem('recognizer')
+
+    @property
+    def recognition_backend(self):
+        return self._subsystem('recognition_backend')
+
+    @property
+    def capture_service(self):
+        return self._subsystem('capture_service')
+
+    @property
+    def voice_recognizer(self):
+        return self._subsystem('voice_recognizer')
+
+    @property
+    def system_controller(self):
+        return self._subsystem('system_controller')
+
+    @property
+    def web_search(self):
+        return self._subsystem('web_search')
+
+    def warm_up(self):
+        """Import and initialize every heavy subsystem ahead of first use"""
+        start = time.perf_counter()
         try:
-            nltk.data.find('tokenizers/punkt')
-        except LookupError:
-            nltk.download('punkt', quiet=True)
-            nltk.download('wordnet', quiet=True)
-            nltk.download('averaged_perceptron_tagger')
-
-        # Initialize command patterns
-        self.command_patterns = {
-            'volume': {
-                'patterns': [
-                    r'(?:turn|set|make|adjust|change).*(?:volume|sound).*(?:up|down|to|higher|lower)',
-                    r'(?:increase|decrease|raise|lower).*(?:volume|sound)',
-                    r'(?:louder|softer|quieter)',
-                    r'(?:volume|sound).*(?:up|down|higher|lower)',
-                    r'(?:mute|unmute).*(?:volume|sound|speaker)?',
-                    r'set.*(?:volume|sound).*to.*(\d+)(?:\s*percent)?',
-                    r'(?:volume|sound).*(\d+)(?:\s*percent)?',
-                    r'(?:make|adjust).*(?:volume|sound).*(\d+)(?:\s*percent)?'
-                ],
-                'keywords': ['volume', 'sound', 'loud', 'quiet', 'increase', 'decrease', 'mute', 'unmute', 'percent'],
-                'synonyms': {
-                    'up': ['increase', 'raise', 'higher', 'louder', 'boost', 'amplify'],
-                    'down': ['decrease', 'lower', 'quieter', 'softer', 'reduce', 'diminish'],
-                    'mute': ['silence', 'quiet', 'disable sound'],
-                    'unmute': ['enable sound', 'restore sound']
-                }
-            },
-            'time': {
-                'patterns': [
-                    r'^(?:what|tell|give).*(?:time|clock)(?:\s+is\s+it)?$',
-                    r'^(?:current|present).*time$',
-                    r'^(?:what time is it|got the time)$',
-                ],
-                'keywords': ['time', 'clock', 'hour', 'minute'],
-                'synonyms': {
-                    'time': ['clock', 'hour', 'moment', 'current time'],
-                }
-            },
-            'greeting': {
-                'patterns': [
-                    r'(?:hello|hi|hey|greetings|good).*(?:morning|afternoon|evening)?',
-                    r'(?:how are|how\'re) you',
-                    r'(?:nice to meet you|pleased to meet you)',
-                ],
-                'keywords': ['hello', 'hi', 'hey', 'greetings', 'morning', 'afternoon', 'evening'],
-                'synonyms': {
-                    'hello': ['hi', 'hey', 'greetings', 'good morning', 'good afternoon', 'good evening'],
-                    'how are you': ['how you doing', 'how\'s it going', 'what\'s up']
-                }
-            },
-            'open_app': {
-                'patterns': [
-                    r'(?:open|launch|start|run)\s+(.+)',
-                    r'(?:can you )?(?:open|launch|start|run)\s+(.+)',
-                ],
-                'handler': self.handle_open_app
-            },
-            'close_app': {
-                'patterns': [
-                    r'(?:close|quit|exit|terminate|end)\s+(.+)',
-                    r'(?:can you )?(?:close|quit|exit|terminate|end)\s+(.+)',
-                ],
-                'handler': self.handle_close_app
-            },
-            'system_control': {
-                'patterns': [
-                    r'(?:shutdown|turn off|power off).*(?:computer|system|pc)',
-                    r'(?:restart|reboot).*(?:computer|system|pc)',
-                    r'(?:sleep|hibernate).*(?:computer|system|pc)',
-                    r'(?:can you|could you|please).*(?:shutdown|restart|reboot).*(?:computer|system|pc)',
-                ],
-                'keywords': ['shutdown', 'restart', 'reboot', 'power', 'sleep', 'hibernate'],
-                'synonyms': {
-                    'shutdown': ['turn off', 'power off', 'shut down', 'switch off'],
-                    'restart': ['reboot', 'reset', 'reload', 'relaunch'],
-                    'sleep': ['hibernate', 'suspend', 'standby']
-                }
-            },
-            'search': {
-                'patterns': [
-                    r'(?:search|look up|find|google|tell me about).*',
-                    r'(?:what|who|which|when|where|why|how).*(?:is|are|was|were|will|do|does|did).*',
-                    r'(?:latest|best|top|newest|recent).*(?:movies|news|games|shows|music|books).*',
-                    r'(?:can you|could you|please).*(?:search|look up|find|tell).*',
-                ],
-                'keywords': ['search', 'look up', 'find', 'what is', 'who is', 'tell me', 'best', 'latest'],
-                'synonyms': {
-                    'search': ['look up', 'find', 'google', 'research', 'investigate'],
-                    'what is': ['tell me about', 'explain', 'describe']
-                }
-            },
-            'weather': {
-                'patterns': [
-                    r'(?:what\'s|what is|how\'s).*(?:weather|temperature|forecast)',
-                    r'(?:will it|is it going to).*(?:rain|snow|be sunny)',
-                    r'(?:temperature|weather).*(?:today|tomorrow|this week)',
-                ],
-                'keywords': ['weather', 'temperature', 'forecast', 'rain', 'snow', 'sunny'],
-                'synonyms': {
-                    'weather': ['temperature', 'climate', 'conditions'],
-                    'forecast': ['prediction', 'outlook', 'weather report']
-                }
-            },
-            'reminder': {
-                'patterns': [
-                    r'(?:remind|remember|notification).*(?:me|to)\\s+([\\w\\s]+)',
-                    r'(?:set|create).*(?:reminder|alarm).*(?:for|to)\\s+([\\w\\s]+)',
-                    r'(?:don\'t let me forget|help me remember)\\s+([\\w\\s]+)',
-                ],
-                'keywords': ['remind', 'reminder', 'alarm', 'notification', 'remember'],
-                'synonyms': {
-                    'remind': ['remember', 'notify', 'alert'],
-                    'reminder': ['notification', 'alert', 'alarm']
-                }
-            },
-            'date': {
-                'patterns': [
-                    r'what (?:is|\'s) (?:today\'s )?(?:date|day)',
-                    r'what (?:date|day) is (?:it|today)',
-                    r'tell me (?:the )?(?:date|day)',
-                    r'what (?:is|\'s) the (?:date|day)(?: today)?',
-                    r'current (?:date|day)'
-                ],
-                'keywords': ['date', 'day', 'today', 'current'],
-                'synonyms': {
-                    'date': ['day', 'today'],
-                    'tell': ['show', 'give', 'what is']
-                }
-            },
-            'timer': {
-                'patterns': [
-                    r'(?:set|start|create)\s+(?:a\s+)?timer\s+(?:for\s+)?(.+)',
-                    r'(?:give|set)\s+me\s+(?:a\s+)?timer\s+(?:for\s+)?(.+)',
-                ],
-                'handler': self.handle_timer_command
-            },
-            'alarm': {
-                'patterns': [
-                    r'(?:set|create)\s+(?:an\s+)?alarm\s+(?:for\s+)?(.+)',
-                    r'wake\s+me\s+(?:up\s+)?(?:at\s+)?(.+)',
-                ],
-                'handler': self.handle_alarm_command
-            },
-            'cancel_timer': {
-                'patterns': [
-                    r'(?:cancel|stop|remove)\s+(?:the\s+)?timer',
-                    r'(?:cancel|stop|remove)\s+(?:all\s+)?timers',
-                ],
-                'handler': self.handle_cancel_timer
-            },
-            'cancel_alarm': {
-                'patterns': [
-                    r'(?:cancel|stop|remove)\s+(?:the\s+)?alarm',
-                    r'(?:cancel|stop|remove)\s+(?:all\s+)?alarms',
-                ],
-                'handler': self.handle_cancel_alarm
-            },
-            'list_timers': {
-                'patterns': [
-                    r'(?:list|show|what are)\s+(?:the\s+)?(?:active\s+)?timers',
-                    r'(?:how many|what)\s+timers\s+(?:do I have|are running)',
-                ],
-                'handler': self.handle_list_timers
-            },
-            'list_alarms': {
-                'patterns': [
-                    r'(?:list|show|what are)\s+(?:the\s+)?(?:active\s+)?alarms',
-                    r'(?:how many|what)\s+alarms\s+(?:do I have|are set)',
-                ],
-                'handler': self.handle_list_alarms
-            },
-        }
+            self.intent_classifier.warm_up()
+            print(f"Initialized intent classifier in {(time.perf_counter() - start) * 1000:.0f} ms")
+        except Exception as e:
+            print(f"Error initializing intent classifier: {e}")
         
-        # Initialize previous command type for context
-        self.previous_command_type = None
+        for name in self.WARM_UP_ORDER:
+            try:
+                self._subsystem(name)
+            except Exception as e:
+                print(f"Error initializing {name}: {e}")
+        print(f"Warm-up finished in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def start_warm_up(self):
+        """Run warm_up() in the background so the window can appear first"""
+        if not self.warm_up_thread or not self.warm_up_thread.is_alive():
+            self.warm_up_thread = threading.Thread(target=self.warm_up)
+            self.warm_up_thread.daemon = True
+            self.warm_up_thread.start()
         
     def get_command_similarity(self, text, pattern):
         return SequenceMatcher(None, text.lower(), pattern.lower()).ratio()
 
     def get_word_synonyms(self, word):
-        synonyms = set()
-        for syn in wordnet.synsets(word):
-            for lemma in syn.lemmas():
-                synonyms.add(lemma.name().lower())
-        return synonyms
+        return self.intent_classifier.get_word_synonyms(word)
 
     def extract_number(self, text):
         # Extract numeric values from text
@@ -266,307 +210,40 @@ class VoiceAssistant(QObject):
         return None
 
     def identify_command_type(self, text):
-        text = text.lower()
-        best_match = None
-        highest_score = 0
-        
-        # Tokenize and lemmatize input text
-        tokens = word_tokenize(text)
-        lemmatized_tokens = [self.lemmatizer.lemmatize(token) for token in tokens]
-        lemmatized_text = ' '.join(lemmatized_tokens)
-        
-        # Store context of previous commands for better understanding
-        context_bonus = 0.1  # Bonus score for commands related to previous context
-        
-        for cmd_type, cmd_info in self.command_patterns.items():
-            # Check patterns with regex
-            for pattern in cmd_info['patterns']:
-                if re.search(pattern, lemmatized_text, re.IGNORECASE):
-                    return cmd_type, 1.0
-            
-            # Initialize score for this command type
-            score = 0
-            
-            # Check direct keyword matches
-            keyword_matches = sum(1 for keyword in cmd_info['keywords'] if keyword in lemmatized_text)
-            if keyword_matches > 0:
-                score += 0.4 * (keyword_matches / len(cmd_info['keywords']))
-            
-            # Check for synonyms using WordNet
-            for keyword in cmd_info['keywords']:
-                keyword_synonyms = self.get_word_synonyms(keyword)
-                synonym_matches = sum(1 for syn in keyword_synonyms if syn in lemmatized_text)
-                if synonym_matches > 0:
-                    score += 0.3 * (synonym_matches / len(keyword_synonyms))
-            
-            # Check command-specific synonyms
-            for syn_key, syn_values in cmd_info.get('synonyms', {}).items():
-                syn_matches = sum(1 for syn in syn_values if syn in lemmatized_text)
-                if syn_matches > 0:
-                    score += 0.3 * (syn_matches / len(syn_values))
-            
-            # Apply context bonus if the command is related to previous ones
-            if hasattr(self, 'previous_command_type') and self.previous_command_type == cmd_type:
-                score += context_bonus
-            
-            # Update best match if this score is higher
-            if score > highest_score:
-                highest_score = score
-                best_match = cmd_type
-        
-        # Store this command type for future context
-        if highest_score > 0.3:
-            self.previous_command_type = best_match
-        
-        return best_match, highest_score if highest_score > 0.3 else (None, 0)
+        return self.intent_classifier.identify_command_type(text)
 
     def get_current_date(self):
         """Get current date in a natural format"""
-        today = datetime.now()
-        # Get day with proper ordinal suffix (1st, 2nd, 3rd, 4th, etc.)
-        day = today.day
-        if 10 <= day % 100 <= 20:
-            suffix = 'th'
-        else:
-            suffix = {1: 'st', 2: 'nd', 3: 'rd'}.get(day % 10, 'th')
-        
-        return today.strftime(f"%A, %B {day}{suffix}, %Y")
+        return current_date_text()
 
     def get_day_name(self):
         """Get current day name"""
-        return datetime.now().strftime("%A")
+        return current_day_name()
 
     def process_command(self, command):
         if not command:
             print("Skipping command processing - no command received")
             return
 
-        print(f"Processing command: '{command}'")
+        trace_id = tracer.current_trace()
+        print(f"Processing command: '{command}'" + (f" [{trace_id}]" if trace_id else ""))
         self.on_command_processing.emit()
         self.on_speech_detected.emit(command)
 
-        # First check for app opening commands as they're most direct
-        for cmd_type in ['open_app', 'close_app']:
-            for pattern in self.command_patterns[cmd_type]['patterns']:
-                matches = re.findall(pattern, command.lower())
-                if matches:
-                    return self.command_patterns[cmd_type]['handler'](command, matches)
-        
-        # Then check other command types
-        # Identify command type and confidence
-        cmd_type, confidence = self.identify_command_type(command)
-        
-        if cmd_type == 'volume':
-            # Check for numeric volume setting
-            volume_match = re.search(r'(\d+)(?:\s*percent)?', command)
-            if volume_match:
-                volume_level = int(volume_match.group(1))
-                # Ensure volume is between 0 and 100
-                volume_level = max(0, min(100, volume_level))
-                self.audio_manager.set_volume(volume_level / 100.0)
-                self.respond(f"Setting volume to {volume_level} percent")
-            else:
-                # Handle relative volume changes
-                if any(word in command.lower() for word in ['up', 'higher', 'increase', 'louder', 'raise']):
-                    self.audio_manager.volume_up()
-                    self.respond("Increasing volume")
-                elif any(word in command.lower() for word in ['down', 'lower', 'decrease', 'quieter', 'softer']):
-                    self.audio_manager.volume_down()
-                    self.respond("Decreasing volume")
-                elif any(word in command.lower() for word in ['mute', 'silence']):
-                    self.audio_manager.mute()
-                    self.respond("Muting volume")
-                elif any(word in command.lower() for word in ['unmute', 'restore']):
-                    self.audio_manager.unmute()
-                    self.respond("Unmuting volume")
-        elif cmd_type == 'time':
-            current_time = time.strftime("%I:%M %p")
-            self.respond(f"The current time is {current_time}")
-        elif cmd_type == 'greeting':
-            responses = [
-                "Hello! How can I help you today?",
-                "Hi there! What can I do for you?",
-                "Hey! I'm here to help!",
-                "Greetings! How may I assist you?",
-                "Good to see you! What's on your mind?"
-            ]
-            self.respond(random.choice(responses))
-        elif cmd_type == 'search':
-            search_query = re.sub(r'(?:search|look up|find|google|for|please|could you|can you|what is|who is|tell me about)\\s+', '', command).strip()
-            
-            # For definition questions, don't announce the search
-            if any(phrase in command.lower() for phrase in ['what is', 'what are', 'define', 'tell me about']):
-                result = self.web_search.get_information(command)
-                self.respond(result)
-            else:
-                # For general searches, keep the announcement
-                self.respond(f"Searching for information about {search_query}")
-                result = self.web_search.get_information(command)
-                self.respond(result)
-        elif cmd_type == 'weather':
-            self.respond("Let me check the current weather")
-            result = self.web_search.get_information(f"current weather forecast {time.strftime('%Y-%m-%d')}")
-            self.respond(result)
-        elif cmd_type == 'reminder':
-            reminder_text = re.sub(r'(?:remind|remember|notification|me|to|set|create|reminder|alarm|for|don\'t let me forget|help me remember)\\s+', '', command).strip()
-            self.respond(f"I'll remind you to {reminder_text}")
-            # TODO: Implement reminder functionality
-        elif cmd_type == 'date':
-            if any(phrase in command.lower() for phrase in [
-                'what is today\'s date', 'what date is it', 
-                'what is the date', 'tell me the date'
-            ]):
-                current_date = self.get_current_date()
-                self.respond(f"Today is {current_date}")
-                return
-            elif any(phrase in command.lower() for phrase in [
-                'what day is it', 'what is the day', 
-                'what day is today', 'what is the day today',
-                'tell me the day', 'what\'s today'
-            ]):
-                day_name = self.get_day_name()
-                self.respond(f"Today is {day_name}")
-                return
-            else:
-                current_date = self.get_current_date()
-                self.respond(f"The current date is {current_date}")
-        elif cmd_type == 'timer':
-            # Check for numeric volume setting
-            duration_match = re.search(r'(\d+)(?:\s*(?:minutes|minute|mins|min|m|seconds|second|secs|sec|s|h|hours|hour))?', command)
-            if duration_match:
-                duration = duration_match.group(1)
-                unit = duration_match.group(2)
-                if unit in ['minutes', 'minute', 'mins', 'min', 'm']:
-                    duration_in_seconds = int(duration) * 60
-                elif unit in ['seconds', 'second', 'secs', 'sec', 's']:
-                    duration_in_seconds = int(duration)
-                elif unit in ['hours', 'hour', 'h']:
-                    duration_in_seconds = int(duration) * 3600
-                else:
-                    duration_in_seconds = int(duration) * 60  # Default to minutes
-                response = self.time_manager.set_timer(duration_in_seconds)
-                self.audio_manager.speak(response)
-                return
-        elif cmd_type == 'alarm':
-            time_str = re.sub(r'(?:set|create|wake|me|up|at|alarm|for)\\s+', '', command).strip()
-            response = self.time_manager.set_alarm(time_str)
-            self.audio_manager.speak(response)
-            return
-        elif cmd_type == 'cancel_timer':
-            response = self.time_manager.list_timers()
-            if response == "No active timers":
-                self.audio_manager.speak(response)
-            else:
-                # Cancel all timers for now - could be made more specific later
-                for timer_name in list(self.time_manager.timers.keys()):
-                    self.time_manager.cancel_timer(timer_name)
-                self.audio_manager.speak("All timers cancelled")
-            return
-        elif cmd_type == 'cancel_alarm':
-            response = self.time_manager.list_alarms()
-            if response == "No active alarms":
-                self.audio_manager.speak(response)
-            else:
-                # Cancel all alarms for now - could be made more specific later
-                for alarm_name in list(self.time_manager.alarms.keys()):
-                    self.time_manager.cancel_alarm(alarm_name)
-                self.audio_manager.speak("All alarms cancelled")
-            return
-        elif cmd_type == 'list_timers':
-            response = self.time_manager.list_timers()
-            self.audio_manager.speak(response)
-            return
-        elif cmd_type == 'list_alarms':
-            response = self.time_manager.list_alarms()
-            self.audio_manager.speak(response)
-            return
-        else:
-            # For any unrecognized command, try to find relevant information
-            self.respond("Let me search for that information")
-            result = self.web_search.get_information(command)
-            self.respond(result)
-
-    def handle_open_app(self, command, matches):
-        """Handle requests to open applications"""
-        app_name = matches[0].strip().lower()
-        
-        # Remove common phrases
-        app_name = re.sub(r'(?:please|for me|the app|application)\s*', '', app_name)
-        
-        # Try to open the application
-        response = self.system_controller.open_application(app_name)
-        self.audio_manager.speak(response)
-        return True
-
-    def handle_close_app(self, command, matches):
-        """Handle requests to close applications"""
-        app_name = matches[0].strip().lower()
-        
-        # Remove common phrases
-        app_name = re.sub(r'(?:please|for me|the app|application)\s*', '', app_name)
-        
-        # Try to close the application
-        response = self.system_controller.close_application(app_name)
-        self.audio_manager.speak(response)
-        return True
-
-    def handle_timer_command(self, command, matches):
-        """Handle timer-related commands"""
-        duration = matches[0].strip()
-        response = self.time_manager.set_timer(duration)
-        self.audio_manager.speak(response)
-        return True
-    
-    def handle_alarm_command(self, command, matches):
-        """Handle alarm-related commands"""
-        time_str = matches[0].strip()
-        response = self.time_manager.set_alarm(time_str)
-        self.audio_manager.speak(response)
-        return True
-    
-    def handle_cancel_timer(self, command, matches):
-        """Handle timer cancellation"""
-        response = self.time_manager.list_timers()
-        if response == "No active timers":
-            self.audio_manager.speak(response)
-        else:
-            # Cancel all timers for now - could be made more specific later
-            for timer_name in list(self.time_manager.timers.keys()):
-                self.time_manager.cancel_timer(timer_name)
-            self.audio_manager.speak("All timers cancelled")
-        return True
-    
-    def handle_cancel_alarm(self, command, matches):
-        """Handle alarm cancellation"""
-        response = self.time_manager.list_alarms()
-        if response == "No active alarms":
-            self.audio_manager.speak(response)
-        else:
-            # Cancel all alarms for now - could be made more specific later
-            for alarm_name in list(self.time_manager.alarms.keys()):
-                self.time_manager.cancel_alarm(alarm_name)
-            self.audio_manager.speak("All alarms cancelled")
-        return True
-    
-    def handle_list_timers(self, command, matches):
-        """Handle timer listing"""
-        response = self.time_manager.list_timers()
-        self.audio_manager.speak(response)
-        return True
-    
-    def handle_list_alarms(self, command, matches):
-        """Handle alarm listing"""
-        response = self.time_manager.list_alarms()
-        self.audio_manager.speak(response)
-        return True
-    
+        return self.command_registry.process(self, command)
+
+    def _on_commands_changed(self):
+        """Recompile the classifier when a command module registers new patterns"""
+        self.command_patterns = self.command_registry.command_patterns()
+        self.intent_classifier.set_command_patterns(self.command_patterns)
+
     def _on_timer_complete(self, timer_name):
         """Handle timer completion"""
-        self.audio_manager.speak(f"{timer_name} is complete!")
+        self.audio_manager.speak_alarm(f"{timer_name} is complete!")
     
     def _on_alarm_triggered(self, alarm_name):
         """Handle alarm triggering"""
-        self.audio_manager.speak(f"Wake up! {alarm_name} is ringing!")
+        self.audio_manager.speak_alarm(f"Wake up! {alarm_name} is ringing!")
     
     def handle_volume_command(self, command):
         command = command.lower()
@@ -624,12 +301,16 @@ class VoiceAssistant(QObject):
 
     def start_listening(self):
         """Start listening for voice input"""
-        if not self.listen_thread or not self.listen_thread.is_alive():
-            self.listening = True
-            self.gui.on_assistant_listening()
-            self.listen_thread = threading.Thread(target=self._listen_loop)
-            self.listen_thread.daemon = True
-            self.listen_thread.start()
+        if self.listen_thread and self.listen_thread.is_alive():
+            # The last pipeline is still running its commands; two executors would run them out of order
+            print("Still finishing the previous commands, not listening yet")
+            return
+        self.listening = True
+        self._listen_requested_at = time.perf_counter()
+        self.gui.on_assistant_listening()
+        self.listen_thread = threading.Thread(target=self._listen_loop)
+        self.listen_thread.daemon = True
+        self.listen_thread.start()
             
     def stop_listening(self):
         """Stop listening for voice input"""
@@ -646,29 +327,143 @@ class VoiceAssistant(QObject):
                 print("Warning: Listen thread is taking longer than expected to stop")
 
     def _listen_loop(self):
-        """Main listening loop"""
-        with sr.Microphone() as source:
-            print("Adjusting for ambient noise...")
-            self.recognizer.adjust_for_ambient_noise(source, duration=1)
-            print("Microphone initialized successfully")
-            
-            while self.listening:
+        """Capture audio on this thread; recognition and commands run in the pipeline"""
+        import speech_recognition as sr
+        
+        # The microphone is shared; this loop reads it through its own cursor
+        with self.capture_service.source('listen_loop') as source:
+            # The saved threshold replaces a blocking calibration; it keeps adapting while listening
+            from noise_calibration import NoiseCalibration
+            calibration = NoiseCalibration(NOISE_CALIBRATION_PATH)
+            restored = calibration.prepare(self.recognizer, source)
+            print(f"Microphone initialized successfully ({'restored' if restored else 'default'} "
+                  f"energy threshold {self.recognizer.energy_threshold:.0f})")
+
+            detector = None
+            if WAKE_WORD_REQUIRED:
+                from wake_word import load_detector, listen_for_wake_word
+                detector = load_detector(WAKE_WORD_TEMPLATES_PATH, source.SAMPLE_RATE, WAKE_WORD_SENSITIVITY)
+            from vad import VoiceActivityDetector
+            if VAD_ENABLED:
+                self.vad = VoiceActivityDetector(VAD_MIN_SPEECH_S, VAD_AUDIT_RATE)
+            # Without a wake word, loud speech over the assistant is what interrupts it
+            barge_in_vad = VoiceActivityDetector(VAD_MIN_SPEECH_S, 0) if BARGE_IN_ENABLED and not detector else None
+            if RECORD_FIXTURES:
+                from audio_fixtures import FixtureRecorder
+                self.fixture_recorder = FixtureRecorder(FIXTURES_PATH)
+            from phrase_capture import PreRollStats, StreamedPhrase, listen_phrase
+            pre_roll_stats = PreRollStats()
+            streaming = STREAMING_RECOGNITION and self.recognition_backend.streaming
+
+            def capture():
+                if source.service.ring.closed:
+                    # The capture thread ended: the microphone failed or the replay is over
+                    self.listening = False
+                    return None
                 try:
-                    audio = self.recognizer.listen(source, timeout=1, phrase_time_limit=10)
-                    try:
-                        text = self.recognizer.recognize_google(audio)
-                        if text:
-                            self.gui.on_assistant_processing()
-                            print(f"Recognized: {text}")
-                            self.process_command(text)
-                    except sr.UnknownValueError:
-                        pass  # Speech was not understood
-                    except sr.RequestError as e:
-                        print(f"Could not request results; {e}")
+                    # Nothing is sent to recognition until the wake word is heard locally;
+                    # the short timeout keeps checking whether listening was stopped
+                    if detector:
+                        if not listen_for_wake_word(source, detector, timeout=1, recognizer=self.recognizer):
+                            return None
+                        print("Wake word detected")
+                        # The user is talking over the assistant: stop it and take the command
+                        self.audio_manager.barge_in()
+                    # The microphone hears the assistant too, so drop what was said while it spoke
+                    spoke = not detector and self.audio_manager.is_speaking
+                    stream = None
+                    on_chunk = None
+                    if streaming:
+                        # Decode while the phrase is spoken, showing the transcript as it grows
+                        stream = self.recognition_backend.stream(source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+
+                        def on_chunk(chunk):
+                            partial = stream.feed(chunk)
+                            if partial:
+                                self.handle_partial_result(partial)
+                                self.intent_classifier.prefetch(partial)
+                    # The pre-roll comes from the shared buffer, so a command started
+                    # between two listen calls keeps its first syllable
+                    with tracer.span('capture', ignore=(sr.WaitTimeoutError,)) as span:
+                        audio = listen_phrase(self.recognizer, source, 5 if detector else 1, 10,
+                                              on_chunk, stream.reset if stream else None,
+                                              PRE_ROLL_S, pre_roll_stats)
+                        span.set(audio_s=round(len(audio.frame_data) / audio.sample_rate / audio.sample_width, 3))
+                    if spoke or (not detector and self.audio_manager.is_speaking):
+                        # The microphone hears the assistant too: only speech well above its echo is the user
+                        if not (barge_in_vad and barge_in_vad.is_barge_in(audio, BARGE_IN_MIN_DBFS)):
+                            self.listen_pipeline.drop('assistant_speaking')
+                            return None
+                        print("Barge-in: the user spoke over the assistant")
+                        self.audio_manager.barge_in()
+                    # Noise that got past the energy threshold never reaches a recognizer
+                    if self.vad:
+                        with tracer.span('vad') as span:
+                            speech = self.vad.accept(audio)
+                            span.set(speech=speech)
+                        if not speech:
+                            self.listen_pipeline.drop('no_speech')
+                            calibration.observe_noise(self.recognizer, audio)
+                            return None
+                    return StreamedPhrase(audio, stream) if stream else audio
                 except sr.WaitTimeoutError:
-                    pass  # No speech detected within timeout
+                    return None  # No speech detected within timeout
                 except Exception as e:
                     print(f"Error in listening loop: {e}")
+                    return None
+                finally:
+                    calibration.update(self.recognizer)
+
+            self.listen_pipeline = ListenPipeline(
+                capture, self._recognize_audio, self._execute_command,
+                RECOGNITION_WORKERS, AUDIO_QUEUE_SIZE, AUDIO_QUEUE_POLICY,
+                COMMAND_QUEUE_SIZE, COMMAND_QUEUE_POLICY
+            )
+            print(f"Listening {(time.perf_counter() - self._listen_requested_at) * 1000:.0f} ms after start")
+            self.listen_pipeline.run(lambda: self.listening)
+            calibration.update(self.recognizer, force=True)
+            print(f"Listen pipeline stats: {self.listen_pipeline.stats()}")
+            print(f"Recognition backend stats: {self.recognition_backend.stats()}")
+            print(f"Capture stats: {self.capture_service.stats()}")
+            print(f"Pre-roll stats: {pre_roll_stats.stats()}")
+            print(f"Speech output stats: {self.audio_manager.speech.stats()}")
+            if self.audio_manager.phrase_cache:
+                print(f"Speech cache stats: {self.audio_manager.phrase_cache.stats()}")
+            if self.vad:
+                print(f"Voice activity stats: {self.vad.stats()}")
+            tracer.export()
+            print(f"Latency by stage: {tracer.stats()}")
+
+    def _recognize_audio(self, segment):
+        """Recognition worker stage: audio segment to text, or None
+
+        A streamed phrase was decoded while it was captured and only needs
+        finishing. Of the recognizer's alternatives, the one that maps to the
+        most confident command wins.
+        """
+        from phrase_capture import StreamedPhrase
+        if isinstance(segment, StreamedPhrase):
+            audio, result = segment.audio, segment.stream.finish()
+        else:
+            audio, result = segment, self.recognition_backend.recognize_result(segment)
+        if self.vad:
+            self.vad.record_recognition(audio, bool(result))
+        if not result:
+            return None
+        text = self.intent_classifier.best_transcript(result.transcripts)
+        if self.fixture_recorder:
+            # What was understood is saved as expected; correct the JSON file where it was wrong
+            route = self.intent_classifier.route_without_context(text)
+            self.fixture_recorder.save(audio, text, route.intent)
+        return text
+
+    def _execute_command(self, text):
+        """Executor stage: commands run one at a time, in the order they were spoken"""
+        self.gui.on_assistant_processing()
+        print(f"Recognized: {text}")
+        # A new command makes the answers still being spoken to the previous one obsolete
+        self.audio_manager.barge_in()
+        self.process_command(text)
                     
     def handle_partial_result(self, text):
         self.on_interim_speech.emit(f"Listening: {text}")
@@ -712,7 +507,13 @@ def main():
     time_manager.timer_complete.connect(assistant._on_timer_complete)
     time_manager.alarm_triggered.connect(assistant._on_alarm_triggered)
     
-    gui.show()
+    if LAZY_STARTUP:
+        # Show the window first and load the heavy subsystems behind it
+        gui.show()
+        assistant.start_warm_up()
+    else:
+        assistant.warm_up()
+        gui.show()
     sys.exit(app.exec())
 
 if __name__ == "__main__":
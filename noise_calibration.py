@@ -0,0 +1,103 @@
+"""Persisted, adaptive ambient-noise calibration.
+
+``adjust_for_ambient_noise`` blocks for a second every time the microphone is
+opened. Instead, the energy threshold each input device ended up with is
+saved and restored the next time, so listening starts right away. While
+listening, the threshold keeps adapting:
+
+- quiet audio between phrases pulls it down, like ``Recognizer.listen`` does
+  (see ``phrase_capture.adapt_energy_threshold``)
+- segments the voice activity detector rejects as noise push it up, so a fan
+  or a TV doesn't keep starting phrases
+
+A device seen for the first time starts from the recognizer's default
+threshold and adapts from there, so opening the microphone never blocks.
+"""
+import json
+import os
+import time
+
+import numpy as np
+
+from phrase_capture import rms
+
+
+def device_key(source):
+    """Name, sample rate and width of an open ``speech_recognition.Microphone``"""
+    try:
+        if source.device_index is None:
+            name = source.audio.get_default_input_device_info()['name']
+        else:
+            name = source.audio.get_device_info_by_index(source.device_index)['name']
+    except Exception:
+        name = 'default'
+    return f"{name}|{source.SAMPLE_RATE}|{source.SAMPLE_WIDTH}"
+
+
+class NoiseCalibration:
+    SAVE_INTERVAL_S = 30.0
+    MIN_CHANGE = 0.1  # Relative threshold change worth writing to disk
+
+    def __init__(self, path):
+        self.path = path
+        self.key = None
+        self._saved_threshold = None
+        self._saved_at = 0.0
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.devices = json.load(f)
+        except FileNotFoundError:
+            self.devices = {}
+        except Exception as e:
+            print(f"Ignoring unreadable noise calibration: {e}")
+            self.devices = {}
+
+    def prepare(self, recognizer, source):
+        """Restore the saved threshold of ``source``; returns False for a new device"""
+        self.key = device_key(source)
+        self._saved_at = time.monotonic()
+        saved = self.devices.get(self.key)
+        if not saved:
+            self._saved_threshold = None
+            return False
+        recognizer.energy_threshold = saved['energy_threshold']
+        self._saved_threshold = recognizer.energy_threshold
+        return True
+
+    def observe_noise(self, recognizer, audio, chunk_size=1024):
+        """Raise the threshold toward a segment that turned out to be noise"""
+        if not recognizer.dynamic_energy_threshold:
+            return
+        raw = audio.get_raw_data()
+        step = chunk_size * audio.sample_width
+        energies = [rms(raw[i:i + step], audio.sample_width) for i in range(0, len(raw) - step + 1, step)]
+        if not energies:
+            return
+        # The median ignores a single bang in an otherwise quiet segment
+        target = float(np.median(energies)) * recognizer.dynamic_energy_ratio
+        if target > recognizer.energy_threshold:
+            recognizer.energy_threshold = (recognizer.energy_threshold + target) / 2
+
+    def update(self, recognizer, force=False):
+        """Remember the current threshold, writing it out when it moved enough"""
+        if self.key is None:
+            return
+        threshold = recognizer.energy_threshold
+        saved = self._saved_threshold
+        changed = saved is None or abs(threshold - saved) > self.MIN_CHANGE * saved
+        if not force and (not changed or time.monotonic() - self._saved_at < self.SAVE_INTERVAL_S):
+            return
+        self.devices[self.key] = {'energy_threshold': threshold, 'updated': time.time()}
+        self._saved_threshold = threshold
+        self._saved_at = time.monotonic()
+        self.save()
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.devices, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Could not save noise calibration: {e}")
@@ -0,0 +1,233 @@
+"""Pre-rendered speech for responses that are said again and again.
+
+Most responses are fixed strings ("Increasing volume", the greetings, "No
+active timers"), yet each one used to be synthesized live every time.
+``PhraseCache`` keeps them as audio. The speech thread (see
+``speech_queue.py``) renders them with the engine's ``save_to_file`` while
+nothing is waiting to be spoken: the configured phrases first, then any other
+response once it has been spoken ``render_after`` times. From then on the
+response is played from the cache instead of being synthesized. Only the
+last ``max_seen`` distinct responses of up to ``MAX_COUNTED_CHARS``
+characters are counted, so one-off answers do not pile up.
+
+Entries are keyed by the text and the voice, rate and pitch it was rendered
+with, so changing the voice never plays stale audio. Rendered WAV files are
+kept in ``directory``, at most ``max_files`` of them, and the least recently
+played ones are deleted first. Up to ``max_memory_bytes`` of decoded audio is
+held in memory, also least recently played first out, so a hit usually does
+not touch the disk.
+
+Cached audio is played with PyAudio, which is already installed for the
+microphone. It is written in short chunks, so an interrupted phrase stops
+within ``AudioPlayer.CHUNK_S``. Engines that cannot save WAV files (the macOS
+driver saves AIFF) leave every response live.
+
+``python -m benchmarks.tts_cache_bench`` compares the time to first audio of
+cached and live responses.
+"""
+import hashlib
+import os
+import threading
+import wave
+from collections import OrderedDict, namedtuple
+
+# Sample format and frames of a rendered phrase
+RenderedPhrase = namedtuple('RenderedPhrase', ['channels', 'sample_width', 'frame_rate', 'frames'])
+
+
+def load_phrase(path):
+    with wave.open(path, 'rb') as f:
+        return RenderedPhrase(f.getnchannels(), f.getsampwidth(), f.getframerate(), f.readframes(f.getnframes()))
+
+
+def voice_settings(engine):
+    """The engine's voice, rate and pitch; part of every cache key"""
+    settings = []
+    for name in ('voice', 'rate', 'pitch'):
+        try:
+            settings.append(engine.getProperty(name))
+        except Exception:
+            settings.append(None)  # Not every driver has a pitch
+    return tuple(settings)
+
+
+class PhraseCache:
+    MAX_COUNTED_CHARS = 200  # Longer responses (search results, news) are not counted or rendered
+
+    def __init__(self, directory, phrases=(), render_after=3, max_files=200, max_memory_bytes=16 * 1024 * 1024,
+                 max_seen=1000):
+        self.directory = directory
+        self.render_after = render_after  # 0 renders only the configured phrases
+        self.max_seen = max_seen
+        self.max_files = max_files
+        self.max_memory_bytes = max_memory_bytes
+        self.settings = None
+        self._lock = threading.Lock()
+        self._seen = OrderedDict()  # text -> times spoken but not rendered, least recently spoken first
+        self._to_render = OrderedDict((text, None) for text in phrases if text)
+        self._failed = set()  # Keys that could not be rendered or loaded
+        self._memory = OrderedDict()  # key -> RenderedPhrase, least recently played first
+        self._memory_bytes = 0
+        self._files = OrderedDict()  # key -> path, least recently played first
+
+        os.makedirs(directory, exist_ok=True)
+        files = [entry for entry in os.scandir(directory) if entry.name.endswith('.wav')
+                 and not entry.name.endswith('.tmp.wav')]
+        for entry in sorted(files, key=lambda entry: entry.stat().st_mtime):
+            self._files[entry.name[:-4]] = entry.path
+
+        self.hits = 0
+        self.misses = 0
+        self.rendered = 0
+
+    def key(self, text):
+        return hashlib.sha1(repr((text,) + self.settings).encode('utf-8')).hexdigest()
+
+    def use_engine(self, engine):
+        """Take the voice settings from the engine that will render and speak"""
+        self.settings = voice_settings(engine)
+
+    def get(self, text):
+        """The rendered phrase for ``text``, or None; counts the request either way"""
+        if self.settings is None:
+            return None
+        key = self.key(text)
+        with self._lock:
+            phrase = self._memory.get(key)
+            if phrase is not None:
+                self._memory.move_to_end(key)
+            path = self._files.get(key)
+            if path is not None:
+                self._files.move_to_end(key)
+            elif phrase is None and key not in self._failed and self.render_after:
+                self._count(text)
+        if phrase is None and path is not None:
+            try:
+                phrase = load_phrase(path)
+                os.utime(path)  # The file order survives a restart
+            except (OSError, EOFError, wave.Error) as e:
+                print(f"Could not load cached speech '{text}': {e}")
+                self._forget(key)
+            else:
+                self._remember(key, phrase)
+        if phrase is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return phrase
+
+    def _count(self, text):
+        if len(text) > self.MAX_COUNTED_CHARS:
+            return
+        seen = self._seen.pop(text, 0) + 1
+        if seen >= self.render_after:
+            self._to_render[text] = None
+            return
+        self._seen[text] = seen
+        if len(self._seen) > self.max_seen:
+            self._seen.popitem(last=False)
+
+    def pending(self):
+        """Whether there are phrases waiting to be rendered"""
+        return self.settings is not None and bool(self._to_render)
+
+    def render_next(self, engine):
+        """Render one waiting phrase with ``engine``; only call on the engine's thread"""
+        with self._lock:
+            if not self._to_render:
+                return False
+            text, _ = self._to_render.popitem(last=False)
+            key = self.key(text)
+            if key in self._files or key in self._failed:
+                return True
+        path = os.path.join(self.directory, key + '.wav')
+        tmp_path = os.path.join(self.directory, key + '.tmp.wav')
+        try:
+            engine.save_to_file(text, tmp_path)
+            engine.runAndWait()
+            phrase = load_phrase(tmp_path)
+            os.replace(tmp_path, path)
+        except (OSError, EOFError, wave.Error) as e:
+            print(f"Could not render speech '{text}': {e}")
+            with self._lock:
+                self._failed.add(key)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return True
+        with self._lock:
+            self._files[key] = path
+            self.rendered += 1
+            evicted = []
+            while len(self._files) > self.max_files:
+                evicted.append(self._files.popitem(last=False)[1])
+        for old_path in evicted:
+            try:
+                os.remove(old_path)
+            except OSError:
+                pass
+        self._remember(key, phrase)
+        return True
+
+    def _remember(self, key, phrase):
+        size = len(phrase.frames)
+        if size > self.max_memory_bytes:
+            return
+        with self._lock:
+            if key in self._memory:
+                return
+            self._memory[key] = phrase
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_memory_bytes:
+                _, old = self._memory.popitem(last=False)
+                self._memory_bytes -= len(old.frames)
+
+    def _forget(self, key):
+        with self._lock:
+            self._files.pop(key, None)
+            self._failed.add(key)
+            phrase = self._memory.pop(key, None)
+            if phrase is not None:
+                self._memory_bytes -= len(phrase.frames)
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'rendered': self.rendered, 'files': len(self._files),
+                'memory_kb': self._memory_bytes // 1024, 'waiting': len(self._to_render)}
+
+
+class AudioPlayer:
+    """Plays rendered phrases through PyAudio, one short chunk at a time"""
+    CHUNK_S = 0.05
+
+    def __init__(self):
+        import pyaudio
+        self._pyaudio = pyaudio.PyAudio()
+        self._stream = None
+        self._format = None
+
+    def play(self, phrase, stopped=lambda: False, on_first_audio=None):
+        """Play ``phrase`` until it ends or ``stopped()`` is true; returns whether it ended"""
+        audio_format = phrase[:3]
+        if audio_format != self._format:
+            self._close_stream()
+            self._stream = self._pyaudio.open(format=self._pyaudio.get_format_from_width(phrase.sample_width),
+                                              channels=phrase.channels, rate=phrase.frame_rate, output=True)
+            self._format = audio_format
+        frame_bytes = phrase.channels * phrase.sample_width
+        chunk = max(1, int(phrase.frame_rate * self.CHUNK_S)) * frame_bytes
+        for offset in range(0, len(phrase.frames), chunk):
+            if stopped():
+                return False
+            if offset == 0 and on_first_audio:
+                on_first_audio()
+            self._stream.write(phrase.frames[offset:offset + chunk])
+        return True
+
+    def _close_stream(self):
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+
+    def close(self):
+        self._close_stream()
+        self._pyaudio.terminate()
@@ -0,0 +1,158 @@
+"""Phrase capture that hands out audio while the phrase is still being spoken.
+
+``listen_phrase`` records one phrase the way ``speech_recognition.Recognizer.listen``
+does: it waits for the energy to rise above ``energy_threshold``, then records
+until ``pause_threshold`` seconds of quiet, using the same recognizer
+settings. On top of that, every chunk of the phrase is passed to ``on_chunk``
+as soon as it is read, starting with the quiet lead-in that is kept before
+the phrase. A streaming recognizer can then decode while the user is still
+talking. Chunks are whatever the source's ``stream.read`` returns: bytes from
+a microphone, or NumPy views from ``capture_service.CaptureSource``. When a phrase turns out too short and listening starts over,
+``on_restart`` is called so the consumer can drop what it was given.
+
+Every phrase starts with ``pre_roll_s`` of the audio before the chunk that
+crossed the threshold, so soft onsets aren't clipped. ``listen`` only keeps
+lead-in it read itself, so a command started just before a ``listen`` call
+lost its first syllable. A source that can look back
+(``capture_service.CaptureSource``) provides the pre-roll from the shared
+buffer instead, reaching back before the call.
+"""
+import collections
+import math
+
+import numpy as np
+
+# A captured phrase and the recognition stream that was fed while it was spoken
+StreamedPhrase = collections.namedtuple('StreamedPhrase', ['audio', 'stream'])
+
+_SAMPLE_TYPES = {1: np.int8, 2: '<i2', 4: '<i4'}
+
+
+def rms(buffer, sample_width):
+    """Root mean square of a chunk of raw samples, like ``audioop.rms``"""
+    samples = np.frombuffer(buffer, dtype=_SAMPLE_TYPES[sample_width]).astype(np.float64)
+    return math.sqrt(np.dot(samples, samples) / len(samples)) if len(samples) else 0.0
+
+
+def adapt_energy_threshold(recognizer, energy, seconds):
+    """Pull the threshold toward quiet audio, as ``Recognizer.listen`` does between phrases"""
+    if recognizer.dynamic_energy_threshold and energy <= recognizer.energy_threshold:
+        damping = recognizer.dynamic_energy_adjustment_damping ** seconds
+        target_energy = energy * recognizer.dynamic_energy_ratio
+        recognizer.energy_threshold = recognizer.energy_threshold * damping + target_energy * (1 - damping)
+
+
+class PreRollStats:
+    """How often the pre-roll mattered"""
+
+    def __init__(self):
+        self.phrases = 0
+        self.from_history = 0   # Pre-roll reached back before the listen call started
+        self.onset_in_pre_roll = 0  # Pre-roll already held speech-level audio that would have been clipped
+
+    def record(self, lead_in, read_before, recognizer, source):
+        """Count a phrase whose pre-roll chunks were ``lead_in``, ``read_before`` of them read by this call"""
+        self.phrases += 1
+        self.from_history += len(lead_in) > read_before
+        self.onset_in_pre_roll += any(rms(chunk, source.SAMPLE_WIDTH) > recognizer.energy_threshold
+                                      for chunk in lead_in)
+
+    def stats(self):
+        return {
+            'phrases': self.phrases,
+            'from_history': self.from_history,
+            'onset_in_pre_roll': self.onset_in_pre_roll,
+            'needed_rate': self.onset_in_pre_roll / self.phrases if self.phrases else 0.0,
+        }
+
+
+def listen_phrase(recognizer, source, timeout=None, phrase_time_limit=None, on_chunk=None, on_restart=None,
+                  pre_roll_s=None, pre_roll_stats=None):
+    """Record one phrase from an open microphone; returns ``speech_recognition.AudioData``
+
+    ``pre_roll_s`` defaults to the recognizer's ``non_speaking_duration``,
+    like ``listen``. Raises ``speech_recognition.WaitTimeoutError`` when no
+    phrase starts within ``timeout`` seconds.
+    """
+    import speech_recognition as sr
+
+    seconds_per_buffer = source.CHUNK / source.SAMPLE_RATE
+    pause_buffer_count = int(math.ceil(recognizer.pause_threshold / seconds_per_buffer))
+    phrase_buffer_count = int(math.ceil(recognizer.phrase_threshold / seconds_per_buffer))
+    non_speaking_buffer_count = int(math.ceil(recognizer.non_speaking_duration / seconds_per_buffer))
+    if pre_roll_s is None:
+        pre_roll_s = recognizer.non_speaking_duration
+    pre_roll_buffer_count = int(math.ceil(pre_roll_s / seconds_per_buffer))
+    preceding = getattr(source, 'preceding', None)
+
+    elapsed_time = 0.0
+    read_before = 0  # Chunks read by this call before the phrase started
+    buffer = b""
+    while True:
+        frames = collections.deque()
+
+        # Keep a little audio from before the phrase starts
+        while True:
+            elapsed_time += seconds_per_buffer
+            if timeout and elapsed_time > timeout:
+                raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+
+            buffer = source.stream.read(source.CHUNK)
+            if len(buffer) == 0:
+                break
+            frames.append(buffer)
+            if len(frames) > pre_roll_buffer_count:
+                frames.popleft()
+
+            energy = rms(buffer, source.SAMPLE_WIDTH)
+            if energy > recognizer.energy_threshold:
+                break
+            read_before += 1
+            adapt_energy_threshold(recognizer, energy, seconds_per_buffer)
+
+        if len(buffer):
+            lead_in = list(frames)[:-1]
+            if preceding is not None:
+                # The shared buffer also holds what was said before this call
+                lead_in = preceding(pre_roll_buffer_count, skip=1)
+                frames = collections.deque(lead_in + [buffer])
+            if pre_roll_stats is not None:
+                pre_roll_stats.record(lead_in, read_before, recognizer, source)
+
+        if on_chunk:
+            for frame in frames:
+                on_chunk(frame)
+
+        # Record until the phrase ends
+        pause_count, phrase_count = 0, 0
+        phrase_start_time = elapsed_time
+        while True:
+            elapsed_time += seconds_per_buffer
+            if phrase_time_limit and elapsed_time - phrase_start_time > phrase_time_limit:
+                break
+
+            buffer = source.stream.read(source.CHUNK)
+            if len(buffer) == 0:
+                break
+            frames.append(buffer)
+            if on_chunk:
+                on_chunk(buffer)
+            phrase_count += 1
+
+            if rms(buffer, source.SAMPLE_WIDTH) > recognizer.energy_threshold:
+                pause_count = 0
+            else:
+                pause_count += 1
+            if pause_count > pause_buffer_count:
+                break
+
+        # Too short to be a phrase: listen again, unless the stream ended
+        phrase_count -= pause_count
+        if phrase_count >= phrase_buffer_count or len(buffer) == 0:
+            break
+        if on_restart:
+            on_restart()
+
+    for _ in range(pause_count - non_speaking_buffer_count):
+        frames.pop()  # The quiet tail is cut like listen() does
+    return sr.AudioData(b"".join(frames), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
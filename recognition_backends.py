@@ -0,0 +1,471 @@
+"""Speech recognition backends.
+
+Every backend turns a ``speech_recognition.AudioData`` segment into a
+``RecognitionResult`` holding the n-best alternatives from a single engine
+call, empty when nothing was understood or the engine failed. Each call's
+latency is recorded. ``RECOGNITION_BACKEND`` in ``config.py`` selects one:
+
+- ``google``: Google Web Speech API, needs network
+- ``sphinx``: CMU pocketsphinx, offline
+- ``vosk``: Vosk/Kaldi, offline, needs a model directory (``VOSK_MODEL_PATH``)
+- ``fake``: deterministic transcripts for tests, no audio needed
+
+Engines are imported when their backend is created, so only the selected one
+is ever loaded.
+
+A phrase can also be recognized while it is captured: ``backend.stream()``
+takes raw chunks and returns growing partial transcripts when the engine
+decodes incrementally (``streaming`` is true for Vosk and the fake backend).
+Other engines buffer the chunks and recognize the phrase once it ends.
+
+``HedgedBackend`` bounds how long a phrase can take. It asks a secondary
+backend too when the primary is slow, fails or isn't confident, and returns
+the first confident answer.
+"""
+import json
+import statistics
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+Alternative = namedtuple('Alternative', ['transcript', 'confidence'])  # confidence may be None
+
+
+class RecognitionResult(namedtuple('RecognitionResult', ['alternatives', 'backend'])):
+    """N-best alternatives of one recognition call, most likely first"""
+
+    @property
+    def text(self):
+        return self.alternatives[0].transcript if self.alternatives else None
+
+    @property
+    def transcripts(self):
+        return [alternative.transcript for alternative in self.alternatives]
+
+    def __bool__(self):
+        return bool(self.alternatives)
+
+
+class RecognitionStream:
+    """One phrase, recognized chunk by chunk as it is captured
+
+    ``feed(chunk)`` returns the partial transcript when it changed, else None.
+    ``finish()`` returns the RecognitionResult of the whole phrase.
+    """
+
+    def __init__(self, backend, sample_rate, sample_width=2):
+        self.backend = backend
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.reset()
+
+    def reset(self):
+        """Forget everything fed so far"""
+        self.partial = ''
+        self._reset()
+
+    def feed(self, chunk):
+        text = self._feed(chunk)
+        if text and text != self.partial:
+            self.partial = text
+            return text
+        return None
+
+    def finish(self):
+        start = time.perf_counter()
+        alternatives = []
+        try:
+            alternatives = [alt for alt in self._finish() if alt.transcript]
+            return RecognitionResult(alternatives, self.backend.name)
+        finally:
+            # Only the time after the phrase ended is counted, that's what the user waits for
+            self.backend._record(time.perf_counter() - start, alternatives)
+
+    def _reset(self):
+        self._chunks = []
+
+    def _feed(self, chunk):
+        # Chunks may be views into a ring buffer that is overwritten later
+        self._chunks.append(bytes(chunk))
+        return None
+
+    def _finish(self):
+        import speech_recognition as sr
+        return self.backend._recognize(sr.AudioData(b''.join(self._chunks), self.sample_rate, self.sample_width))
+
+
+class RecognizerBackend:
+    name = None
+    streaming = False  # Whether stream() gives partial transcripts
+
+    def __init__(self, history=1000):
+        self.calls = 0
+        self.failures = 0
+        self._latencies = deque(maxlen=history)  # Seconds, most recent calls
+        self._lock = threading.Lock()
+
+    def recognize_result(self, audio):
+        """Recognize ``audio`` once and return all of its alternatives"""
+        start = time.perf_counter()
+        alternatives = []
+        try:
+            alternatives = [alt for alt in self._recognize(audio) if alt.transcript]
+            return RecognitionResult(alternatives, self.name)
+        finally:
+            self._record(time.perf_counter() - start, alternatives)
+
+    def _record(self, elapsed, alternatives):
+        with self._lock:
+            self.calls += 1
+            self.failures += not alternatives
+            self._latencies.append(elapsed)
+
+    def stream(self, sample_rate, sample_width=2):
+        """Start recognizing a phrase from raw chunks of audio"""
+        return RecognitionStream(self, sample_rate, sample_width)
+
+    def recognize(self, audio):
+        """Return the most likely transcript of ``audio``, or None"""
+        return self.recognize_result(audio).text
+
+    def _recognize(self, audio):
+        """Return a list of Alternatives, best first; empty if nothing was understood"""
+        raise NotImplementedError
+
+    def stats(self):
+        """Call count and per-call latency of recent calls in milliseconds"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            calls, failures = self.calls, self.failures
+        ms = [latency * 1000 for latency in latencies]
+        return {
+            'backend': self.name,
+            'calls': calls,
+            'failures': failures,
+            'mean_ms': statistics.fmean(ms) if ms else 0.0,
+            'p50_ms': ms[len(ms) // 2] if ms else 0.0,
+            'p95_ms': ms[min(len(ms) - 1, int(len(ms) * 0.95))] if ms else 0.0,
+            'max_ms': ms[-1] if ms else 0.0,
+        }
+
+
+class GoogleBackend(RecognizerBackend):
+    name = 'google'
+
+    def __init__(self, recognizer=None, language='en-US'):
+        super().__init__()
+        import speech_recognition as sr
+        self._sr = sr
+        self.recognizer = recognizer or sr.Recognizer()
+        self.language = language
+
+    def _recognize(self, audio):
+        try:
+            # show_all returns every alternative from the same request
+            response = self.recognizer.recognize_google(audio, language=self.language, show_all=True)
+        except self._sr.UnknownValueError:
+            return []  # Speech was not understood
+        except self._sr.RequestError as e:
+            print(f"Could not request results from Google speech recognition: {e}")
+            return []
+        if not response or 'alternative' not in response:
+            return []
+        return [Alternative(alt.get('transcript'), alt.get('confidence')) for alt in response['alternative']]
+
+
+class SphinxBackend(RecognizerBackend):
+    name = 'sphinx'
+
+    def __init__(self, recognizer=None, language='en-US'):
+        super().__init__()
+        import speech_recognition as sr
+        import pocketsphinx  # noqa: F401 - fail at startup rather than on the first command
+        self._sr = sr
+        self.recognizer = recognizer or sr.Recognizer()
+        self.language = language
+
+    def _recognize(self, audio):
+        try:
+            return [Alternative(self.recognizer.recognize_sphinx(audio, language=self.language), None)]
+        except self._sr.UnknownValueError:
+            return []
+        except self._sr.RequestError as e:
+            print(f"Sphinx recognition failed: {e}")
+            return []
+
+
+class VoskStream(RecognitionStream):
+    def __init__(self, backend, sample_rate, sample_width=2):
+        if sample_width != 2:
+            raise ValueError(f"Vosk needs 16 bit audio, got {8 * sample_width} bit")
+        super().__init__(backend, sample_rate, sample_width)
+
+    def _reset(self):
+        # A recognizer holds decoding state, so every phrase gets its own
+        self.recognizer = self.backend._vosk.KaldiRecognizer(self.backend.model, self.sample_rate)
+        self.recognizer.SetMaxAlternatives(self.backend.max_alternatives)
+        self._finals = []  # Text of the parts Vosk already closed at a pause
+
+    def _feed(self, chunk):
+        if self.recognizer.AcceptWaveform(bytes(chunk)):
+            self._finals.append(self._best(json.loads(self.recognizer.Result())))
+            return ' '.join(filter(None, self._finals))
+        partial = json.loads(self.recognizer.PartialResult()).get('partial', '')
+        return ' '.join(filter(None, self._finals + [partial]))
+
+    @staticmethod
+    def _best(result):
+        if 'alternatives' in result:
+            return result['alternatives'][0].get('text', '') if result['alternatives'] else ''
+        return result.get('text', '')
+
+    def _finish(self):
+        prefix = ' '.join(filter(None, self._finals))
+        result = json.loads(self.recognizer.FinalResult())
+        if 'alternatives' in result:
+            alternatives = [(alt.get('text'), alt.get('confidence')) for alt in result['alternatives']]
+        else:
+            alternatives = [(result.get('text'), None)]
+        alternatives = [Alternative(' '.join(filter(None, (prefix, text))), confidence)
+                        for text, confidence in alternatives]
+        return alternatives if any(alt.transcript for alt in alternatives) else [Alternative(prefix, None)]
+
+
+class VoskBackend(RecognizerBackend):
+    name = 'vosk'
+    SAMPLE_RATE = 16000
+    streaming = True
+
+    def __init__(self, model_path, max_alternatives=5):
+        super().__init__()
+        self.max_alternatives = max_alternatives
+        import vosk
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        # Loading the model takes a while, so it happens once, at warm-up
+        self.model = vosk.Model(model_path)
+
+    def _recognize(self, audio):
+        stream = VoskStream(self, self.SAMPLE_RATE)
+        stream._feed(audio.get_raw_data(convert_rate=self.SAMPLE_RATE, convert_width=2))
+        return stream._finish()
+
+    def stream(self, sample_rate, sample_width=2):
+        return VoskStream(self, sample_rate, sample_width)
+
+
+class FakeBackend(RecognizerBackend):
+    """Deterministic backend for tests and benchmarks
+
+    ``audio`` given as a string is its own transcript. Anything else is looked
+    up in ``transcripts`` (a dict keyed by the audio's raw bytes or the audio
+    object itself), or, when ``transcripts`` is a list, answered with its
+    entries in turn. An entry may be a list of alternatives instead of one
+    transcript. Streamed phrases reveal one more word of the coming list
+    entry per chunk.
+    """
+    name = 'fake'
+    streaming = True
+
+    def __init__(self, transcripts=None, latency_s=0.0):
+        """``latency_s`` is the delay of every call, or a function returning one per call"""
+        super().__init__()
+        self.transcripts = transcripts if transcripts is not None else {}
+        self.latency_s = latency_s
+        self._turn = 0
+
+    def _peek(self):
+        """The list entry the next phrase will get, as one transcript"""
+        with self._lock:
+            if not isinstance(self.transcripts, list) or not self.transcripts:
+                return None
+            entry = self.transcripts[self._turn % len(self.transcripts)]
+        return entry if isinstance(entry, str) or not entry else entry[0]
+
+    def stream(self, sample_rate, sample_width=2):
+        return FakeStream(self, sample_rate, sample_width)
+
+    def _recognize(self, audio):
+        latency_s = self.latency_s() if callable(self.latency_s) else self.latency_s
+        if latency_s:
+            time.sleep(latency_s)
+        if isinstance(audio, str):
+            entry = audio
+        elif isinstance(self.transcripts, list):
+            with self._lock:
+                if not self.transcripts:
+                    return []
+                entry = self.transcripts[self._turn % len(self.transcripts)]
+                self._turn += 1
+        else:
+            key = audio.get_raw_data() if hasattr(audio, 'get_raw_data') else audio
+            entry = self.transcripts.get(key)
+
+        if not entry:
+            return []
+        if isinstance(entry, str):
+            return [Alternative(entry, None)]
+        return [Alternative(text, None) for text in entry]
+
+
+class FakeStream(RecognitionStream):
+    def _feed(self, chunk):
+        self._chunks.append(chunk)
+        text = self.backend._peek()
+        return ' '.join(text.split()[:len(self._chunks)]) if text else None
+
+    def _finish(self):
+        return self.backend._recognize(b''.join(self._chunks))
+
+
+class HedgedBackend(RecognizerBackend):
+    """Recognizes with ``primary`` and races ``secondary`` when it is slow
+
+    The primary gets every phrase first. The secondary is asked too when
+    the primary hasn't answered within its recent ``hedge_percentile``
+    latency, or answered with nothing or with less than ``min_confidence``.
+    The first confident result wins, and the other request is cancelled, or
+    left to finish unread when it is already running. At ``deadline_s`` the
+    best result so far is returned, which may be none.
+
+    Each backend has its own ``max_workers`` threads, so primary requests
+    left running after a stall never hold up the secondary. While all of the
+    primary's threads are busy, the secondary is asked at once.
+    """
+    name = 'hedged'
+
+    def __init__(self, primary, secondary, deadline_s=5.0, min_confidence=0.5, hedge_percentile=95,
+                 initial_delay_s=1.0, min_delay_s=0.2, min_samples=20, max_workers=4):
+        super().__init__()
+        self.name = f'{primary.name}+{secondary.name}'
+        self.primary = primary
+        self.secondary = secondary
+        self.deadline_s = deadline_s
+        self.min_confidence = min_confidence
+        self.hedge_percentile = hedge_percentile
+        self.initial_delay_s = initial_delay_s  # Used until the primary has min_samples latencies
+        self.min_delay_s = min_delay_s
+        self.min_samples = min_samples
+        self.max_workers = max_workers
+        self._pools = {backend: ThreadPoolExecutor(max_workers, thread_name_prefix=f'recognition-{role}')
+                       for backend, role in ((primary, 'primary'), (secondary, 'secondary'))}
+        self._running = {primary: 0, secondary: 0}  # Requests submitted and not finished, per backend
+        self.hedged = 0
+        self.secondary_wins = 0
+        self.cancelled = 0
+        self.abandoned = 0  # Requests already running when they lost, left to finish unread
+        self.deadline_misses = 0
+
+    def _submit(self, backend, audio):
+        with self._lock:
+            self._running[backend] += 1
+        future = self._pools[backend].submit(backend.recognize_result, audio)
+        future.add_done_callback(lambda _: self._finished(backend))
+        return future
+
+    def _finished(self, backend):
+        with self._lock:
+            self._running[backend] -= 1
+
+    def _saturated(self, backend):
+        """Whether a new request to ``backend`` would wait for a free thread"""
+        with self._lock:
+            return self._running[backend] >= self.max_workers
+
+    def hedge_delay(self):
+        """How long the primary gets before the secondary is asked too"""
+        with self.primary._lock:
+            latencies = sorted(self.primary._latencies)
+        if len(latencies) < self.min_samples:
+            delay = self.initial_delay_s
+        else:
+            delay = latencies[min(len(latencies) - 1, int(len(latencies) * self.hedge_percentile / 100))]
+        return min(max(delay, self.min_delay_s), self.deadline_s)
+
+    @staticmethod
+    def _confidence(result):
+        """Confidence of the best alternative; engines that give none count as sure"""
+        if not result:
+            return -1.0
+        confidence = result.alternatives[0].confidence
+        return 1.0 if confidence is None else confidence
+
+    def _recognize(self, audio):
+        start = time.perf_counter()
+        deadline = start + self.deadline_s
+        # Earlier requests that are still running would make this one wait
+        hedge_at = start if self._saturated(self.primary) else start + self.hedge_delay()
+        futures = {self._submit(self.primary, audio): self.primary}
+        hedged = False
+        best, winner = None, None
+
+        while futures and winner is None:
+            wait_until = deadline if hedged else min(hedge_at, deadline)
+            done, _ = wait(futures, timeout=max(0.0, wait_until - time.perf_counter()),
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                backend = futures.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Recognition with {backend.name} failed: {e}")
+                    result = None
+                if self._confidence(result) >= self.min_confidence:
+                    winner = backend, result
+                    break
+                if result and self._confidence(result) > self._confidence(best and best[1]):
+                    best = backend, result
+
+            now = time.perf_counter()
+            if winner is None and now >= deadline:
+                break
+            # A slow, failed or unsure primary: ask the secondary as well
+            if winner is None and not hedged and (now >= hedge_at or not futures):
+                hedged = True
+                futures[self._submit(self.secondary, audio)] = self.secondary
+
+        # Cancelling runs the request's done callback, which takes the lock
+        cancelled = sum(future.cancel() for future in futures)
+        with self._lock:
+            self.hedged += hedged
+            self.deadline_misses += winner is None and bool(futures)
+            self.cancelled += cancelled
+            self.abandoned += len(futures) - cancelled  # Already running, they finish unread
+            answer = winner or best
+            self.secondary_wins += answer is not None and answer[0] is self.secondary
+        return answer[1].alternatives if answer else []
+
+    def stats(self):
+        stats = super().stats()
+        with self._lock:
+            stats.update({
+                'hedged': self.hedged,
+                'secondary_wins': self.secondary_wins,
+                'cancelled': self.cancelled,
+                'abandoned': self.abandoned,
+                'deadline_misses': self.deadline_misses,
+            })
+        stats['hedge_delay_ms'] = self.hedge_delay() * 1000
+        stats['primary'] = self.primary.stats()
+        stats['secondary'] = self.secondary.stats()
+        return stats
+
+
+BACKENDS = {
+    'google': GoogleBackend,
+    'sphinx': SphinxBackend,
+    'vosk': VoskBackend,
+    'fake': FakeBackend,
+}
+
+
+def create_backend(name, recognizer=None, language='en-US', vosk_model_path=None):
+    """Create the backend called ``name`` with the options it takes"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown recognition backend '{name}', expected one of {tuple(BACKENDS)}")
+    if name in ('google', 'sphinx'):
+        return BACKENDS[name](recognizer, language)
+    if name == 'vosk':
+        return VoskBackend(vosk_model_path)
+    return FakeBackend()
@@ -0,0 +1,283 @@
+"""Speech output on a dedicated thread.
+
+``AudioManager.speak`` used to call ``engine.say`` and ``runAndWait`` on the
+caller's thread, usually the listen pipeline's executor, so nothing else ran
+until the utterance was over and a long answer could not be stopped.
+``SpeechQueue`` owns the text-to-speech engine instead. A worker thread
+initializes COM, creates the engine there (SAPI is bound to the thread that
+created it) and speaks utterances from a priority queue, and ``say`` returns
+at once:
+
+    speech = SpeechQueue(pyttsx3.init).start()
+    speech.say("Volume's going up")
+    speech.say("Wake up! Alarm_1 is ringing!", PRIORITY_ALARM)
+
+Lower priorities are spoken first, and utterances of the same priority are
+spoken in the order they were queued. An utterance preempts the one being
+spoken when its priority is lower; the interrupted one is queued again and
+continues from the word it was cut at. It is the same ``Utterance``, so
+``wait()`` returns only once all of it was said. ``barge_in`` stops the current utterance and drops
+the queued ones when the user starts a new command, and ``cancel`` drops
+queued utterances without touching the current one. Alarms are not
+interrupted by barge-in.
+
+The engine is stopped from its own ``started-word`` callback, the one place
+pyttsx3 lets it be stopped, so an interrupted utterance ends at the next word.
+Every utterance carries the correlation ID of the command that queued it
+(see ``telemetry.py``); the time it waited is recorded as ``tts_wait`` and
+its playback is timed as a ``tts`` span.
+
+With a ``PhraseCache`` (see ``phrase_cache.py``), responses that were
+rendered to audio are played from it instead of being synthesized, and the
+worker renders waiting phrases whenever the queue is empty.
+"""
+import heapq
+import itertools
+import threading
+import time
+
+from telemetry import tracer
+
+# Lower numbers are spoken first
+PRIORITY_ALARM = 0
+PRIORITY_RESPONSE = 1
+
+
+class Utterance:
+    __slots__ = ('text', 'priority', 'seq', 'trace_id', 'queued_at', 'started_at', 'first_audio_at',
+                 'resume_at', 'spoken_chars', 'state', 'done')
+
+    def __init__(self, text, priority, seq, trace_id=None):
+        self.text = text
+        self.priority = priority
+        self.seq = seq
+        self.trace_id = trace_id
+        self.queued_at = time.perf_counter()
+        self.started_at = None
+        self.first_audio_at = None  # When the engine reported the first word
+        self.resume_at = 0  # Offset the text is spoken from; past 0 after being preempted
+        self.spoken_chars = 0  # Offset of the word being spoken
+        # queued, speaking, preempted (queued to continue), done, interrupted or cancelled
+        self.state = 'queued'
+        self.done = threading.Event()
+
+    @property
+    def remaining(self):
+        """The text still to be spoken"""
+        return self.text[self.resume_at:]
+
+    def wait(self, timeout=None):
+        """Wait until the utterance was spoken, interrupted or cancelled"""
+        return self.done.wait(timeout)
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class SpeechQueue:
+    def __init__(self, engine_factory, on_start=None, on_finish=None, on_word=None, cache=None):
+        self.engine_factory = engine_factory  # Called on the worker thread
+        self.on_start = on_start  # on_start(utterance)
+        self.on_finish = on_finish  # on_finish(utterance) whenever it stops; state 'preempted' if it continues later
+        self.on_word = on_word  # on_word(word)
+        self.cache = cache
+        self._player = None
+        self.current = None
+        self._queue = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._interrupt = None  # State given to the current utterance when it is stopped
+        self._closed = False
+        self._thread = None
+
+        self.spoken = 0
+        self.interrupted = 0
+        self.preempted = 0
+        self.cancelled = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='speech', daemon=True)
+        self._thread.start()
+        return self
+
+    def say(self, text, priority=PRIORITY_RESPONSE):
+        """Queue ``text`` and return its ``Utterance`` without waiting for it"""
+        utterance = Utterance(text, priority, next(self._seq), tracer.current_trace())
+        with self._cond:
+            if self._closed:
+                utterance.state = 'cancelled'
+                utterance.done.set()
+                return utterance
+            heapq.heappush(self._queue, utterance)
+            if self.current is not None and priority < self.current.priority:
+                self._interrupt = 'preempted'
+            self._cond.notify()
+        return utterance
+
+    def cancel(self, priority=PRIORITY_RESPONSE):
+        """Drop queued utterances of ``priority`` or above; returns how many"""
+        with self._cond:
+            kept = [utterance for utterance in self._queue if utterance.priority < priority]
+            dropped = [utterance for utterance in self._queue if utterance.priority >= priority]
+            self._queue = kept
+            heapq.heapify(self._queue)
+            self.cancelled += len(dropped)
+        for utterance in dropped:
+            utterance.state = 'cancelled'
+            utterance.done.set()
+        return len(dropped)
+
+    def barge_in(self, priority=PRIORITY_RESPONSE):
+        """Stop the current utterance and drop queued ones of ``priority`` or above
+
+        Returns whether anything was being spoken or waiting to be.
+        """
+        with self._cond:
+            speaking = self.current is not None and self.current.priority >= priority
+            if speaking:
+                self._interrupt = 'interrupted'
+        return self.cancel(priority) > 0 or speaking
+
+    @property
+    def busy(self):
+        return self.current is not None or bool(self._queue)
+
+    def stats(self):
+        return {'spoken': self.spoken, 'interrupted': self.interrupted, 'preempted': self.preempted,
+                'cancelled': self.cancelled, 'queued': len(self._queue)}
+
+    def close(self, timeout=1.0):
+        """Drop queued speech, stop the current utterance and end the worker"""
+        with self._cond:
+            self._closed = True
+            self._interrupt = 'interrupted'
+            self._cond.notify()
+        self.cancel(PRIORITY_ALARM)
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def _next(self, engine):
+        while True:
+            with self._cond:
+                if self._closed:
+                    return None
+                if self._queue:
+                    utterance = heapq.heappop(self._queue)
+                    self.current = utterance
+                    self._interrupt = None
+                    return utterance
+                if not (self.cache and self.cache.pending()):
+                    self._cond.wait()
+                    continue
+            # Nothing to say: render a phrase for later
+            try:
+                self.cache.render_next(engine)
+            except Exception as e:
+                print(f"Error rendering speech: {e}")
+
+    def _run(self):
+        # SAPI is a COM server, and COM must be initialized on every thread that uses it
+        try:
+            import pythoncom
+        except ImportError:
+            pythoncom = None  # Not on Windows; the other drivers need no setup
+        if pythoncom:
+            pythoncom.CoInitialize()
+        try:
+            self._serve()
+        finally:
+            if pythoncom:
+                pythoncom.CoUninitialize()
+
+    def _serve(self):
+        try:
+            engine = self.engine_factory()
+        except Exception as e:
+            print(f"Error initializing speech engine: {e}")
+            self.close(timeout=0)
+            return
+        engine.connect('started-word', lambda name, location, length: self._on_engine_word(engine, location, length))
+        if self.cache:
+            try:
+                from phrase_cache import AudioPlayer
+                self._player = AudioPlayer()
+                self.cache.use_engine(engine)
+            except Exception as e:
+                print(f"Cached speech disabled, no audio output for it: {e}")
+                self.cache = None
+        while True:
+            utterance = self._next(engine)
+            if utterance is None:
+                break
+            try:
+                self._speak(engine, utterance)
+            except Exception as e:
+                print(f"Error speaking: {e}")
+                utterance.state = 'interrupted'
+            finally:
+                self._finish(utterance)
+
+    def _speak(self, engine, utterance):
+        resumed = utterance.state == 'preempted'
+        utterance.state = 'speaking'
+        if not resumed:
+            utterance.started_at = time.perf_counter()
+        text = utterance.remaining
+        with tracer.activate(utterance.trace_id):
+            if not resumed:
+                tracer.record('tts_wait', utterance.started_at - utterance.queued_at)
+            if self.on_start:
+                self.on_start(utterance)
+            phrase = self.cache.get(text) if self.cache else None
+            with tracer.span('tts', chars=len(text), priority=utterance.priority, cached=phrase is not None,
+                             resumed=resumed) as span:
+                if phrase is not None:
+                    self._player.play(phrase, lambda: self._interrupt is not None,
+                                      lambda: self._first_audio(utterance))
+                else:
+                    engine.say(text)
+                    engine.runAndWait()
+                span.set(state=self._interrupt or 'done')
+
+    @staticmethod
+    def _first_audio(utterance):
+        if utterance.first_audio_at is None:
+            utterance.first_audio_at = time.perf_counter()
+
+    def _on_engine_word(self, engine, location, length):
+        utterance = self.current
+        if utterance is None:
+            return
+        self._first_audio(utterance)
+        # The engine counts from where this part of the text started
+        utterance.spoken_chars = utterance.resume_at + location
+        if self._interrupt:
+            engine.stop()  # Before this word is heard, so a preempted utterance resumes with it
+            return
+        if self.on_word:
+            self.on_word(utterance.text[utterance.spoken_chars:utterance.spoken_chars + length])
+
+    def _finish(self, utterance):
+        with self._cond:
+            self.current = None
+            state, self._interrupt = self._interrupt, None
+            if state == 'preempted' and self._closed:
+                state = 'interrupted'
+            elif state == 'preempted' and not utterance.text[utterance.spoken_chars:].strip():
+                state = None  # Preempted after its last word
+            resume = state == 'preempted' and utterance.state == 'speaking'
+            if resume:
+                # Continue from the word that was cut off once the more urgent speech is over
+                utterance.resume_at = utterance.spoken_chars
+                heapq.heappush(self._queue, utterance)
+                self.preempted += 1
+            elif state:
+                self.interrupted += 1
+            else:
+                self.spoken += 1
+            if utterance.state == 'speaking':
+                utterance.state = 'preempted' if resume else state or 'done'
+        if self.on_finish:
+            self.on_finish(utterance)
+        if not resume:
+            utterance.done.set()
@@ -0,0 +1,82 @@
+"""Persisted WordNet synonym index for intent scoring.
+
+The synonyms of every keyword in the command pattern table are collected once
+and pickled next to a version hash of the table. At startup the index is
+loaded from disk, so scoring an utterance only needs dictionary lookups. The
+index is rebuilt whenever the pattern table changes.
+"""
+import hashlib
+import json
+import os
+import pickle
+
+INDEX_FORMAT = 1
+
+
+def pattern_table_version(command_patterns):
+    """Hash the patterns, keywords and synonyms of the command table"""
+    table = {
+        cmd_type: {key: cmd_info[key] for key in ('patterns', 'keywords', 'synonyms') if key in cmd_info}
+        for cmd_type, cmd_info in command_patterns.items()
+    }
+    return hashlib.sha1(json.dumps(table, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def ensure_wordnet():
+    """Download the WordNet corpus if NLTK can't find it"""
+    import nltk
+
+    try:
+        nltk.data.find('corpora/wordnet')
+    except LookupError:
+        nltk.download('wordnet', quiet=True)
+
+
+def build_synonym_index(command_patterns):
+    """Walk WordNet once for every keyword in the table"""
+    ensure_wordnet()
+    from nltk.corpus import wordnet
+
+    index = {}
+    for cmd_info in command_patterns.values():
+        for keyword in cmd_info.get('keywords', []):
+            if keyword in index:
+                continue
+            synonyms = set()
+            for syn in wordnet.synsets(keyword):
+                for lemma in syn.lemmas():
+                    synonyms.add(lemma.name().lower())
+            index[keyword] = frozenset(synonyms)
+    return index
+
+
+def save_synonym_index(index, version, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({'format': INDEX_FORMAT, 'version': version, 'synonyms': index}, f,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def load_synonym_index(command_patterns, path):
+    """Load the index from ``path``, rebuilding it if it is missing or stale"""
+    version = pattern_table_version(command_patterns)
+
+    try:
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        if data.get('format') == INDEX_FORMAT and data.get('version') == version:
+            return data['synonyms']
+        print("Command patterns changed, rebuilding synonym index...")
+    except FileNotFoundError:
+        print("Building synonym index...")
+    except Exception as e:
+        print(f"Synonym index unreadable, rebuilding: {e}")
+
+    index = build_synonym_index(command_patterns)
+    try:
+        save_synonym_index(index, version, path)
+    except OSError as e:
+        print(f"Could not save synonym index: {e}")
+    return index
@@ -0,0 +1,278 @@
+"""Per-stage latency spans for the voice command pipeline.
+
+Only ``print`` calls used to show where a command spent its time. Now every
+stage it passes through (capture, VAD, recognition, routing, the handler,
+web search, speech output) is timed with a span:
+
+    from telemetry import tracer
+
+    with tracer.span('web_search', query=query):
+        ...
+
+Each captured phrase gets a correlation ID when capture starts. The listen
+pipeline carries it from the capture thread to the recognition worker and
+the executor, and makes it current on each of those threads, so every span
+of one command has the same ``trace``. Spans outside a command, like an
+alarm being spoken, have none.
+
+Per stage the tracer keeps a cumulative histogram with fixed buckets, plus
+the most recent ``window`` durations for rolling p50/p95/p99. Finishing a
+span only appends it to a queue; the histograms catch up when they are read
+or exported. A span that raises counts as an error of its stage instead of
+a duration, unless the exception is listed in ``ignore`` (a listen timeout
+is not a failed capture).
+Every ``export_interval_s`` a background thread appends the finished spans
+to a JSONL file, one line per span, and rewrites a Prometheus text file:
+
+    {"trace": "6512ab3f-17", "stage": "route", "start": 1791000000.125,
+     "duration_ms": 0.41, "error": null, "attrs": {"intent": "timer"}}
+
+A span costs one or two microseconds, against milliseconds to seconds for
+the stages it times (``python -m benchmarks.telemetry_bench``). When the tracer
+is disabled, ``span()`` returns a shared no-op span.
+"""
+import itertools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+
+# Upper bounds of the histogram buckets in seconds
+BUCKETS_S = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUANTILES = (50, 95, 99)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class StageHistogram:
+    def __init__(self, window=1000):
+        self.count = 0
+        self.errors = 0
+        self.sum_s = 0.0
+        self.buckets = [0] * (len(BUCKETS_S) + 1)  # The last one is +Inf
+        self.recent = deque(maxlen=window)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.sum_s += seconds
+        self.buckets[bisect_left(BUCKETS_S, seconds)] += 1
+        self.recent.append(seconds)
+
+    def stats(self):
+        recent_ms = sorted(seconds * 1000 for seconds in self.recent)
+        stats = {'count': self.count, 'errors': self.errors,
+                 'mean_ms': self.sum_s / self.count * 1000 if self.count else 0.0}
+        for pct in QUANTILES:
+            stats[f'p{pct}_ms'] = percentile(recent_ms, pct)
+        return stats
+
+
+class Span:
+    __slots__ = ('tracer', 'stage', 'trace_id', 'attrs', 'ignore', 'start')
+
+    def __init__(self, tracer, stage, trace_id, attrs, ignore):
+        self.tracer = tracer
+        self.stage = stage
+        self.trace_id = trace_id
+        self.attrs = attrs
+        self.ignore = ignore
+        self.start = 0.0
+
+    def set(self, **attrs):
+        """Add attributes known only once the stage ran, like the intent of a command"""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = time.perf_counter()
+        if exc_type is None or not issubclass(exc_type, self.ignore):
+            self.tracer._finished.append((self.trace_id, self.stage, self.start, end - self.start,
+                                          exc_type, self.attrs))
+            if len(self.tracer._finished) > self.tracer.MAX_QUEUED:
+                self.tracer._drain()
+        return False
+
+
+class _NullSpan:
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    MAX_SPANS_FILE_BYTES = 10 * 1024 * 1024  # The JSONL file is rotated to .1 past this size
+    MAX_QUEUED = 10000  # Finished spans are folded into the histograms at the latest after this many
+
+    def __init__(self, enabled=False, spans_path=None, metrics_path=None, window=1000, export_interval_s=10.0):
+        self.enabled = enabled
+        self.spans_path = spans_path
+        self.metrics_path = metrics_path
+        self.window = window
+        self.export_interval_s = export_interval_s
+        self.stages = {}
+        self._finished = deque()  # Spans not yet in the histograms; appends need no lock
+        self._pending = []  # Spans in the histograms but not yet written to spans_path
+        self._lock = threading.Lock()
+        self._wall_offset = time.time() - time.perf_counter()
+        self._local = threading.local()
+        self._ids = itertools.count(1)
+        self._id_prefix = f"{int(time.time()) & 0xffffffff:08x}"  # Keeps IDs unique across restarts
+        self._exporter = None
+        self._stop_export = threading.Event()
+
+    def configure(self, enabled=True, spans_path=None, metrics_path=None, export_interval_s=10.0):
+        """Turn tracing on or off and start exporting to the given files"""
+        self.enabled = enabled
+        self.spans_path = spans_path
+        self.metrics_path = metrics_path
+        self.export_interval_s = export_interval_s
+        if enabled and (spans_path or metrics_path) and self._exporter is None:
+            self._stop_export.clear()
+            self._exporter = threading.Thread(target=self._export_loop, daemon=True)
+            self._exporter.start()
+
+    def new_trace(self):
+        """A new correlation ID, or None while disabled"""
+        if not self.enabled:
+            return None
+        return f"{self._id_prefix}-{next(self._ids)}"
+
+    def current_trace(self):
+        return getattr(self._local, 'trace_id', None)
+
+    @contextmanager
+    def activate(self, trace_id):
+        """Make ``trace_id`` the correlation ID of spans on this thread"""
+        previous = getattr(self._local, 'trace_id', None)
+        self._local.trace_id = trace_id
+        try:
+            yield trace_id
+        finally:
+            self._local.trace_id = previous
+
+    def span(self, stage, ignore=(), **attrs):
+        """Time the ``with`` block as one run of ``stage``"""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, stage, getattr(self._local, 'trace_id', None), attrs, ignore)
+
+    def record(self, stage, seconds, **attrs):
+        """Add a duration that was measured elsewhere"""
+        if self.enabled:
+            self._finished.append((getattr(self._local, 'trace_id', None), stage, time.perf_counter() - seconds,
+                                   seconds, None, attrs))
+
+    def _drain(self):
+        """Fold the finished spans into the histograms"""
+        with self._lock:
+            while True:
+                try:
+                    span = self._finished.popleft()
+                except IndexError:
+                    break
+                trace_id, stage, start, seconds, exc_type, attrs = span
+                histogram = self.stages.get(stage)
+                if histogram is None:
+                    histogram = self.stages[stage] = StageHistogram(self.window)
+                if exc_type is None:
+                    histogram.observe(seconds)
+                else:
+                    histogram.errors += 1
+                if self.spans_path:
+                    self._pending.append(span)
+
+    def stats(self):
+        """Count, errors, mean and rolling p50/p95/p99 in milliseconds per stage"""
+        self._drain()
+        with self._lock:
+            return {stage: histogram.stats() for stage, histogram in self.stages.items()}
+
+    def prometheus_text(self):
+        """All stages in the Prometheus text exposition format"""
+        self._drain()
+        with self._lock:
+            stages = {stage: (list(histogram.buckets), histogram.count, histogram.sum_s, histogram.errors,
+                              sorted(histogram.recent))
+                      for stage, histogram in sorted(self.stages.items())}
+        lines = ['# HELP assistant_stage_seconds Time spent in each stage of the voice command pipeline',
+                 '# TYPE assistant_stage_seconds histogram']
+        for stage, (buckets, count, sum_s, _, _) in stages.items():
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS_S + ('+Inf',), buckets):
+                cumulative += bucket
+                lines.append(f'assistant_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'assistant_stage_seconds_sum{{stage="{stage}"}} {sum_s:.6f}')
+            lines.append(f'assistant_stage_seconds_count{{stage="{stage}"}} {count}')
+        lines += ['# HELP assistant_stage_recent_seconds Rolling quantiles over the most recent runs of each stage',
+                  '# TYPE assistant_stage_recent_seconds gauge']
+        for stage, (_, _, _, _, recent) in stages.items():
+            for pct in QUANTILES:
+                lines.append(f'assistant_stage_recent_seconds{{stage="{stage}",quantile="{pct / 100}"}} '
+                             f'{percentile(recent, pct):.6f}')
+        lines += ['# HELP assistant_stage_errors_total Runs of each stage that raised',
+                  '# TYPE assistant_stage_errors_total counter']
+        for stage, (_, _, _, errors, _) in stages.items():
+            lines.append(f'assistant_stage_errors_total{{stage="{stage}"}} {errors}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self):
+        """Append finished spans to ``spans_path`` and rewrite ``metrics_path``"""
+        self._drain()
+        with self._lock:
+            pending, self._pending = self._pending, []
+        try:
+            if self.spans_path and pending:
+                os.makedirs(os.path.dirname(self.spans_path), exist_ok=True)
+                if os.path.exists(self.spans_path) and os.path.getsize(self.spans_path) > self.MAX_SPANS_FILE_BYTES:
+                    os.replace(self.spans_path, self.spans_path + '.1')
+                with open(self.spans_path, 'a', encoding='utf-8') as f:
+                    for trace_id, stage, start, seconds, exc_type, attrs in pending:
+                        f.write(json.dumps({'trace': trace_id, 'stage': stage,
+                                            'start': round(start + self._wall_offset, 6),
+                                            'duration_ms': round(seconds * 1000, 3),
+                                            'error': exc_type.__name__ if exc_type else None,
+                                            'attrs': attrs}, default=str) + '\n')
+            if self.metrics_path:
+                os.makedirs(os.path.dirname(self.metrics_path), exist_ok=True)
+                tmp_path = self.metrics_path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(self.prometheus_text())
+                os.replace(tmp_path, self.metrics_path)
+        except OSError as e:
+            print(f"Could not export latency metrics: {e}")
+
+    def _export_loop(self):
+        while not self._stop_export.wait(self.export_interval_s):
+            self.export()
+
+    def close(self):
+        """Stop the exporter after a last export"""
+        self._stop_export.set()
+        if self._exporter:
+            self._exporter.join(timeout=1.0)
+            self._exporter = None
+        self.export()
+
+
+# Shared tracer; main.py configures it from config.py
+tracer = Tracer()
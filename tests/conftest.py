@@ -0,0 +1,30 @@
+import pytest
+
+from command_patterns import COMMAND_PATTERNS
+from intent_engine import IntentClassifier, KeywordScorer
+
+
+class TableLemmas:
+    """Lemmatizes with a fixed table and leaves other words as they are, without WordNet"""
+
+    def __init__(self, lemmas=None):
+        self.lemmas = lemmas or {}
+
+    def lemmatize(self, word):
+        return self.lemmas.get(word, word)
+
+
+def offline_classifier(command_patterns=COMMAND_PATTERNS, lemmas=None):
+    """An IntentClassifier using the keyword engine with no WordNet synonyms, so NLTK isn't needed"""
+    classifier = IntentClassifier(command_patterns, synonym_index_path=None, cache_size=0)
+    keywords = {keyword for info in command_patterns.values() for keyword in info.get('keywords', [])}
+    classifier.synonym_index = {keyword: [] for keyword in keywords}
+    classifier.lemmatizer = TableLemmas(lemmas)
+    classifier.scorer = KeywordScorer(command_patterns, classifier.synonym_index)
+    classifier._nlp_ready = True
+    return classifier
+
+
+@pytest.fixture
+def classifier():
+    return offline_classifier()
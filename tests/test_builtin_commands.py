@@ -0,0 +1,16 @@
+import pytest
+
+from builtin_commands import clock_time_arg
+
+
+@pytest.mark.parametrize('command, expected', [
+    ("Set an alarm for 7 a.m. please", "7:00 AM"),
+    ("wake me up at 6:45 p.m.", "6:45 PM"),
+    ("set an alarm for 7:30pm", "7:30 PM"),
+    ("set an alarm for 15:45", "15:45"),
+    ("set an alarm for tomorrow", "tomorrow"),
+])
+def test_alarm_time_keeps_the_meridiem(classifier, command, expected):
+    route = classifier.route(command)
+    assert route.intent == 'alarm'
+    assert clock_time_arg(command, route.args) == (expected,)
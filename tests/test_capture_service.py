@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from capture_service import AudioRingBuffer, Cursor
+
+
+def samples(start, end):
+    return np.arange(start, end, dtype=np.int16)
+
+
+def test_write_across_the_wrap_point_reads_back_contiguous_views():
+    ring = AudioRingBuffer(8)
+    cursor = Cursor(ring, 'test')
+    ring.write(samples(0, 6))
+    assert cursor.read(6).tolist() == list(range(6))
+
+    ring.write(samples(6, 11))  # Positions 8-10 wrap round to the start
+    view = cursor.read(5)
+    assert view.tolist() == list(range(6, 11))
+    assert view.base is ring._buffer  # A view, not a copy
+    assert ring.view(3, 11).tolist() == list(range(3, 11))  # A full window across the wrap point
+
+
+def test_write_larger_than_the_capacity_keeps_the_newest_samples():
+    ring = AudioRingBuffer(8)
+    ring.write(samples(0, 3))
+    ring.write(samples(3, 23))
+    assert ring.head == 23 and ring.oldest() == 15
+    assert ring.view(15, 23).tolist() == list(range(15, 23))
+    with pytest.raises(IndexError):
+        ring.view(14, 16)
+
+
+def test_a_cursor_that_falls_behind_skips_to_the_oldest_sample_and_counts_the_overrun():
+    ring = AudioRingBuffer(8)
+    cursor = Cursor(ring, 'slow')
+    ring.write(samples(0, 4))
+    assert cursor.read(2).tolist() == [0, 1]
+
+    ring.write(samples(4, 14))  # 2-5 are overwritten before the cursor gets to them
+    assert cursor.read(3).tolist() == [6, 7, 8]
+    assert (cursor.overruns, cursor.skipped) == (1, 4)
+    assert cursor.stats()['lag'] == 5
+
+
+def test_read_after_close_returns_what_is_left():
+    ring = AudioRingBuffer(8)
+    cursor = Cursor(ring, 'test')
+    ring.write(samples(0, 3))
+    ring.close()
+    assert cursor.read(5).tolist() == [0, 1, 2]
+    assert len(cursor.read(5)) == 0
+
+
+def test_read_times_out_while_the_service_runs():
+    ring = AudioRingBuffer(8)
+    cursor = Cursor(ring, 'test')
+    ring.write(samples(0, 2))
+    with pytest.raises(TimeoutError):
+        cursor.read(4, timeout=0.01)
+    assert cursor.position == 0
@@ -0,0 +1,30 @@
+from command_patterns import COMMAND_PATTERNS
+from command_registry import CommandRegistry
+
+from conftest import offline_classifier
+
+
+class Assistant:
+    def __init__(self, registry):
+        self.intent_classifier = offline_classifier(registry.command_patterns())
+        self.handled = []
+
+
+def test_process_routes_and_runs_the_handler():
+    registry = CommandRegistry(COMMAND_PATTERNS)
+    registry.register('volume', handler=lambda assistant, command, args: assistant.handled.append((command, args)))
+    assistant = Assistant(registry)
+
+    route = registry.process(assistant, "set the volume to 40 percent")
+
+    assert route.intent == 'volume'
+    assert assistant.handled == [("set the volume to 40 percent", route.args)]
+
+
+def test_process_sends_unknown_commands_to_the_fallback():
+    registry = CommandRegistry(COMMAND_PATTERNS)
+    registry.fallback(lambda assistant, command, args: assistant.handled.append(command))
+    assistant = Assistant(registry)
+
+    assert registry.process(assistant, "xyzzy").intent is None
+    assert assistant.handled == ["xyzzy"]
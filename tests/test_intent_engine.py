@@ -0,0 +1,58 @@
+from conftest import offline_classifier
+from intent_engine import IntentCache, normalize_utterance
+
+
+def test_sub_threshold_match_is_no_command(classifier):
+    # "volume" alone matches one volume keyword, well below THRESHOLD
+    assert 0 < classifier._cached_decision("volume").confidence <= classifier.THRESHOLD
+
+    assert classifier.classify_batch(["volume"]) == [(None, 0)]
+    assert classifier.identify_command_type("volume") == (None, 0)
+    assert classifier.route("volume").intent is None
+    assert classifier.route_without_context("volume").intent is None
+
+
+def test_batch_matches_single_classification(classifier):
+    texts = ["volume", "news today", "make it louder", "what's the time", "open notepad", "xyzzy"]
+    single = []
+    for text in texts:
+        classifier.previous_command_type = None
+        single.append(classifier.identify_command_type(text))
+    assert classifier.classify_batch(texts) == single
+
+
+def test_route_with_and_without_context_agree(classifier):
+    for text in ["volume", "news today", "make it louder", "open notepad", "close chrome", "xyzzy"]:
+        classifier.previous_command_type = None
+        assert classifier.route(text) == classifier.route_without_context(text)
+
+
+# Two command types that score the same for anything without "light" or "fan"
+DEVICES = {
+    'lights': {'patterns': [r'^lights? (on|off)$'], 'keywords': ['light', 'on', 'off', 'switch', 'power']},
+    'fan': {'patterns': [r'^fan (on|off)$'], 'keywords': ['fan', 'on', 'off', 'switch', 'power']},
+}
+
+
+def test_context_bonus_is_applied_after_the_cache():
+    classifier = offline_classifier(DEVICES)
+    classifier.cache = IntentCache(16)
+
+    routes = []
+    for previous in (None, 'lights', 'fan'):
+        classifier.previous_command_type = previous
+        routes.append(classifier.route("switch the power on").intent)
+
+    # One cached decision, routed by whichever command came before it
+    assert routes == [None, 'lights', 'fan']
+    assert classifier.cache.stats()['misses'] == 1 and classifier.cache.stats()['hits'] == 2
+
+
+def test_cache_is_keyed_by_the_normalized_utterance():
+    classifier = offline_classifier(DEVICES)
+    classifier.cache = IntentCache(16)
+    for text in ["Switch the power on!", "switch  the power ON", "switch the power on"]:
+        classifier.route_without_context(text)
+
+    assert list(classifier.cache._entries) == [normalize_utterance("Switch the power on!")] == ["switch the power on"]
+    assert classifier.cache.stats()['hits'] == 2
@@ -0,0 +1,44 @@
+import random
+import re
+
+import intent_engine
+import intent_model
+from command_patterns import COMMAND_PATTERNS
+from conftest import TableLemmas
+from intent_engine import IntentClassifier
+from intent_model import IntentModel, sample_pattern, table_training_data, train_intent_model
+
+
+def test_samples_match_their_pattern():
+    rng = random.Random(0)
+    for pattern in [r'(?:set|start).*timer.*for\s+(\d+)\s*(?:minutes?|hours?)', r'[a-c]{2,3}x\b', r'(?:hi|hello)$']:
+        for _ in range(20):
+            assert re.search(pattern, sample_pattern(pattern, rng))
+
+
+def test_model_trains_on_the_text_the_classifier_scores(classifier, monkeypatch):
+    classifier.lemmatizer.lemmas.update({'timers': 'timer', 'minutes': 'minute', 'alarms': 'alarm'})
+    corpus = [('weather', "What's the weather like?"), ('list_timers', "Show me my timers, please")]
+    trained = []
+    monkeypatch.setattr(IntentModel, 'train', classmethod(lambda cls, examples, *args, **kwargs: trained.extend(examples)))
+
+    train_intent_model(COMMAND_PATTERNS, classifier.synonym_index, corpus, preprocess=classifier.scoring_text)
+
+    raw = table_training_data(COMMAND_PATTERNS, classifier.synonym_index, random.Random(0)) + corpus
+    expected = [(intent, classifier.scoring_text(text)) for intent, text in raw]
+    assert trained == [(intent, text) for intent, text in expected if text]
+    assert ('weather', "what 's the weather like") in trained
+
+
+def test_classifier_trains_its_model_on_its_scoring_text(monkeypatch):
+    preprocessors = []
+    monkeypatch.setattr(intent_engine, 'load_synonym_index', lambda *args: {})
+    monkeypatch.setattr(intent_engine, 'load_lemma_table', lambda *args: TableLemmas({'timers': 'timer'}))
+    monkeypatch.setattr(intent_model, 'load_intent_model',
+                        lambda patterns, index, path, preprocess=None: preprocessors.append(preprocess) or 'model')
+
+    classifier = IntentClassifier(COMMAND_PATTERNS, None, engine='model', cache_size=0)
+    classifier.warm_up()
+
+    assert classifier.scorer == 'model'
+    assert preprocessors[0]("List my Timers!") == classifier.scoring_text("List my Timers!") == "list my timer"
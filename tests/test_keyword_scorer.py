@@ -0,0 +1,56 @@
+import pytest
+
+from command_patterns import COMMAND_PATTERNS
+from intent_engine import KeywordScorer
+
+
+def substring_scores(command_patterns, synonym_index, text):
+    """The scoring KeywordScorer replaced: one ``phrase in text`` test per phrase"""
+    scores = {}
+    for cmd_type, cmd_info in command_patterns.items():
+        score = 0
+        keywords = cmd_info.get('keywords', [])
+        keyword_matches = sum(1 for keyword in keywords if keyword in text)
+        if keyword_matches > 0:
+            score += 0.4 * (keyword_matches / len(keywords))
+        for keyword in keywords:
+            keyword_synonyms = synonym_index[keyword]
+            synonym_matches = sum(1 for syn in keyword_synonyms if syn in text)
+            if synonym_matches > 0:
+                score += 0.3 * (synonym_matches / len(keyword_synonyms))
+        for syn_values in cmd_info.get('synonyms', {}).values():
+            syn_matches = sum(1 for syn in syn_values if syn in text)
+            if syn_matches > 0:
+                score += 0.3 * (syn_matches / len(syn_values))
+        scores[cmd_type] = score
+    return scores
+
+
+# Overlapping phrases ("time" in "timer", "level" in "sound level"), phrases listed twice in one
+# group, and phrases shared by several groups and command types ("alarm", "clock", "power off")
+SYNONYM_INDEX = {keyword: [] for info in COMMAND_PATTERNS.values() for keyword in info.get('keywords', [])}
+SYNONYM_INDEX.update({
+    'sound': ['sound level', 'level', 'loudness', 'loudness'],
+    'time': ['time', 'timer', 'clock time', 'clock'],
+    'clock': ['alarm clock', 'clock'],
+    'power': ['power off', 'off', 'switch', 'switch'],
+    'alarm': ['alarm', 'alarm clock', 'wake'],
+})
+
+
+@pytest.mark.parametrize('text', [
+    "set the alarm clock timer for clock time",
+    "sound level loudness loudness at level 3",
+    "power off power off and switch off",
+    "timetimer",
+    "what's the weather like today",
+    "",
+])
+def test_scanner_scores_match_substring_counting(text):
+    scorer = KeywordScorer(COMMAND_PATTERNS, SYNONYM_INDEX)
+    expected = substring_scores(COMMAND_PATTERNS, SYNONYM_INDEX, text)
+
+    # Terms are added in the same order, so the scores are identical, not just close
+    assert scorer.score(text) == expected
+    assert list(scorer.score(text)) == list(expected)
+    assert scorer.score_batch([text])[0].tolist() == list(expected.values())
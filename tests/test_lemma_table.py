@@ -0,0 +1,36 @@
+import pytest
+
+from intent_engine import normalize_utterance
+from lemma_table import tokenize
+
+
+# What nltk.word_tokenize gives for the same normalized text
+@pytest.mark.parametrize('text, tokens', [
+    ("what's up", ['what', "'s", 'up']),
+    ("how're you", ['how', "'re", 'you']),
+    ("i'm i'd we'll they've", ['i', "'m", 'i', "'d", 'we', "'ll", 'they', "'ve"]),
+    ("don't can't won't", ['do', "n't", 'ca', "n't", 'wo', "n't"]),
+    ("john's car", ['john', "'s", 'car']),
+    ("the kids' toys", ['the', 'kids', "'", 'toys']),
+    ("'a pin", ["'", 'a', 'pin']),
+    ("'hello there", ["'hello", 'there']),
+    ("o'clock", ["o'clock"]),
+    ("cannot", ['can', 'not']),
+    ("gonna wanna go gimme that lemme see", ['gon', 'na', 'wan', 'na', 'go', 'gim', 'me', 'that', 'lem', 'me', 'see']),
+    ("'tis late", ["'t", 'is', 'late']),
+    ("wake me at 7:30", ['wake', 'me', 'at', '7:30']),
+    ("red, green", ['red', ',', 'green']),
+    ("set a timer for 5 minutes", ['set', 'a', 'timer', 'for', '5', 'minutes']),
+    ("", []),
+])
+def test_tokenize_splits_like_word_tokenize(text, tokens):
+    assert tokenize(text) == tokens
+
+
+@pytest.mark.parametrize('utterance, tokens', [
+    ("What's the weather?", ['what', "'s", 'the', 'weather']),
+    ("How're you doing today?", ['how', "'re", 'you', 'doing', 'today']),
+    ("Set an alarm for 7:30, please.", ['set', 'an', 'alarm', 'for', '7:30', 'please']),
+])
+def test_normalized_utterances(utterance, tokens):
+    assert tokenize(normalize_utterance(utterance)) == tokens
@@ -0,0 +1,145 @@
+import threading
+import time
+
+import pytest
+
+from listen_pipeline import BoundedQueue, ListenPipeline
+
+
+def test_drop_newest_keeps_the_waiting_items():
+    queue = BoundedQueue(2, 'drop_newest')
+    assert queue.put(1) is None and queue.put(2) is None
+    assert queue.put(3) == 3
+    assert [queue.get(), queue.get()] == [1, 2]
+    assert queue.stats()['dropped'] == 1
+
+
+def test_drop_oldest_makes_room_for_the_new_item():
+    queue = BoundedQueue(2, 'drop_oldest')
+    queue.put(1)
+    queue.put(2)
+    assert queue.put(3) == 1
+    assert [queue.get(), queue.get()] == [2, 3]
+    assert queue.stats()['dropped'] == 1
+
+
+def test_block_waits_for_room_then_drops_after_the_timeout():
+    queue = BoundedQueue(1, 'block', block_timeout=0.05)
+    queue.put(1)
+    assert queue.put(2) == 2
+    assert queue.stats()['dropped'] == 1 and queue.stats()['blocked_s'] >= 0.04
+
+    threading.Timer(0.02, queue.get).start()
+    queue.block_timeout = 5
+    assert queue.put(3) is None
+    assert queue.get(timeout=1) == 3
+
+
+def test_forced_items_ignore_the_limit():
+    queue = BoundedQueue(1, 'drop_newest')
+    queue.put(1)
+    assert queue.put(2, force=True) is None
+    assert len(queue) == 2
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        BoundedQueue(1, 'drop_random')
+
+
+def wait_until_empty(queue):
+    while len(queue):
+        time.sleep(0.01)
+
+
+class Stages:
+    """Captures ``segments`` in turn and recognizes them upper-cased; 'noise' is not recognized
+
+    Recognizing ``slow`` waits for ``release``. Once a worker has started on
+    it, the segments after it are captured at once, and the capture loop
+    ends after the last one.
+    """
+
+    def __init__(self, segments, slow=None, release_on=None):
+        self.segments = list(segments)
+        self.slow = slow
+        self.release_on = release_on  # Recognizing this segment sets ``release``
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.executed = []
+        self.done = False
+        self.before_end = lambda: None
+
+    def capture(self):
+        if not self.segments:
+            self.before_end()
+            self.done = True
+            return None
+        if self.slow and self.segments[0] != self.slow:
+            self.started.wait(1)
+        return self.segments.pop(0)
+
+    def recognize(self, audio):
+        if audio == self.release_on:
+            self.release.set()
+        if audio == self.slow:
+            self.started.set()
+            self.release.wait(1)
+        return None if audio == 'noise' else audio.upper()
+
+    def execute(self, text):
+        self.executed.append(text)
+
+    def running(self):
+        return not self.done
+
+
+def test_commands_run_in_spoken_order_when_recognition_finishes_out_of_order():
+    stages = Stages(['a', 'noise', 'b', 'c'], slow='a', release_on='c')
+    pipeline = ListenPipeline(stages.capture, stages.recognize, stages.execute, workers=3)
+    stages.before_end = lambda: wait_until_empty(pipeline.audio_queue)
+    pipeline.run(stages.running)
+
+    assert stages.executed == ['A', 'B', 'C']
+    assert pipeline.stats()['unrecognized'] == 1
+
+
+def test_dropped_segments_do_not_hold_up_later_commands():
+    stages = Stages(['a', 'b', 'c', 'd'], slow='a')
+    pipeline = ListenPipeline(stages.capture, stages.recognize, stages.execute, workers=1,
+                              audio_queue_size=1, audio_policy='drop_oldest')
+
+    def finish_recognition():
+        # 'c' pushed out 'b' and 'd' pushed out 'c' while 'a' was recognized
+        stages.release.set()
+        wait_until_empty(pipeline.audio_queue)
+
+    stages.before_end = finish_recognition
+    pipeline.run(stages.running)
+
+    assert stages.executed == ['A', 'D']
+    assert pipeline.stats()['dropped'] == {'audio_queue_full': 2}
+
+
+def test_stop_discards_queued_audio_and_waits_for_recognized_commands():
+    stages = Stages(['a', 'b'], slow='a')
+    threading.Timer(0.1, stages.release.set).start()
+    pipeline = ListenPipeline(stages.capture, stages.recognize, stages.execute, workers=1)
+    pipeline.run(stages.running)
+
+    # 'b' was still queued when listening stopped; 'a' was being recognized and still ran
+    assert stages.executed == ['A']
+    assert pipeline.stats()['dropped'] == {'stopped': 1}
+    assert not pipeline.running
+
+
+def test_stop_gives_up_after_the_drain_timeout():
+    stages = Stages(['a'], slow='a')
+    pipeline = ListenPipeline(stages.capture, stages.recognize, stages.execute, workers=1)
+    stages.before_end = lambda: stages.started.wait(1)
+    pipeline.run(stages.running, drain_timeout=0.05)
+
+    assert pipeline.running and stages.executed == []
+    stages.release.set()
+    assert pipeline.stop(timeout=1)
+    assert stages.executed == ['A']
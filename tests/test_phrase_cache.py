@@ -0,0 +1,32 @@
+from phrase_cache import PhraseCache
+
+
+class Engine:
+    def getProperty(self, name):
+        return {'voice': 'test', 'rate': 200}.get(name)
+
+
+def cache_at(tmp_path, **kwargs):
+    cache = PhraseCache(str(tmp_path), **kwargs)
+    cache.use_engine(Engine())
+    return cache
+
+
+def test_repeated_response_is_queued_for_rendering(tmp_path):
+    cache = cache_at(tmp_path, render_after=2)
+    assert cache.get("Timer set for 5 minutes") is None
+    assert not cache.pending()
+    cache.get("Timer set for 5 minutes")
+    assert cache.pending()
+
+
+def test_counted_responses_are_bounded(tmp_path):
+    cache = cache_at(tmp_path, render_after=2, max_seen=3)
+    for number in range(10):
+        cache.get(f"Here is what I found about topic {number}")
+    cache.get("x" * (PhraseCache.MAX_COUNTED_CHARS + 1))
+    assert list(cache._seen) == [f"Here is what I found about topic {number}" for number in (7, 8, 9)]
+
+    # The oldest counts were dropped, so saying it again starts over
+    cache.get("Here is what I found about topic 0")
+    assert not cache.pending()
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+sr = pytest.importorskip('speech_recognition')
+
+from audio_fixtures import ReplaySource
+from capture_service import AudioRingBuffer, CaptureService
+from config import PRE_ROLL_S
+from phrase_capture import PreRollStats, listen_phrase
+
+RATE = 16000
+CHUNK = 160
+
+
+def quiet(seconds, start=0):
+    """Low, distinct samples, so the lead-in can be told apart from the phrase"""
+    return (np.arange(start, start + int(RATE * seconds)) % 50).astype(np.int16)
+
+
+def speech(seconds):
+    return np.tile(np.array([3000, -3000], dtype=np.int16), int(RATE * seconds) // 2)
+
+
+def recognizer():
+    recognizer = sr.Recognizer()
+    recognizer.energy_threshold = 300
+    recognizer.dynamic_energy_threshold = False
+    return recognizer
+
+
+def test_phrase_right_after_the_listen_call_gets_pre_roll_from_history():
+    service = CaptureService(chunk_size=CHUNK)
+    service.sample_rate = RATE
+    service.ring = AudioRingBuffer(RATE * 5)
+    history = quiet(1.0)
+    service.ring.write(history)
+
+    stats = PreRollStats()
+    with service.source('test') as source:
+        # The phrase starts with the first chunk this call reads
+        service.ring.write(speech(0.5))
+        service.ring.write(np.zeros(RATE, dtype=np.int16))
+        service.ring.close()
+        audio = listen_phrase(recognizer(), source, pre_roll_s=PRE_ROLL_S, pre_roll_stats=stats)
+
+    lead_in = int(np.ceil(PRE_ROLL_S * RATE / CHUNK)) * CHUNK
+    samples = np.frombuffer(audio.frame_data, dtype='<i2')
+    assert samples[:lead_in].tolist() == history[-lead_in:].tolist()
+    assert samples[lead_in:lead_in + len(speech(0.5))].tolist() == speech(0.5).tolist()
+    assert stats.stats()['from_history'] == 1
+
+
+def test_a_source_without_history_only_has_the_lead_in_it_read():
+    samples = np.concatenate([speech(0.5), np.zeros(RATE, dtype=np.int16)])
+    stats = PreRollStats()
+    audio = listen_phrase(recognizer(), ReplaySource(samples, RATE, CHUNK, speed=0), pre_roll_s=PRE_ROLL_S,
+                          pre_roll_stats=stats)
+
+    assert np.frombuffer(audio.frame_data, dtype='<i2')[:len(speech(0.5))].tolist() == speech(0.5).tolist()
+    assert stats.stats()['from_history'] == 0 and stats.stats()['phrases'] == 1
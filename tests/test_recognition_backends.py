@@ -0,0 +1,118 @@
+import threading
+import time
+
+import pytest
+
+from recognition_backends import Alternative, FakeBackend, HedgedBackend
+
+AUDIO = b'phrase'
+
+
+class UnsureBackend(FakeBackend):
+    """Answers with a confidence below any useful threshold"""
+
+    def _recognize(self, audio):
+        return [Alternative(alt.transcript, 0.1) for alt in super()._recognize(audio)]
+
+
+@pytest.fixture
+def release():
+    """Set at the end of a test so stalled fake requests return"""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def stalled(release):
+    return lambda: release.wait(10) and 0.0
+
+
+def hedged(primary, secondary, **options):
+    options.setdefault('initial_delay_s', 0.1)
+    options.setdefault('min_delay_s', 0.05)
+    options.setdefault('deadline_s', 1.0)
+    return HedgedBackend(primary, secondary, **options)
+
+
+def timed(backend):
+    start = time.perf_counter()
+    alternatives = backend._recognize(AUDIO)
+    return [alt.transcript for alt in alternatives], time.perf_counter() - start
+
+
+def test_fast_primary_wins_without_asking_the_secondary():
+    secondary = FakeBackend(['secondary'])
+    backend = hedged(FakeBackend(['primary']), secondary)
+
+    assert timed(backend)[0] == ['primary']
+    assert secondary.calls == 0
+    assert backend.stats()['hedged'] == 0
+
+
+def test_slow_primary_loses_to_the_secondary(release):
+    backend = hedged(FakeBackend(['primary'], latency_s=stalled(release)), FakeBackend(['secondary']))
+
+    transcripts, elapsed = timed(backend)
+
+    assert transcripts == ['secondary']
+    assert elapsed < 0.5
+    stats = backend.stats()
+    assert stats['hedged'] == 1 and stats['secondary_wins'] == 1
+
+
+def test_failed_primary_asks_the_secondary_at_once():
+    backend = hedged(FakeBackend([[]]), FakeBackend(['secondary']), initial_delay_s=0.8)
+
+    transcripts, elapsed = timed(backend)
+
+    assert transcripts == ['secondary']
+    assert elapsed < 0.4
+
+
+def test_unsure_primary_is_checked_by_the_secondary():
+    backend = hedged(UnsureBackend(['primary']), FakeBackend(['secondary']), min_confidence=0.5)
+
+    assert timed(backend)[0] == ['secondary']
+
+
+def test_unsure_answer_is_kept_when_the_secondary_fails():
+    backend = hedged(UnsureBackend(['primary']), FakeBackend([[]]), min_confidence=0.5)
+
+    assert timed(backend)[0] == ['primary']
+
+
+def test_deadline_returns_nothing_within_the_limit(release):
+    backend = hedged(FakeBackend(['primary'], latency_s=stalled(release)),
+                     FakeBackend(['secondary'], latency_s=stalled(release)), deadline_s=0.3)
+
+    transcripts, elapsed = timed(backend)
+
+    assert transcripts == []
+    assert 0.3 <= elapsed < 0.5
+    stats = backend.stats()
+    assert stats['deadline_misses'] == 1
+    assert stats['abandoned'] == 2 and stats['cancelled'] == 0
+
+
+def test_waiting_requests_are_cancelled_and_running_ones_abandoned(release):
+    primary = FakeBackend(['primary'], latency_s=stalled(release))
+    backend = hedged(primary, FakeBackend(['secondary']), max_workers=1)
+
+    timed(backend)  # Leaves the primary's only thread stalled
+    timed(backend)  # Its request waits for that thread and is cancelled
+
+    stats = backend.stats()
+    assert stats['secondary_wins'] == 2
+    assert stats['abandoned'] == 1
+    assert stats['cancelled'] == 1
+
+
+def test_secondary_keeps_answering_while_the_primary_is_stalled(release):
+    backend = hedged(FakeBackend(['primary'], latency_s=stalled(release)),
+                     FakeBackend(['secondary'], latency_s=0.05), max_workers=2)
+
+    for _ in range(6):
+        transcripts, elapsed = timed(backend)
+        assert transcripts == ['secondary']
+        assert elapsed < 0.5
+    assert backend.stats()['deadline_misses'] == 0
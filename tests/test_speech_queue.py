@@ -0,0 +1,147 @@
+import re
+import time
+
+import pytest
+
+from speech_queue import PRIORITY_ALARM, SpeechQueue
+
+
+class FakeEngine:
+    """Speaks one word every ``word_s`` and reports it like pyttsx3's ``started-word``"""
+
+    def __init__(self, word_s=0.01):
+        self.word_s = word_s
+        self.callbacks = []
+        self.queued = []
+        self.spoken = []  # (text given to say(), words heard)
+        self._stop = False
+
+    def connect(self, name, callback):
+        if name == 'started-word':
+            self.callbacks.append(callback)
+
+    def say(self, text):
+        self.queued.append(text)
+
+    def stop(self):
+        self._stop = True
+
+    def runAndWait(self):
+        self._stop = False
+        for text in self.queued:
+            heard = []
+            for match in re.finditer(r'\S+', text):
+                for callback in self.callbacks:
+                    callback(None, match.start(), len(match.group()))
+                if self._stop:
+                    break
+                heard.append(match.group())
+                time.sleep(self.word_s)
+            self.spoken.append((text, heard))
+        self.queued = []
+
+
+@pytest.fixture
+def speech():
+    engine = FakeEngine()
+    events = []
+    queue = SpeechQueue(lambda: engine, lambda u: events.append(('start', u.remaining)),
+                        lambda u: events.append(('finish', u.state))).start()
+    queue.engine, queue.events = engine, events
+    yield queue
+    queue.close()
+
+
+def wait_until_speaking(speech, timeout=1.0):
+    deadline = time.perf_counter() + timeout
+    while speech.current is None and time.perf_counter() < deadline:
+        time.sleep(0.001)
+
+
+def test_say_returns_before_the_utterance_is_spoken(speech):
+    start = time.perf_counter()
+    utterance = speech.say("one two three four five")
+    assert time.perf_counter() - start < 0.01
+    assert not utterance.done.is_set()
+
+    assert utterance.wait(1)
+    assert utterance.state == 'done'
+    assert speech.events == [('start', "one two three four five"), ('finish', 'done')]
+
+
+def test_alarms_are_spoken_before_queued_responses(speech):
+    first = speech.say("one two three")
+    wait_until_speaking(speech)
+    response = speech.say("a response")
+    alarm = speech.say("wake up", PRIORITY_ALARM)
+    for utterance in (first, response, alarm):
+        utterance.wait(1)
+
+    spoken = [text for text, _ in speech.engine.spoken]
+    assert spoken.index("wake up") < spoken.index("a response")
+
+
+def test_preempted_utterance_resumes_and_waits_for_all_of_it(speech):
+    response = speech.say("one two three four five six seven eight")
+    wait_until_speaking(speech)
+    time.sleep(0.025)
+    alarm = speech.say("wake up", PRIORITY_ALARM)
+
+    assert alarm.wait(1)
+    assert not response.done.is_set()  # Only part of it was said so far
+    assert response.wait(1)
+    assert response.state == 'done'
+
+    (first, cut), (alarm_text, _), (rest, heard) = speech.engine.spoken
+    assert alarm_text == "wake up"
+    # Nothing is lost or repeated across the preemption
+    assert cut + heard == first.split()
+    assert rest == response.text[response.resume_at:]
+    assert speech.stats()['preempted'] == 1
+    assert ('finish', 'preempted') in speech.events
+
+
+def test_barge_in_stops_responses_but_not_alarms(speech):
+    current = speech.say("one two three four five six seven eight")
+    wait_until_speaking(speech)
+    queued = speech.say("a queued response")
+    alarm = speech.say("wake up", PRIORITY_ALARM)
+    alarm.wait(1)
+    wait_until_speaking(speech)
+
+    assert speech.barge_in()
+    for utterance in (current, queued):
+        assert utterance.wait(1)
+    assert current.state == 'interrupted'
+    assert queued.state == 'cancelled'
+    assert alarm.state == 'done'
+    assert "a queued response" not in [text for text, _ in speech.engine.spoken]
+
+
+def test_cancel_drops_queued_speech_and_lets_the_current_finish(speech):
+    current = speech.say("one two three")
+    wait_until_speaking(speech)
+    queued = [speech.say(f"response {i}") for i in range(3)]
+
+    assert speech.cancel() == 3
+    assert current.wait(1) and current.state == 'done'
+    assert all(utterance.state == 'cancelled' and utterance.done.is_set() for utterance in queued)
+
+
+def test_engine_failure_cancels_speech():
+    def broken():
+        raise RuntimeError("no voices")
+
+    queue = SpeechQueue(broken).start()
+    queue._thread.join(1)
+    utterance = queue.say("hello")
+    assert utterance.done.is_set() and utterance.state == 'cancelled'
+
+
+def test_words_are_reported_as_they_are_spoken():
+    engine = FakeEngine()
+    words = []
+    queue = SpeechQueue(lambda: engine, on_word=words.append).start()
+    queue.say("hello there world").wait(1)
+    queue.close()
+    assert words == ["hello", "there", "world"]
@@ -0,0 +1,36 @@
+from telemetry import Tracer, percentile
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) == 0.0
+
+
+def test_spans_of_one_trace_share_its_id():
+    tracer = Tracer(enabled=True)
+    trace_id = tracer.new_trace()
+    with tracer.activate(trace_id):
+        with tracer.span('route', intent='time'):
+            pass
+    with tracer.span('tts'):
+        pass
+
+    spans = list(tracer._finished)
+    assert [(span[0], span[1]) for span in spans] == [(trace_id, 'route'), (None, 'tts')]
+    assert tracer.stats()['route']['count'] == 1
+
+
+def test_ignored_exceptions_are_not_errors():
+    tracer = Tracer(enabled=True)
+    for error in (TimeoutError, ValueError):
+        try:
+            with tracer.span('capture', ignore=(TimeoutError,)):
+                raise error
+        except error:
+            pass
+    stats = tracer.stats()['capture']
+    assert stats['errors'] == 1 and stats['count'] == 0
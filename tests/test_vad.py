@@ -0,0 +1,43 @@
+from collections import namedtuple
+
+import numpy as np
+
+from vad import VoiceActivityDetector
+
+RATE = 16000
+
+
+class FakeAudio(namedtuple('FakeAudio', ['samples', 'sample_rate'])):
+    """The part of ``speech_recognition.AudioData`` the VAD uses"""
+
+    def get_raw_data(self, convert_width=None):
+        return self.samples.astype('<i2').tobytes()
+
+
+def vowel(dbfs, seconds=0.8):
+    """A voiced, harmonic sound between two silences, at ``dbfs`` RMS"""
+    t = np.arange(int(RATE * seconds)) / RATE
+    sound = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 12)) * (0.6 + 0.4 * np.sin(2 * np.pi * 3 * t))
+    sound *= 10 ** (dbfs / 20) / np.sqrt((sound ** 2).mean())
+    silence = np.zeros(RATE // 4)
+    return FakeAudio((np.concatenate([silence, sound, silence]) * 32767).astype(np.int16), RATE)
+
+
+def noise(dbfs, seconds=0.8):
+    rng = np.random.default_rng(0)
+    return FakeAudio((rng.normal(0, 10 ** (dbfs / 20), int(RATE * seconds)) * 32767).astype(np.int16), RATE)
+
+
+def test_speech_passes_and_noise_does_not():
+    vad = VoiceActivityDetector(audit_rate=0)
+    assert vad.accept(vowel(-30))
+    assert not vad.accept(noise(-20))
+    assert vad.stats()['speech'] == 1 and vad.stats()['rejected'] == 1
+
+
+def test_only_loud_speech_barges_in():
+    vad = VoiceActivityDetector(audit_rate=0)
+    assert vad.is_barge_in(vowel(-15), min_dbfs=-30)
+    assert not vad.is_barge_in(vowel(-40), min_dbfs=-30)  # The assistant's echo
+    assert not vad.is_barge_in(noise(-10), min_dbfs=-30)
+    assert vad.stats()['segments'] == 0
@@ -0,0 +1,10 @@
+from benchmarks.wake_word_bench import run_clip
+from benchmarks.wake_word_fixtures import synthetic_fixtures
+from wake_word import WakeWordDetector, enroll
+
+
+def test_synthetic_wake_word_is_accepted_and_other_sounds_are_not():
+    clips = synthetic_fixtures()
+    detector = WakeWordDetector(enroll(clips['enroll']), sensitivity=0.5)
+    assert all(run_clip(detector, samples) for samples, _ in clips['positive'])
+    assert not any(run_clip(detector, samples) for samples, _ in clips['negative'])
@@ -0,0 +1,137 @@
+"""Voice activity detection for captured audio segments.
+
+``recognizer.listen`` cuts the microphone stream into segments with a single
+energy threshold, so a door slam, typing or a fan turning on becomes a
+segment too, and each one used to cost a recognition request. The VAD scores
+every segment before it is sent anywhere.
+
+A segment is split into 20 ms frames. A frame counts as voiced when it is
+loud enough, both in absolute terms and against the segment's quietest
+frames, and carries most of its power in the speech band. It also needs a
+low zero-crossing rate, since noise and hiss cross zero far more often than
+voiced speech, and a low spectral flatness, since speech has harmonics while
+noise and clicks spread their energy evenly. A segment
+whose voiced frames add up to ``min_speech_s`` is speech. Short bangs and
+clicks, and steady noise, are not.
+
+Some rejected segments are still sent to the recognizer (``audit_rate``).
+Those the recognizer understands anyway show how often speech is wrongly
+rejected, without keeping labeled recordings around.
+
+While the assistant speaks, the microphone hears it too. ``is_barge_in``
+tells the user talking over it from that echo. It scores the segment with a
+much higher loudness floor, since a user near the microphone is louder than
+the speakers across the room.
+"""
+import threading
+import weakref
+from collections import namedtuple
+
+import numpy as np
+
+VadResult = namedtuple('VadResult', ['is_speech', 'speech_s', 'longest_run_s', 'frames'])
+
+FRAME_S = 0.020
+HOP_S = 0.010
+
+
+class VoiceActivityDetector:
+    MIN_DBFS = -55.0         # Quieter frames are silence whatever the noise floor
+    ABOVE_FLOOR_DB = 9.0     # How far above the segment's quietest frames speech must be
+    MAX_ZCR = 0.25           # Zero crossings per sample
+    MAX_FLATNESS = 0.35      # Geometric over arithmetic mean of the power spectrum
+    MIN_BAND_SHARE = 0.5     # Share of the power between 100 Hz and 4 kHz, which excludes mains hum
+    MIN_RUN_S = 0.06         # Voiced frames must come in runs at least this long
+
+    def __init__(self, min_speech_s=0.15, audit_rate=0.05):
+        self.min_speech_s = min_speech_s
+        self.audit_every = round(1 / audit_rate) if audit_rate else 0
+        self._lock = threading.Lock()
+        self._audits = weakref.WeakSet()
+
+        self.segments = 0
+        self.passed = 0
+        self.rejected = 0
+        self.audited = 0
+        self.audit_recognized = 0
+
+    def score(self, samples, sample_rate, min_dbfs=None):
+        """Classify int16 ``samples``; ``min_dbfs`` overrides MIN_DBFS"""
+        samples = np.asarray(samples, dtype=np.float64) / 32768.0
+        frame_length = int(FRAME_S * sample_rate)
+        hop = int(HOP_S * sample_rate)
+        if len(samples) < frame_length:
+            return VadResult(False, 0.0, 0.0, 0)
+        frames = np.lib.stride_tricks.sliding_window_view(samples, frame_length)[::hop]
+        frames = frames - frames.mean(axis=1, keepdims=True)
+
+        energy_db = 10 * np.log10((frames ** 2).mean(axis=1) + 1e-12)
+        floor_db = np.percentile(energy_db, 10)
+        zcr = (np.diff(np.signbit(frames), axis=1)).mean(axis=1)
+
+        n_fft = 1 << (frame_length - 1).bit_length()
+        power = np.abs(np.fft.rfft(frames * np.hanning(frame_length), n_fft)) ** 2 + 1e-12
+        freqs = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+        band = power[:, (freqs >= 100) & (freqs <= 4000)]
+        flatness = np.exp(np.log(band).mean(axis=1)) / band.mean(axis=1)
+        band_share = band.sum(axis=1) / power.sum(axis=1)
+
+        min_dbfs = self.MIN_DBFS if min_dbfs is None else min_dbfs
+        voiced = ((energy_db > min_dbfs) & (energy_db > floor_db + self.ABOVE_FLOOR_DB)
+                  & (zcr < self.MAX_ZCR) & (flatness < self.MAX_FLATNESS) & (band_share > self.MIN_BAND_SHARE))
+
+        # Lengths of the runs of voiced frames; isolated frames are clicks
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], voiced.astype(np.int8), [0]))))
+        runs = edges[1::2] - edges[::2]
+        min_run = max(1, int(round(self.MIN_RUN_S / HOP_S)))
+        speech_s = runs[runs >= min_run].sum() * HOP_S
+        longest_s = (runs.max() if len(runs) else 0) * HOP_S
+        return VadResult(bool(speech_s >= self.min_speech_s), float(speech_s), float(longest_s), len(frames))
+
+    def accept(self, audio):
+        """Whether a ``speech_recognition.AudioData`` segment should be recognized
+
+        Counts the decision. Every ``audit_every``-th rejected segment is
+        accepted anyway and remembered, to be settled by record_recognition().
+        """
+        result = self.score(np.frombuffer(audio.get_raw_data(convert_width=2), dtype='<i2'), audio.sample_rate)
+        with self._lock:
+            self.segments += 1
+            if result.is_speech:
+                self.passed += 1
+                return True
+            self.rejected += 1
+            if self.audit_every and self.rejected % self.audit_every == 0:
+                self.audited += 1
+                self._audits.add(audio)
+                return True
+            return False
+
+    def is_barge_in(self, audio, min_dbfs):
+        """Whether ``audio`` holds speech louder than ``min_dbfs``, not just the assistant's echo
+
+        Not counted in stats(); the segment still goes through accept().
+        """
+        samples = np.frombuffer(audio.get_raw_data(convert_width=2), dtype='<i2')
+        return self.score(samples, audio.sample_rate, min_dbfs).is_speech
+
+    def record_recognition(self, audio, recognized):
+        """Report whether the recognizer understood ``audio``; only audits are counted"""
+        with self._lock:
+            if audio in self._audits:
+                self._audits.discard(audio)
+                self.audit_recognized += bool(recognized)
+
+    def stats(self):
+        with self._lock:
+            audit_ratio = self.audit_recognized / self.audited if self.audited else 0.0
+            return {
+                'segments': self.segments,
+                'speech': self.passed,
+                'rejected': self.rejected,
+                'requests_saved': self.rejected - self.audited,
+                'audited': self.audited,
+                'wrongly_rejected': self.audit_recognized,
+                # Audits are a sample of all rejections, so scale up what they found
+                'estimated_wrongly_rejected': round(audit_ratio * self.rejected, 1),
+            }
@@ -1,18 +1,34 @@
 import speech_recognition as sr
-from config import WAKE_WORD
+from config import (WAKE_WORD, WAKE_WORD_TEMPLATES_PATH, WAKE_WORD_SENSITIVITY, RECOGNITION_BACKEND,
+					RECOGNITION_LANGUAGE, VOSK_MODEL_PATH, STREAMING_RECOGNITION, NOISE_CALIBRATION_PATH,
+					PRE_ROLL_S)
+from noise_calibration import NoiseCalibration
+from capture_service import CaptureService
+from recognition_backends import create_backend
+from phrase_capture import listen_phrase
+import wake_word
 from PyQt6.QtCore import QObject, pyqtSignal
 
 class VoiceRecognizer(QObject):
 	on_partial_result = pyqtSignal(str)
 
-	def __init__(self):
+	def __init__(self, backend=None, choose_transcript=None, capture_service=None):
 		super().__init__()
+		# Picks one transcript from the n-best alternatives; the first one without it
+		self.choose_transcript = choose_transcript
+		self.wake_word_detector = None
 		self.recognizer = sr.Recognizer()
+		self.backend = backend or create_backend(RECOGNITION_BACKEND, self.recognizer, RECOGNITION_LANGUAGE, VOSK_MODEL_PATH)
+		self.noise_calibration = NoiseCalibration(NOISE_CALIBRATION_PATH)
+		# Reads the shared microphone through its own cursor; standalone it opens one
+		self.capture_service = capture_service
 		try:
-			self.microphone = sr.Microphone()
+			if self.capture_service is None:
+				self.capture_service = CaptureService().start()
+			self.microphone = self.capture_service.source('voice_recognizer')
 			with self.microphone as source:
-				print("Adjusting for ambient noise...")
-				self.recognizer.adjust_for_ambient_noise(source, duration=1)
+				# Restores the device's saved energy threshold instead of calibrating for a second
+				self.noise_calibration.prepare(self.recognizer, source)
 				print("Microphone initialized successfully")
 		except Exception as e:
 			print(f"Error initializing microphone: {e}")
@@ -32,16 +48,21 @@ class VoiceRecognizer(QObject):
 		try:
 			with self.microphone as source:
 				print("Listening for wake word...")
-				audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=3)
+				# Detect the wake word on the device; recognition starts only after it
+				if self.wake_word_detector is None:
+					self.wake_word_detector = wake_word.load_detector(
+						WAKE_WORD_TEMPLATES_PATH, source.SAMPLE_RATE, WAKE_WORD_SENSITIVITY) or False
+				if self.wake_word_detector:
+					heard = wake_word.listen_for_wake_word(source, self.wake_word_detector, timeout=5,
+														 recognizer=self.recognizer)
+					self.noise_calibration.update(self.recognizer)
+					return heard
+
+				# Without recorded templates, fall back to recognizing the whole window
+				audio = listen_phrase(self.recognizer, source, timeout=5, phrase_time_limit=3, pre_roll_s=PRE_ROLL_S)
 			
-			try:
-				text = self.recognizer.recognize_google(audio).lower()
-				return WAKE_WORD in text
-			except sr.UnknownValueError:
-				return False
-			except sr.RequestError as e:
-				print(f"Could not request results from speech recognition service: {e}")
-				return False
+			text = self.backend.recognize(audio)
+			return bool(text) and WAKE_WORD in text.lower()
 		except Exception as e:
 			print(f"Error listening for wake word: {e}")
 			return False
@@ -55,32 +76,31 @@ class VoiceRecognizer(QObject):
 			with self.microphone as source:
 				print("\nListening...")
 				# Use shorter timeout for more responsive feedback
-				audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=5)
-				
-				# First try to get partial results
-				try:
-					partial_results = self.recognizer.recognize_google(audio, show_all=True)
-					if partial_results and 'alternative' in partial_results:
-						for alt in partial_results['alternative']:
-							if 'transcript' in alt:
-								self.on_partial_result.emit(alt['transcript'].lower())
-				except sr.UnknownValueError:
-					pass
-				except sr.RequestError as e:
-					print(f"Error getting partial results: {e}")
-				except Exception as e:
-					print(f"Unexpected error in partial recognition: {e}")
+				if STREAMING_RECOGNITION and self.backend.streaming:
+					# Partial transcripts are emitted while the user is still speaking
+					stream = self.backend.stream(source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+					def on_chunk(chunk):
+						partial = stream.feed(chunk)
+						if partial:
+							self.on_partial_result.emit(partial.lower())
+					listen_phrase(self.recognizer, source, 5, 5, on_chunk, stream.reset, PRE_ROLL_S)
+				else:
+					stream = None
+					audio = listen_phrase(self.recognizer, source, timeout=5, phrase_time_limit=5, pre_roll_s=PRE_ROLL_S)
+				self.noise_calibration.update(self.recognizer)
 				
-				# Then get final result
+				# One recognition result gives both the alternatives shown as partial results and the final text
 				try:
-					text = self.recognizer.recognize_google(audio)
-					return text.lower()
-				except sr.UnknownValueError:
-					print("Could not understand audio")
-					return None
-				except sr.RequestError as e:
-					print(f"Could not request results from speech recognition service: {e}")
-					return None
+					result = stream.finish() if stream else self.backend.recognize_result(audio)
+					if not result:
+						print("Could not understand audio")
+						return None
+					transcripts = [text.lower() for text in result.transcripts]
+					for text in transcripts:
+						self.on_partial_result.emit(text)
+					if self.choose_transcript:
+						return self.choose_transcript(transcripts)
+					return transcripts[0]
 				except Exception as e:
 					print(f"Unexpected error in speech recognition: {e}")
 					return None
@@ -95,10 +115,13 @@ class VoiceRecognizer(QObject):
 	def reinitialize_microphone(self):
 		"""Attempt to reinitialize the microphone if it fails"""
 		try:
-			self.microphone = sr.Microphone()
+			# Cursors of other consumers belong to the old stream and have to be recreated too
+			self.capture_service.stop()
+			self.capture_service.start()
+			self.microphone = self.capture_service.source('voice_recognizer')
 			with self.microphone as source:
 				print("Reinitializing microphone...")
-				self.recognizer.adjust_for_ambient_noise(source, duration=1)
+				self.noise_calibration.prepare(self.recognizer, source)
 				print("Microphone reinitialized successfully")
 			return True
 		except Exception as e:
@@ -0,0 +1,308 @@
+"""On-device wake word detection.
+
+The wake word used to be found by sending a 3 second recording to the speech
+recognizer every few seconds. This detector runs on the raw microphone frames
+instead, so recognition only starts once the wake word was heard locally.
+
+Each 10 ms frame becomes an MFCC vector. The stream is matched against a few
+recorded examples of the wake word (templates) with subsequence dynamic time
+warping. A frame's cost is the cosine distance between the MFCC vectors, and
+a match is the mean cost along the best path through a whole template, so a
+clip spoken up to twice as fast or slow still matches. The wake word is
+detected when that distance drops below ``sensitivity * MAX_DISTANCE``:
+higher sensitivity accepts more, including more false alarms.
+
+Record templates (about five are plenty) from WAV files or the microphone:
+    python wake_word.py --enroll hey_athena_1.wav hey_athena_2.wav ...
+    python wake_word.py --record 5
+"""
+import argparse
+import os
+import sys
+import wave
+
+import numpy as np
+
+from phrase_capture import adapt_energy_threshold, rms
+
+SAMPLE_RATE = 16000
+FRAME_S = 0.025
+HOP_S = 0.010
+MEL_FILTERS = 26
+CEPSTRA = 12  # Coefficients 1-12; c0 is the frame's loudness and is left out
+MAX_FREQ = 8000.0
+
+
+def read_wav(path):
+    """Mono int16 samples and the sample rate of a 16 bit PCM WAV file"""
+    with wave.open(path, 'rb') as f:
+        if f.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16 bit samples, got {8 * f.getsampwidth()} bit")
+        samples = np.frombuffer(f.readframes(f.getnframes()), dtype='<i2')
+        if f.getnchannels() > 1:
+            samples = samples.reshape(-1, f.getnchannels()).mean(axis=1).astype(np.int16)
+        return samples, f.getframerate()
+
+
+def _mel(hz):
+    return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+
+def _mel_filterbank(sample_rate, n_fft):
+    max_freq = min(MAX_FREQ, sample_rate / 2)
+    hz = 700.0 * (10 ** (np.linspace(_mel(20.0), _mel(max_freq), MEL_FILTERS + 2) / 2595.0) - 1.0)
+    bins = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    lower, center, upper = hz[:-2, None], hz[1:-1, None], hz[2:, None]
+    rising = (bins - lower) / (center - lower)
+    falling = (upper - bins) / (upper - center)
+    return np.maximum(0.0, np.minimum(rising, falling)).T  # (bins, filters)
+
+
+def _dct_matrix():
+    n = np.arange(MEL_FILTERS)
+    k = np.arange(1, CEPSTRA + 1)[:, None]
+    return (np.cos(np.pi * k * (2 * n + 1) / (2 * MEL_FILTERS)) * np.sqrt(2.0 / MEL_FILTERS)).T
+
+
+class MfccExtractor:
+    """Streaming MFCCs: feed samples in any chunk size, get one row per complete frame"""
+
+    def __init__(self, sample_rate=SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.frame_length = int(round(FRAME_S * sample_rate))
+        self.hop = int(round(HOP_S * sample_rate))
+        n_fft = 1 << (self.frame_length - 1).bit_length()
+        self.n_fft = n_fft
+        self.window = np.hamming(self.frame_length)
+        self.filterbank = _mel_filterbank(sample_rate, n_fft)
+        self.dct = _dct_matrix()
+        self.reset()
+
+    def reset(self):
+        self._buffer = np.zeros(0)
+        self._last_sample = 0.0
+
+    def process(self, samples):
+        samples = np.asarray(samples, dtype=np.float64) / 32768.0
+        if not len(samples):
+            return np.zeros((0, CEPSTRA))
+        # Pre-emphasis, carrying the previous chunk's last sample over
+        emphasized = np.empty_like(samples)
+        emphasized[0] = samples[0] - 0.97 * self._last_sample
+        emphasized[1:] = samples[1:] - 0.97 * samples[:-1]
+        self._last_sample = samples[-1]
+
+        buffer = np.concatenate((self._buffer, emphasized))
+        count = 0 if len(buffer) < self.frame_length else 1 + (len(buffer) - self.frame_length) // self.hop
+        self._buffer = buffer[count * self.hop:]
+        if not count:
+            return np.zeros((0, CEPSTRA))
+
+        frames = np.lib.stride_tricks.sliding_window_view(buffer, self.frame_length)[::self.hop][:count]
+        power = np.abs(np.fft.rfft(frames * self.window, self.n_fft)) ** 2 / self.n_fft
+        return np.log(power @ self.filterbank + 1e-10) @ self.dct
+
+
+def mfcc(samples, sample_rate=SAMPLE_RATE):
+    """MFCCs of a whole clip"""
+    return MfccExtractor(sample_rate).process(samples)
+
+
+def trim_silence(samples, sample_rate=SAMPLE_RATE, margin_s=0.05):
+    """Cut the quiet lead-in and tail off a clip, keeping ``margin_s`` of each"""
+    samples = np.asarray(samples)
+    hop = int(HOP_S * sample_rate)
+    count = len(samples) // hop
+    if not count:
+        return samples
+    energy = (samples[:count * hop].astype(np.float64).reshape(count, hop) ** 2).mean(axis=1)
+    # Loud frames are those within 30 dB of the loudest one
+    loud = np.flatnonzero(energy > energy.max() * 1e-3)
+    margin = int(margin_s * sample_rate)
+    start = max(0, loud[0] * hop - margin)
+    end = min(len(samples), (loud[-1] + 1) * hop + margin)
+    return samples[start:end]
+
+
+def enroll(clips):
+    """Templates from ``(samples, sample_rate)`` recordings of the wake word"""
+    return [mfcc(trim_silence(samples, rate), rate) for samples, rate in clips]
+
+
+def save_templates(path, templates):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez(path, *templates)
+
+
+def load_templates(path):
+    with np.load(path) as data:
+        return [data[name] for name in sorted(data.files, key=lambda name: int(name.split('_')[-1]))]
+
+
+class WakeWordDetector:
+    MAX_DISTANCE = 0.6  # Mean cosine distance accepted at sensitivity 1.0
+
+    def __init__(self, templates, sample_rate=SAMPLE_RATE, sensitivity=0.5, refractory_s=1.0):
+        if not templates:
+            raise ValueError("The wake word detector needs at least one template")
+        self.extractor = MfccExtractor(sample_rate)
+        self.sensitivity = sensitivity
+        self.refractory_frames = int(refractory_s / HOP_S)
+
+        # All templates are matched at once: they are laid out one after the
+        # other, each behind two padding slots that hold the free start of a match
+        units = [t / np.maximum(np.linalg.norm(t, axis=1, keepdims=True), 1e-10) for t in templates]
+        self.template_frames = np.concatenate(units)
+        lengths = np.array([len(t) for t in units])
+        starts = np.concatenate(([0], np.cumsum(lengths + 2)[:-1])) + 2
+        self._rows = np.concatenate([np.arange(start, start + length) for start, length in zip(starts, lengths)])
+        self._size = int(lengths.sum() + 2 * len(units))
+        self._starts = starts
+        self._ends = starts + lengths - 1
+        self._lengths = lengths
+        self.reset()
+
+        self.frames = 0
+        self.detections = 0
+        self.best_distance = np.inf  # Closest match seen since the last detection
+
+    @property
+    def threshold(self):
+        return self.sensitivity * self.MAX_DISTANCE
+
+    def reset(self):
+        self.extractor.reset()
+        self._previous = self._empty_column()
+        self._before_previous = self._empty_column()
+        self._quiet_frames = 0
+
+    def _empty_column(self):
+        column = np.full(self._size, np.inf)
+        column[self._starts - 1] = 0.0  # A match may start at any frame
+        return column
+
+    def process(self, samples):
+        """Feed microphone samples (int16 array or bytes); True once the wake word was heard"""
+        if isinstance(samples, (bytes, bytearray)):
+            samples = np.frombuffer(samples, dtype='<i2')
+        features = self.extractor.process(samples)
+        if not len(features):
+            return False
+        norms = np.maximum(np.linalg.norm(features, axis=1, keepdims=True), 1e-10)
+        costs = 1.0 - (features / norms) @ self.template_frames.T
+
+        detected = False
+        for frame_costs in costs:
+            self.frames += 1
+            if self._quiet_frames:
+                self._quiet_frames -= 1
+                continue
+            if self._step(frame_costs):
+                detected = True
+                self.detections += 1
+                self.best_distance = np.inf
+                # Start over so the same utterance isn't detected twice
+                self._previous = self._empty_column()
+                self._before_previous = self._empty_column()
+                self._quiet_frames = self.refractory_frames
+        return detected
+
+    def _step(self, frame_costs):
+        # Each template frame is counted once per path, so the total divided by
+        # the template length is the mean cost. Allowed steps:
+        #   (1, 1) diagonal, (2, 1) two template frames on one input frame,
+        #   (1, 2) one template frame over two input frames (the first is skipped)
+        cost = np.full(self._size, np.inf)
+        cost[self._rows] = frame_costs
+        previous, before = self._previous, self._before_previous
+        column = np.full(self._size, np.inf)
+        column[2:] = cost[2:] + np.minimum.reduce((
+            previous[1:-1],
+            previous[:-2] + cost[1:-1],
+            before[1:-1],
+        ))
+        column[self._starts - 1] = 0.0
+        column[self._starts - 2] = np.inf
+        self._before_previous = previous
+        self._previous = column
+
+        distances = column[self._ends] / self._lengths
+        distance = distances.min()
+        self.best_distance = min(self.best_distance, distance)
+        return distance <= self.threshold
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'audio_s': self.frames * HOP_S,
+            'detections': self.detections,
+            'threshold': self.threshold,
+            'best_distance': float(self.best_distance),
+        }
+
+
+def load_detector(path, sample_rate=SAMPLE_RATE, sensitivity=0.5):
+    """A detector for the templates at ``path``, or None when none were recorded"""
+    try:
+        return WakeWordDetector(load_templates(path), sample_rate, sensitivity)
+    except FileNotFoundError:
+        print(f"No wake word templates at {path}, run 'python wake_word.py --record 5' to record some")
+    except Exception as e:
+        print(f"Could not load wake word templates: {e}")
+    return None
+
+
+def listen_for_wake_word(source, detector, timeout=None, recognizer=None):
+    """Read an open ``speech_recognition.Microphone`` until the detector fires
+
+    Returns False when ``timeout`` seconds of audio passed without the wake
+    word. Quiet audio keeps adapting ``recognizer``'s energy threshold.
+    """
+    seconds_per_buffer = source.CHUNK / source.SAMPLE_RATE
+    heard_s = 0.0
+    while timeout is None or heard_s < timeout:
+        buffer = source.stream.read(source.CHUNK)
+        if detector.process(buffer):
+            # What follows is a command, not the rest of this detection
+            detector.reset()
+            return True
+        if recognizer:
+            adapt_energy_threshold(recognizer, rms(buffer, source.SAMPLE_WIDTH), seconds_per_buffer)
+        heard_s += seconds_per_buffer
+    return False
+
+
+def record_clips(count):
+    import speech_recognition as sr
+
+    recognizer = sr.Recognizer()
+    clips = []
+    with sr.Microphone() as source:
+        recognizer.adjust_for_ambient_noise(source, duration=1)
+        for i in range(count):
+            input(f"Press Enter, then say the wake word ({i + 1}/{count})")
+            audio = recognizer.listen(source, timeout=5, phrase_time_limit=3)
+            raw = audio.get_raw_data(convert_rate=SAMPLE_RATE, convert_width=2)
+            clips.append((np.frombuffer(raw, dtype='<i2'), SAMPLE_RATE))
+    return clips
+
+
+def main(argv=None):
+    from config import WAKE_WORD, WAKE_WORD_TEMPLATES_PATH
+
+    parser = argparse.ArgumentParser(description=f"Record wake word templates for '{WAKE_WORD}'")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--enroll', nargs='+', metavar='WAV', help="recordings of the wake word")
+    source.add_argument('--record', type=int, metavar='N', help="record N examples from the microphone")
+    parser.add_argument('--output', default=WAKE_WORD_TEMPLATES_PATH, help="where to write the templates")
+    args = parser.parse_args(argv)
+
+    clips = [read_wav(path) for path in args.enroll] if args.enroll else record_clips(args.record)
+    templates = enroll(clips)
+    save_templates(args.output, templates)
+    print(f"Saved {len(templates)} wake word templates to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
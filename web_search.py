@@ -3,6 +3,7 @@ from bs4 import BeautifulSoup
 from googlesearch import search
 import re
 import time
+from telemetry import tracer
 
 class WebSearch:
     def __init__(self):
@@ -102,12 +103,14 @@ class WebSearch:
             headers = {'User-Agent': self.user_agent}
             
             # Get URLs from Google
-            urls = list(search(enhanced_query, num_results=num_results, stop=num_results))
+            with tracer.span('web_query'):
+                urls = list(search(enhanced_query, num_results=num_results, stop=num_results))
             
             # Process each URL
             for url in urls:
                 try:
-                    response = requests.get(url, headers=headers, timeout=5)
+                    with tracer.span('web_fetch'):
+                        response = requests.get(url, headers=headers, timeout=5)
                     if response.status_code == 200:
                         soup = BeautifulSoup(response.text, 'html.parser')
                         
@@ -190,7 +193,8 @@ class WebSearch:
             # Try to get definition-style content
             for url in search(search_query, num_results=8):
                 try:
-                    response = requests.get(url, headers=headers, timeout=5)
+                    with tracer.span('web_fetch'):
+                        response = requests.get(url, headers=headers, timeout=5)
                     if response.status_code == 200:
                         soup = BeautifulSoup(response.text, 'html.parser')
                         
@@ -299,7 +303,8 @@ class WebSearch:
                     ]):
                         continue
                         
-                    response = requests.get(url, headers=headers, timeout=5)
+                    with tracer.span('web_fetch'):
+                        response = requests.get(url, headers=headers, timeout=5)
                     if response.status_code == 200:
                         soup = BeautifulSoup(response.text, 'html.parser')
                         
@@ -372,15 +377,19 @@ class WebSearch:
         # Clean the query
         query = re.sub(r'[^\w\s]', ' ', query).strip()
         
-        # Check if it's a product query
-        if any(word in query.lower() for word in ['latest', 'newest', 'recent']) and \
-           any(word in query.lower() for word in ['model', 'version', 'phone', 'iphone', 'samsung', 'device']):
-            result = self.get_product_info(query)
-        elif any(phrase in query.lower() for phrase in ['what is', 'what are', 'define', 'tell me about']):
-            topic = re.sub(r'what\s+(?:is|are)\s+|define\s+|tell\s+me\s+about\s+', '', query.lower()).strip()
-            result = self.get_simple_definition(topic)
-        else:
-            result = self.search_web(query)
+        with tracer.span('web_search') as span:
+            # Check if it's a product query
+            if any(word in query.lower() for word in ['latest', 'newest', 'recent']) and \
+               any(word in query.lower() for word in ['model', 'version', 'phone', 'iphone', 'samsung', 'device']):
+                span.set(kind='product')
+                result = self.get_product_info(query)
+            elif any(phrase in query.lower() for phrase in ['what is', 'what are', 'define', 'tell me about']):
+                span.set(kind='definition')
+                topic = re.sub(r'what\s+(?:is|are)\s+|define\s+|tell\s+me\s+about\s+', '', query.lower()).strip()
+                result = self.get_simple_definition(topic)
+            else:
+                span.set(kind='search', cached=query in self.search_cache)
+                result = self.search_web(query)
         
         # Format the response
         if result and not result.startswith(("I couldn't", "I'm having")):